@@ -10,32 +10,55 @@ import numpy as np
 from io import BytesIO
 from werkzeug.utils import secure_filename
 import base64
+import json
 from bs4 import BeautifulSoup
-from urllib.parse import urlparse
+from urllib.parse import urlparse, quote, urlencode
 import hashlib
 import uuid
 import re
-from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
-from google import genai
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
 import time
 import traceback
-from googleapiclient.discovery import build
+from datetime import datetime
+import zipfile
+import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from rembg import remove
 # Load environment variables
 load_dotenv()
 
+# Shared clients (created once per worker, after .env is loaded)
+from blob_store import blob_store, image_extension, sniff_image_mime
+from db_pool import db_pool
+from auth import password_hasher, session_tokens
+from gemini_client import gemini_manager
+from tryon_cache import tryon_cache, tryon_cache_key
+from proxy_cache import proxy_cache
+from http_sessions import http_sessions
+from image_probe import image_prober
+from image_dedupe import image_deduper
+from search_cache import search_cache, normalize_query
+from custom_search import CustomSearchClient
+from search_classifier import search_classifier
+from chat_cache import chat_cache
+from image_postprocess import postprocess_transparency
+from model_input import model_input_encoder
+from tryon_prompts import tryon_prompts, estimate_tokens
+from rembg_sessions import rembg_sessions, UnknownRembgModel
+from tryon_jobs import tryon_jobs, JobQueueFull, TryonResult, FINISHED_STATUSES, STATUS_DONE
+
 app = Flask(__name__)
 CORS(app)
 
 # Configure Gemini AI (includes Nano Banana image generation capabilities)
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-# Note: Using google.genai client instead of google.generativeai
+# Note: Using google.genai client instead of google.generativeai; gemini_client builds it at boot
 
 # Configure Google Custom Search API
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 GOOGLE_CSE_ID = os.getenv('GOOGLE_CSE_ID')
+custom_search_client = CustomSearchClient(GOOGLE_API_KEY)
 
 MYSQL_HOST = os.environ.get('MYSQL_HOST', 'localhost')
 MYSQL_USER = os.environ.get('MYSQL_USER', 'root')
@@ -43,16 +66,6 @@ MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD', 'root')
 MYSQL_DATABASE = os.environ.get('MYSQL_DATABASE', 'hello_db')
 
 
-db_config = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'root',  # Add your MySQL password here if you have one
-    'database': 'hello_db',
-    'charset': 'utf8mb4',
-    'collation': 'utf8mb4_unicode_ci',
-    'autocommit': True
-}
-
 WARDROBE_FOLDER = "../frontend/public/images/wardrobe"
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "webp"}
 
@@ -60,6 +73,11 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def format_counters(stats):
+    """One-line "key=value" rendering of a cache's stats() for the request log"""
+    return ' '.join(f"{key}={value}" for key, value in stats.items())
+
+
 # Proxy endpoint for background removal
 @app.route('/api/remove-bg', methods=['POST'])
 def remove_bg():
@@ -71,12 +89,11 @@ def remove_bg():
     file = request.files['file']
     files = {'file': (file.filename, file.stream, file.mimetype)}
     try:
-        resp = requests.post(
+        resp = http_sessions.get('bg-service').post(
             api_url,
             files=files,
             auth=(api_username, api_password),
-            headers={"Accept":"image/png"},
-            timeout=60
+            headers={"Accept":"image/png"}
         )
         if resp.status_code == 200:
             return Response(resp.content, mimetype='image/png')
@@ -160,8 +177,6 @@ def remove_person_bg():
         image_bytes = pil_to_bytes(original_pil, fmt="PNG")
         image_b64 = base64.b64encode(image_bytes).decode('utf-8')
 
-        # Initialize Gemini client
-        client = genai.Client(api_key=GEMINI_API_KEY)
         model_name = "gemini-2.5-flash-image"
 
         # Concise, token-efficient prompt
@@ -191,7 +206,7 @@ def remove_person_bg():
                     {"parts": [{"inline_data": {"mime_type": "image/png", "data": image_b64}}]}
                 ]
                 
-                generation_response = client.models.generate_content(
+                generation_response = gemini_manager.generate_content(
                     model=model_name,
                     contents=contents
                 )
@@ -232,86 +247,7 @@ def remove_person_bg():
                     
                     # POST-PROCESS: Remove checkered/white background and create true transparency
                     try:
-                        print("[REMOVE-PERSON-BG][POST-PROCESS] Starting background removal...")
-                        
-                        # Load image from bytes
-                        result_image = Image.open(BytesIO(image_data))
-                        
-                        # Convert to RGBA if not already
-                        if result_image.mode != 'RGBA':
-                            result_image = result_image.convert('RGBA')
-                            print(f"[REMOVE-PERSON-BG][POST-PROCESS] Converted to RGBA mode")
-                        
-                        # Convert to numpy array for processing
-                        data = np.array(result_image)
-                        
-                        # Extract RGBA channels
-                        r, g, b, a = data[:,:,0], data[:,:,1], data[:,:,2], data[:,:,3]
-                        
-                        # Create masks for background removal
-                        # 1. White/very light pixels (R, G, B all > 240)
-                        white_mask = (r > 240) & (g > 240) & (b > 240)
-                        
-                        # 2. Light gray pixels (checkered pattern - RGB between 200-240)
-                        gray_mask = (r > 200) & (r < 240) & (g > 200) & (g < 240) & (b > 200) & (b < 240)
-                        
-                        # 3. Very light pixels (RGB > 235) - catch near-white
-                        near_white_mask = (r > 235) & (g > 235) & (b > 235)
-                        
-                        # Combine all background masks
-                        background_mask = white_mask | gray_mask | near_white_mask
-                        
-                        # Set background pixels to fully transparent
-                        data[background_mask, 3] = 0
-                        
-                        # Advanced: Remove pixels similar to detected background color
-                        if np.any(background_mask):
-                            bg_pixels = data[background_mask]
-                            if len(bg_pixels) > 100:  # Need sufficient samples
-                                # Calculate average background color
-                                avg_r = float(np.mean(bg_pixels[:,0]))
-                                avg_g = float(np.mean(bg_pixels[:,1]))
-                                avg_b = float(np.mean(bg_pixels[:,2]))
-                                
-                                print(f"[REMOVE-PERSON-BG][POST-PROCESS] Detected background color: RGB({avg_r:.0f}, {avg_g:.0f}, {avg_b:.0f})")
-                                
-                                # Find pixels within 40 units of background color (Euclidean distance)
-                                color_diff = np.sqrt(
-                                    (r.astype(float) - avg_r)**2 + 
-                                    (g.astype(float) - avg_g)**2 + 
-                                    (b.astype(float) - avg_b)**2
-                                )
-                                similar_bg_mask = color_diff < 40
-                                data[similar_bg_mask, 3] = 0
-                                
-                                # Soften edges: Make near-background pixels semi-transparent
-                                edge_mask = (color_diff >= 40) & (color_diff < 80)
-                                if np.any(edge_mask):
-                                    # Gradually fade alpha based on distance from background
-                                    alpha_fade = ((color_diff[edge_mask] - 40) / 40 * 255).astype(np.uint8)
-                                    data[edge_mask, 3] = np.minimum(data[edge_mask, 3], alpha_fade)
-                        
-                        # Count transparent pixels for verification
-                        transparent_count = np.sum(data[:,:,3] == 0)
-                        total_pixels = data.shape[0] * data.shape[1]
-                        transparency_percent = (transparent_count / total_pixels) * 100
-                        
-                        print(f"[REMOVE-PERSON-BG][POST-PROCESS] Transparency: {transparency_percent:.1f}% ({transparent_count}/{total_pixels} pixels)")
-                        
-                        # Convert back to PIL Image
-                        result_image = Image.fromarray(data, 'RGBA')
-                        
-                        # Save to bytes with PNG format (preserves transparency)
-                        output_buffer = BytesIO()
-                        result_image.save(output_buffer, format='PNG', optimize=True)
-                        output_buffer.seek(0)
-                        processed_image_data = output_buffer.read()
-                        
-                        print(f"[REMOVE-PERSON-BG][POST-PROCESS] ✅ Complete! Output size: {len(processed_image_data)} bytes")
-                        
-                        # Use processed image
-                        image_data = processed_image_data
-                        
+                        image_data = postprocess_transparency(image_data, "[REMOVE-PERSON-BG][POST-PROCESS]")
                     except Exception as post_error:
                         print(f"[REMOVE-PERSON-BG][POST-PROCESS] ⚠️ Warning: Post-processing failed: {post_error}")
                         print(f"[REMOVE-PERSON-BG][POST-PROCESS] Using original Gemini output without post-processing")
@@ -346,86 +282,7 @@ def remove_person_bg():
                             
                             # POST-PROCESS: Remove checkered/white background and create true transparency
                             try:
-                                print("[REMOVE-PERSON-BG][POST-PROCESS] Starting background removal...")
-                                
-                                # Load image from bytes
-                                result_image = Image.open(BytesIO(image_data))
-                                
-                                # Convert to RGBA if not already
-                                if result_image.mode != 'RGBA':
-                                    result_image = result_image.convert('RGBA')
-                                    print(f"[REMOVE-PERSON-BG][POST-PROCESS] Converted to RGBA mode")
-                                
-                                # Convert to numpy array for processing
-                                data = np.array(result_image)
-                                
-                                # Extract RGBA channels
-                                r, g, b, a = data[:,:,0], data[:,:,1], data[:,:,2], data[:,:,3]
-                                
-                                # Create masks for background removal
-                                # 1. White/very light pixels (R, G, B all > 240)
-                                white_mask = (r > 240) & (g > 240) & (b > 240)
-                                
-                                # 2. Light gray pixels (checkered pattern - RGB between 200-240)
-                                gray_mask = (r > 200) & (r < 240) & (g > 200) & (g < 240) & (b > 200) & (b < 240)
-                                
-                                # 3. Very light pixels (RGB > 235) - catch near-white
-                                near_white_mask = (r > 235) & (g > 235) & (b > 235)
-                                
-                                # Combine all background masks
-                                background_mask = white_mask | gray_mask | near_white_mask
-                                
-                                # Set background pixels to fully transparent
-                                data[background_mask, 3] = 0
-                                
-                                # Advanced: Remove pixels similar to detected background color
-                                if np.any(background_mask):
-                                    bg_pixels = data[background_mask]
-                                    if len(bg_pixels) > 100:  # Need sufficient samples
-                                        # Calculate average background color
-                                        avg_r = float(np.mean(bg_pixels[:,0]))
-                                        avg_g = float(np.mean(bg_pixels[:,1]))
-                                        avg_b = float(np.mean(bg_pixels[:,2]))
-                                        
-                                        print(f"[REMOVE-PERSON-BG][POST-PROCESS] Detected background color: RGB({avg_r:.0f}, {avg_g:.0f}, {avg_b:.0f})")
-                                        
-                                        # Find pixels within 40 units of background color (Euclidean distance)
-                                        color_diff = np.sqrt(
-                                            (r.astype(float) - avg_r)**2 + 
-                                            (g.astype(float) - avg_g)**2 + 
-                                            (b.astype(float) - avg_b)**2
-                                        )
-                                        similar_bg_mask = color_diff < 40
-                                        data[similar_bg_mask, 3] = 0
-                                        
-                                        # Soften edges: Make near-background pixels semi-transparent
-                                        edge_mask = (color_diff >= 40) & (color_diff < 80)
-                                        if np.any(edge_mask):
-                                            # Gradually fade alpha based on distance from background
-                                            alpha_fade = ((color_diff[edge_mask] - 40) / 40 * 255).astype(np.uint8)
-                                            data[edge_mask, 3] = np.minimum(data[edge_mask, 3], alpha_fade)
-                                
-                                # Count transparent pixels for verification
-                                transparent_count = np.sum(data[:,:,3] == 0)
-                                total_pixels = data.shape[0] * data.shape[1]
-                                transparency_percent = (transparent_count / total_pixels) * 100
-                                
-                                print(f"[REMOVE-PERSON-BG][POST-PROCESS] Transparency: {transparency_percent:.1f}% ({transparent_count}/{total_pixels} pixels)")
-                                
-                                # Convert back to PIL Image
-                                result_image = Image.fromarray(data, 'RGBA')
-                                
-                                # Save to bytes with PNG format (preserves transparency)
-                                output_buffer = BytesIO()
-                                result_image.save(output_buffer, format='PNG', optimize=True)
-                                output_buffer.seek(0)
-                                processed_image_data = output_buffer.read()
-                                
-                                print(f"[REMOVE-PERSON-BG][POST-PROCESS] ✅ Complete! Output size: {len(processed_image_data)} bytes")
-                                
-                                # Use processed image
-                                image_data = processed_image_data
-                                
+                                image_data = postprocess_transparency(image_data, "[REMOVE-PERSON-BG][POST-PROCESS]")
                             except Exception as post_error:
                                 print(f"[REMOVE-PERSON-BG][POST-PROCESS] ⚠️ Warning: Post-processing failed: {post_error}")
                                 print(f"[REMOVE-PERSON-BG][POST-PROCESS] Using original Gemini output without post-processing")
@@ -469,11 +326,35 @@ def remove_person_bg():
         }), 500
 
 
+REMBG_MAX_DIMENSION = 2048
+
+
+def normalize_rembg_input(image):
+    """Downscale to REMBG_MAX_DIMENSION and convert to RGB/RGBA (rembg works best with RGB)"""
+    if max(image.size) > REMBG_MAX_DIMENSION:
+        ratio = REMBG_MAX_DIMENSION / max(image.size)
+        image = image.resize(tuple(int(dim * ratio) for dim in image.size), Image.Resampling.LANCZOS)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGB')
+    return image
+
+
+def encode_rembg_output(output_image):
+    """PNG bytes of a rembg cutout, always RGBA"""
+    if output_image.mode != 'RGBA':
+        output_image = output_image.convert('RGBA')
+    output_buffer = BytesIO()
+    # compress_level 6 is a good size/CPU balance; optimize=False saves CPU
+    output_image.save(output_buffer, format='PNG', compress_level=6, optimize=False)
+    return output_buffer.getvalue()
+
+
 @app.route('/api/remove-bg-rembg', methods=['POST'])
 def remove_bg_rembg():
     """
     Remove background from image using rembg library
-    Input: Image file (PNG, JPG, JPEG, WEBP)
+    Input: Image file (PNG, JPG, JPEG, WEBP), optional form field `model`
+           (one of the preloaded REMBG_MODELS, e.g. u2net, u2netp, isnet-general-use, u2net_human_seg)
     Output: PNG image with transparent background
     """
     print("[REMOVE-BG-REMBG][START] API call initiated")
@@ -511,6 +392,17 @@ def remove_bg_rembg():
 
         print(f"[REMOVE-BG-REMBG][FILE] Received file: {image_file.filename}, type: {file_ext}")
 
+        # Pick the preloaded session for the requested model
+        model_name = request.form.get('model') or rembg_sessions.default_model
+        try:
+            session = rembg_sessions.get(model_name)
+        except UnknownRembgModel as model_err:
+            return jsonify({
+                "message": str(model_err),
+                "code": "INVALID_MODEL",
+                "statusCode": 400
+            }), 400
+
         # Load image using PIL - preserve maximum quality
         try:
             image_file.seek(0)
@@ -520,18 +412,9 @@ def remove_bg_rembg():
             print(f"[REMOVE-BG-REMBG][IMAGE] Loaded size={original_size}, mode={original_mode}")
             
             # Resize if image is too large (to prevent memory issues)
-            MAX_DIMENSION = 2048
-            if max(original_size) > MAX_DIMENSION:
-                print(f"[REMOVE-BG-REMBG][IMAGE] Image too large, resizing from {original_size}")
-                ratio = MAX_DIMENSION / max(original_size)
-                new_size = tuple(int(dim * ratio) for dim in original_size)
-                input_image = input_image.resize(new_size, Image.Resampling.LANCZOS)
-                print(f"[REMOVE-BG-REMBG][IMAGE] Resized to {input_image.size}")
-            
-            # Convert to RGB if needed (rembg works best with RGB)
-            if input_image.mode not in ('RGB', 'RGBA'):
-                input_image = input_image.convert('RGB')
-                print(f"[REMOVE-BG-REMBG][IMAGE] Converted {original_mode} to RGB for processing")
+            input_image = normalize_rembg_input(input_image)
+            if input_image.size != original_size or input_image.mode != original_mode:
+                print(f"[REMOVE-BG-REMBG][IMAGE] Normalized to size={input_image.size}, mode={input_image.mode}")
                 
         except Exception as img_err:
             print(f"[REMOVE-BG-REMBG][ERROR] Image loading failed: {img_err}")
@@ -549,7 +432,7 @@ def remove_bg_rembg():
             
             # Use simplified rembg call to prevent crashes
             # Removed alpha_matting parameters that can cause memory issues
-            output_image = remove(input_image)
+            output_image = remove(input_image, session=session)
             
             print(f"[REMOVE-BG-REMBG][PROCESSING] Background removed, output size={output_image.size}, mode={output_image.mode}")
             
@@ -590,31 +473,9 @@ def remove_bg_rembg():
                 "statusCode": 500
             }), 500
 
-        # POST-PROCESSING: Simple cleanup (avoid memory-intensive operations)
+        # Convert to RGBA PNG bytes for the response
         try:
-            print("[REMOVE-BG-REMBG][POST-PROCESS] Preparing output...")
-            
-            # Ensure output is RGBA
-            if output_image.mode != 'RGBA':
-                output_image = output_image.convert('RGBA')
-            
-            print(f"[REMOVE-BG-REMBG][POST-PROCESS] Output ready in RGBA mode")
-            
-        except Exception as post_err:
-            print(f"[REMOVE-BG-REMBG][POST-PROCESS] Warning: Post-processing failed: {post_err}")
-            # Continue with whatever we have
-
-        # Convert to bytes for response with optimized settings
-        output_buffer = BytesIO()
-        try:
-            output_image.save(
-                output_buffer, 
-                format='PNG',
-                compress_level=6,  # PNG compression (0-9, 6 is good balance)
-                optimize=False     # Disable optimize to save CPU
-            )
-            output_buffer.seek(0)
-            image_data = output_buffer.read()
+            image_data = encode_rembg_output(output_image)
             
             print(f"[REMOVE-BG-REMBG][SUCCESS] Returning image, size={len(image_data)} bytes")
             
@@ -642,6 +503,7 @@ def remove_bg_rembg():
             download_name='no_bg.png'
         ))
         resp.headers['X-Processing-Method'] = 'rembg'
+        resp.headers['X-Rembg-Model'] = model_name
         resp.headers['X-Output-Format'] = 'PNG'
         resp.status_code = 200
         return resp
@@ -680,9 +542,259 @@ def remove_bg_rembg():
         }), 500
 
 
+REMBG_BATCH_MAX_IMAGES = int(os.getenv('REMBG_BATCH_MAX_IMAGES', '20'))
+REMBG_BATCH_WORKERS = int(os.getenv('REMBG_BATCH_WORKERS', '2'))
+REMBG_ALLOWED_EXTENSIONS = ('png', 'jpg', 'jpeg', 'webp')
+
+# Shared across batch requests so total rembg parallelism stays bounded per worker
+rembg_batch_executor = ThreadPoolExecutor(max_workers=max(1, REMBG_BATCH_WORKERS),
+                                          thread_name_prefix='rembg-batch')
+
+
+def rembg_cutout_png(image_bytes, session):
+    """Run one image through rembg with the same normalization as /api/remove-bg-rembg"""
+    with Image.open(BytesIO(image_bytes)) as input_image:
+        output_image = remove(normalize_rembg_input(input_image), session=session)
+    try:
+        return encode_rembg_output(output_image)
+    finally:
+        output_image.close()
+
+
+@app.route('/api/remove-bg-rembg/batch', methods=['POST'])
+def remove_bg_rembg_batch():
+    """
+    Remove backgrounds from several images in one request
+    Input: multipart with one or more `images` files, optional `model`,
+           optional `format` = "multipart" (default, streamed as each finishes) or "zip"
+    Output: multipart/mixed (one PNG or JSON error part per image) or a zip
+            with the PNGs plus manifest.json. A failed image never fails the batch.
+    """
+    image_files = request.files.getlist('images')
+    if not image_files:
+        return jsonify({
+            "message": "No images provided (use the 'images' field)",
+            "code": "INVALID_INPUT",
+            "statusCode": 400
+        }), 400
+
+    if len(image_files) > REMBG_BATCH_MAX_IMAGES:
+        return jsonify({
+            "message": f"Too many images. Maximum is {REMBG_BATCH_MAX_IMAGES} per batch",
+            "code": "TOO_MANY_IMAGES",
+            "statusCode": 400
+        }), 400
+
+    output_format = request.form.get('format', 'multipart').lower()
+    if output_format not in ('multipart', 'zip'):
+        return jsonify({
+            "message": "Invalid format. Use 'multipart' or 'zip'",
+            "code": "INVALID_INPUT",
+            "statusCode": 400
+        }), 400
+
+    model_name = request.form.get('model') or rembg_sessions.default_model
+    try:
+        session = rembg_sessions.get(model_name)
+    except UnknownRembgModel as model_err:
+        return jsonify({
+            "message": str(model_err),
+            "code": "INVALID_MODEL",
+            "statusCode": 400
+        }), 400
+
+    print(f"[REMOVE-BG-REMBG-BATCH][START] {len(image_files)} image(s), model={model_name}, format={output_format}")
+
+    # Read uploads now - the request stream is gone once a streamed response starts
+    items = []
+    for index, image_file in enumerate(image_files):
+        filename = image_file.filename or f"image_{index + 1}"
+        file_ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+        items.append((index, filename, file_ext, image_file.read()))
+
+    def process(item):
+        index, filename, file_ext, image_bytes = item
+        result = {'index': index, 'filename': filename}
+        if file_ext not in REMBG_ALLOWED_EXTENSIONS:
+            result.update(success=False, code='INVALID_FILE_TYPE',
+                          error='Invalid file type. Only PNG, JPG, JPEG, and WEBP are accepted')
+            return result, None
+        try:
+            started = time.time()
+            png_data = rembg_cutout_png(image_bytes, session)
+            result.update(success=True, size=len(png_data), seconds=round(time.time() - started, 2))
+            return result, png_data
+        except UnidentifiedImageError as e:
+            result.update(success=False, code='IMAGE_ERROR', error=f"Image processing failed: {e}")
+        except MemoryError:
+            result.update(success=False, code='OUT_OF_MEMORY', error='Image too large to process')
+        except Exception as e:
+            print(f"[REMOVE-BG-REMBG-BATCH][ERROR] Item {index} ({filename}) failed: {e}")
+            result.update(success=False, code='PROCESSING_ERROR', error=str(e))
+        return result, None
+
+    futures = [rembg_batch_executor.submit(process, item) for item in items]
+
+    def output_name(result):
+        stem = secure_filename(result['filename'].rsplit('.', 1)[0]) or 'image'
+        return f"{result['index'] + 1:03d}_{stem}.png"
+
+    if output_format == 'zip':
+        manifest = []
+        zip_buffer = BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for future in futures:
+                result, png_data = future.result()
+                if png_data is not None:
+                    result['output'] = output_name(result)
+                    archive.writestr(result['output'], png_data)
+                manifest.append(result)
+            archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+        succeeded = sum(1 for result in manifest if result['success'])
+        print(f"[REMOVE-BG-REMBG-BATCH][SUCCESS] {succeeded}/{len(manifest)} image(s) processed")
+        zip_buffer.seek(0)
+        resp = make_response(send_file(zip_buffer, mimetype='application/zip',
+                                       as_attachment=True, download_name='no_bg_batch.zip'))
+        resp.headers['X-Processing-Method'] = 'rembg'
+        resp.headers['X-Rembg-Model'] = model_name
+        resp.headers['X-Batch-Succeeded'] = str(succeeded)
+        resp.headers['X-Batch-Failed'] = str(len(manifest) - succeeded)
+        return resp
+
+    boundary = uuid.uuid4().hex
+
+    def stream_parts():
+        succeeded = 0
+        # Emit each cut-out as soon as it is ready; X-Item-Index gives its input position
+        for future in as_completed(futures):
+            result, png_data = future.result()
+            if png_data is not None:
+                succeeded += 1
+                headers = (
+                    f"Content-Type: image/png\r\n"
+                    f"Content-Disposition: attachment; filename=\"{output_name(result)}\"\r\n"
+                )
+                body = png_data
+            else:
+                headers = "Content-Type: application/json\r\n"
+                body = json.dumps(result).encode('utf-8')
+            headers += f"X-Item-Index: {result['index']}\r\nContent-Length: {len(body)}\r\n"
+            yield f"--{boundary}\r\n{headers}\r\n".encode('utf-8')
+            yield body
+            yield b"\r\n"
+        yield f"--{boundary}--\r\n".encode('utf-8')
+        print(f"[REMOVE-BG-REMBG-BATCH][SUCCESS] {succeeded}/{len(futures)} image(s) processed")
+
+    return Response(stream_parts(), mimetype=f'multipart/mixed; boundary={boundary}', headers={
+        'X-Processing-Method': 'rembg',
+        'X-Rembg-Model': model_name,
+        'X-Batch-Count': str(len(futures))
+    })
+
+
+PROXY_IMAGE_MAX_BYTES = int(os.getenv('PROXY_IMAGE_MAX_BYTES', str(15 * 1024 * 1024)))
+PROXY_IMAGE_CHUNK_SIZE = 64 * 1024
+# Some CDNs label images as generic binaries; those are sniffed before forwarding
+PROXY_IMAGE_GENERIC_TYPES = ('application/octet-stream', 'binary/octet-stream')
+
+
+# Sent upstream to mimic a browser request (also used by search image probes)
+PROXY_IMAGE_REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+PROXY_IMAGE_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type',
+    'Cache-Control': 'public, max-age=3600'  # Cache for 1 hour
+}
+
+
+class ProxyImageTooLarge(Exception):
+    pass
+
+
+def warm_proxy_cache(image_url):
+    """
+    Download ``image_url`` into the proxy cache ahead of the extension's request.
+
+    Skipped when the URL is already cached (stale entries are revalidated by
+    /api/proxy-image itself). Applies the same content-type and size checks as
+    the proxy. Returns True when an entry was stored.
+    """
+    if not proxy_cache or proxy_cache.lookup(image_url):
+        return False
+    response = http_sessions.get('image-origin').get(image_url, headers=PROXY_IMAGE_REQUEST_HEADERS, stream=True)
+    try:
+        if response.status_code != 200:
+            return False
+        content_type = response.headers.get('content-type', 'image/jpeg')
+        media_type = content_type.split(';')[0].strip().lower()
+        if not media_type.startswith('image/') and media_type not in PROXY_IMAGE_GENERIC_TYPES:
+            return False
+        declared_length = response.headers.get('content-length')
+        if declared_length and declared_length.isdigit() and int(declared_length) > PROXY_IMAGE_MAX_BYTES:
+            return False
+
+        chunks = response.iter_content(chunk_size=PROXY_IMAGE_CHUNK_SIZE)
+        first_chunk = next(chunks, b'')
+        if media_type in PROXY_IMAGE_GENERIC_TYPES:
+            content_type = sniff_image_mime(first_chunk, default=None)
+            if not content_type:
+                return False
+
+        cache_writer = proxy_cache.writer(image_url, content_type, response.headers)
+        if not cache_writer:
+            return False
+        try:
+            size = 0
+            for chunk in itertools.chain((first_chunk,), chunks):
+                size += len(chunk)
+                if size > PROXY_IMAGE_MAX_BYTES:
+                    return False
+                cache_writer.write(chunk)
+            cache_writer.commit()
+        finally:
+            cache_writer.close()
+        print(f"🗄️ Warmed proxy cache with {size} bytes: {image_url}")
+        return True
+    finally:
+        response.close()
+
+
+def serve_cached_proxy_image(entry, cache_status):
+    """Send a proxy-cache entry from disk; None if it was evicted meanwhile"""
+    try:
+        resp = send_file(entry.body_path, mimetype=entry.content_type, conditional=False, etag=False)
+    except OSError:
+        return None
+    resp.headers.update(PROXY_IMAGE_HEADERS)
+    resp.headers['X-Cache'] = cache_status
+    proxy_cache.record_hit(entry, revalidated=cache_status == 'REVALIDATED')
+    print(f"✅ Served proxied image from cache ({cache_status}), size: {entry.size} bytes")
+    return resp
+
+
 @app.route('/api/proxy-image', methods=['GET'])
 def proxy_image():
-    """Proxy endpoint to fetch external images and avoid CORS issues"""
+    """
+    Proxy endpoint to fetch external images and avoid CORS issues.
+
+    The remote body is forwarded chunk by chunk as it arrives, so large
+    product photos start flowing immediately and are never held in memory.
+    Non-image responses and images over PROXY_IMAGE_MAX_BYTES are rejected.
+
+    Responses are kept in the disk proxy cache; stale entries are
+    revalidated upstream with If-None-Match / If-Modified-Since.
+    """
+    response = None
     try:
         image_url = request.args.get('url')
         
@@ -692,36 +804,99 @@ def proxy_image():
         print(f"🌐 Proxying image request for: {image_url}")
         
         # Add headers to mimic a browser request
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        }
-        
-        # Fetch the external image
-        response = requests.get(image_url, headers=headers, timeout=30)
+        headers = dict(PROXY_IMAGE_REQUEST_HEADERS)
+        
+        cached_entry = proxy_cache.lookup(image_url) if proxy_cache else None
+        if cached_entry:
+            if cached_entry.is_fresh():
+                cached = serve_cached_proxy_image(cached_entry, 'HIT')
+                if cached:
+                    return cached
+                cached_entry = None
+            else:
+                headers.update(cached_entry.validators())
+        
+        # Fetch the external image (headers only; the body is streamed below)
+        response = http_sessions.get('image-origin').get(image_url, headers=headers, stream=True)
+        if cached_entry and response.status_code == 304:
+            proxy_cache.refresh(cached_entry, response.headers)
+            cached = serve_cached_proxy_image(cached_entry, 'REVALIDATED')
+            if cached:
+                return cached
+            # Evicted while revalidating; fetch it again unconditionally
+            response.close()
+            for validator in cached_entry.validators():
+                headers.pop(validator, None)
+            response = http_sessions.get('image-origin').get(image_url, headers=headers, stream=True)
         response.raise_for_status()
+        if proxy_cache:
+            proxy_cache.record_miss()
         
         # Get the content type from the response
         content_type = response.headers.get('content-type', 'image/jpeg')
-        
-        print(f"✅ Successfully proxied image, content-type: {content_type}, size: {len(response.content)} bytes")
+        media_type = content_type.split(';')[0].strip().lower()
+        if not media_type.startswith('image/') and media_type not in PROXY_IMAGE_GENERIC_TYPES:
+            print(f"❌ Refusing to proxy non-image content-type: {content_type}")
+            return {'error': f'URL did not return an image (content-type: {content_type})'}, 415
+        
+        declared_length = response.headers.get('content-length')
+        if declared_length and declared_length.isdigit() and int(declared_length) > PROXY_IMAGE_MAX_BYTES:
+            print(f"❌ Refusing to proxy image of {declared_length} bytes (limit {PROXY_IMAGE_MAX_BYTES})")
+            return {'error': f'Image too large ({declared_length} bytes, limit {PROXY_IMAGE_MAX_BYTES})'}, 413
+        
+        # Pull the first chunk now so connection errors and non-image bodies
+        # still produce a proper error response
+        chunks = response.iter_content(chunk_size=PROXY_IMAGE_CHUNK_SIZE)
+        first_chunk = next(chunks, b'')
+        if media_type in PROXY_IMAGE_GENERIC_TYPES:
+            content_type = sniff_image_mime(first_chunk, default=None)
+            if not content_type:
+                print(f"❌ Refusing to proxy {media_type} body that is not a recognised image")
+                return {'error': 'URL did not return an image'}, 415
+        
+        upstream = response
+        # Tee the body into the proxy cache while it streams to the client
+        cache_writer = proxy_cache.writer(image_url, content_type, response.headers) if proxy_cache else None
+        
+        def stream_body():
+            sent = 0
+            try:
+                for chunk in itertools.chain((first_chunk,), chunks):
+                    sent += len(chunk)
+                    if sent > PROXY_IMAGE_MAX_BYTES:
+                        # Abort mid-stream so the client sees a failed transfer, not a truncated image
+                        raise ProxyImageTooLarge(f"image exceeded {PROXY_IMAGE_MAX_BYTES} bytes")
+                    if cache_writer:
+                        cache_writer.write(chunk)
+                    yield chunk
+                if cache_writer:
+                    cache_writer.commit()
+                print(f"✅ Successfully proxied image, content-type: {content_type}, size: {sent} bytes")
+            except Exception as e:
+                print(f"❌ Proxy stream aborted after {sent} bytes: {e}")
+                raise
+            finally:
+                # Incomplete bodies (errors, client disconnects) are never cached
+                if cache_writer:
+                    cache_writer.close()
+                upstream.close()
+        
+        response_headers = dict(PROXY_IMAGE_HEADERS)
+        response_headers['X-Cache'] = 'MISS'
+        # requests transparently decodes gzip/deflate, so the upstream length
+        # only matches what we forward when the body was not content-encoded
+        if declared_length and not response.headers.get('content-encoding'):
+            response_headers['Content-Length'] = declared_length
+        
+        response = None  # Ownership passes to the streaming generator
         
         # Return the image with proper CORS headers
-        return Response(
-            response.content,
-            mimetype=content_type,
-            headers={
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Cache-Control': 'public, max-age=3600'  # Cache for 1 hour
-            }
-        )
+        proxied = Response(stream_body(), mimetype=content_type, headers=response_headers)
+        # Also release the upstream connection if the client goes away before the first chunk
+        proxied.call_on_close(upstream.close)
+        if cache_writer:
+            proxied.call_on_close(cache_writer.close)
+        return proxied
         
     except requests.exceptions.RequestException as e:
         print(f"❌ Failed to fetch image: {str(e)}")
@@ -729,6 +904,17 @@ def proxy_image():
     except Exception as e:
         print(f"❌ Proxy error: {str(e)}")
         return {'error': f'Proxy error: {str(e)}'}, 500
+    finally:
+        if response is not None:
+            response.close()
+
+
+@app.route('/api/proxy-image/cache-stats', methods=['GET'])
+def proxy_image_cache_stats():
+    """Hit/miss/bytes-saved counters of this worker's proxy image cache"""
+    if not proxy_cache:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **proxy_cache.stats()})
 
 
 # Proxy endpoint for remove.bg (temporarily disabled due to cv2 issues)
@@ -800,7 +986,7 @@ def tryon():
         api_url = 'https://api.becausefuture.tech/mixer-service/tryon'
         headers = {"Accept":"image/png"}
         
-        resp = requests.post(api_url, files=files, auth=(api_username, api_password), data=data, headers=headers, timeout=120)
+        resp = http_sessions.get('mixer-service').post(api_url, files=files, auth=(api_username, api_password), data=data, headers=headers)
 
         if resp.status_code == 200 and resp.headers.get('Content-Type', '').startswith('image/'):
             return send_file(BytesIO(resp.content), mimetype=resp.headers['Content-Type'])
@@ -830,384 +1016,275 @@ def tryon_gemini():
     
     The API automatically detects whether you're trying on 1 or multiple garments and adjusts the prompt accordingly.
     """
-    print("[TRYON-GEMINI][START] Unified try-on API call initiated")
+    print(f"[TRYON-GEMINI][REQUEST] Content-Type: {request.content_type}")
     try:
-        print(f"[TRYON-GEMINI][REQUEST] Content-Type: {request.content_type}")
-        print(f"[TRYON-GEMINI][REQUEST] Files: {list(request.files.keys())}")
-        print(f"[TRYON-GEMINI][REQUEST] Form data: {dict(request.form)}")
+        tryon_input = read_tryon_upload(request.files, request.form)
+    except TryonInputError as e:
+        return jsonify({"message": str(e), "code": "INVALID_INPUT", "statusCode": 400}), 400
+    return tryon_result_response(run_tryon(**tryon_input))
 
-        if not GEMINI_API_KEY:
-            print("[TRYON-GEMINI][ERROR] Gemini API key not configured")
-            return jsonify({
-                "message": "Gemini API key not configured",
-                "code": "MISSING_API_KEY",
-                "statusCode": 500
-            }), 500
 
-        print(f"[TRYON-GEMINI][CONFIG] Gemini API key configured: {GEMINI_API_KEY[:10]}...")
+TRYON_PREPROCESS_WORKERS = int(os.getenv('TRYON_PREPROCESS_WORKERS', str(min(4, os.cpu_count() or 1))))
 
-        avatar_file = request.files.get('avatar_image')
-        if not avatar_file:
-            print("[TRYON-GEMINI][ERROR] Missing avatar_image")
-            return jsonify({
-                "message": "Missing required file: avatar_image",
-                "code": "INVALID_INPUT",
-                "statusCode": 400
-            }), 400
+# Shared across try-on requests so image preprocessing parallelism stays bounded per worker
+tryon_preprocess_executor = ThreadPoolExecutor(max_workers=max(1, TRYON_PREPROCESS_WORKERS),
+                                               thread_name_prefix='tryon-preprocess')
 
-        # 🎯 UNIFIED GARMENT DETECTION: Support both single and multiple garments
-        garment_files_by_garment = []  # List of lists - each inner list = one garment's images
-        garment_types = []  # List of garment types (one per garment)
-        
-        # Strategy 1: Try multi-garment format (garment_1_image_1, garment_1_image_2, garment_2_image_1, ...)
-        garment_idx = 1
+
+def prepare_model_input(image_bytes, mode):
+    """Decode one uploaded image, convert it to ``mode`` and encode it for the model"""
+    with model_input_encoder.open(BytesIO(image_bytes)) as img:
+        return model_input_encoder.encode(img.convert(mode))
+
+
+class TryonInputError(ValueError):
+    """Raised when an upload is missing the avatar or every garment image"""
+
+
+def read_tryon_upload(files, form):
+    """
+    Read a multipart try-on upload into plain arguments for run_tryon().
+
+    ``files`` and ``form`` are request.files / request.form. Every image is
+    read into memory here, so the result stays usable after the request ends.
+    """
+    print(f"[TRYON-GEMINI][REQUEST] Files: {list(files.keys())}")
+    print(f"[TRYON-GEMINI][REQUEST] Form data: {dict(form)}")
+
+    avatar_file = files.get('avatar_image')
+    if not avatar_file:
+        print("[TRYON-GEMINI][ERROR] Missing avatar_image")
+        raise TryonInputError("Missing required file: avatar_image")
+
+    # 🎯 UNIFIED GARMENT DETECTION: Support both single and multiple garments
+    garment_files_by_garment = []  # List of lists - each inner list = one garment's images
+    garment_types = []  # List of garment types (one per garment)
+
+    # Strategy 1: Try multi-garment format (garment_1_image_1, garment_1_image_2, garment_2_image_1, ...)
+    garment_idx = 1
+    while True:
+        garment_images = []
+        image_idx = 1
         while True:
-            garment_images = []
-            image_idx = 1
-            while True:
-                garment_file = request.files.get(f'garment_{garment_idx}_image_{image_idx}')
-                if garment_file:
-                    garment_images.append(garment_file)
-                    print(f"[TRYON-GEMINI][FILES] Found garment_{garment_idx}_image_{image_idx}: {garment_file.filename}")
-                    image_idx += 1
-                else:
-                    break
-            
-            if garment_images:
-                garment_files_by_garment.append(garment_images)
-                garment_type = request.form.get(f'garment_{garment_idx}_type', f'garment_{garment_idx}')
-                garment_types.append(garment_type)
-                print(f"[TRYON-GEMINI][FILES] Garment {garment_idx}: {len(garment_images)} image(s), type: {garment_type}")
-                garment_idx += 1
+            garment_file = files.get(f'garment_{garment_idx}_image_{image_idx}')
+            if garment_file:
+                garment_images.append(garment_file)
+                print(f"[TRYON-GEMINI][FILES] Found garment_{garment_idx}_image_{image_idx}: {garment_file.filename}")
+                image_idx += 1
             else:
                 break
-        
-        # Strategy 2: Try legacy single-garment multi-view format (garment_image_1, garment_image_2, ...)
-        if not garment_files_by_garment:
-            print("[TRYON-GEMINI][LEGACY] Trying single-garment multi-view format")
-            garment_images = []
-            idx = 1
-            while True:
-                garment_file = request.files.get(f'garment_image_{idx}')
-                if garment_file:
-                    garment_images.append(garment_file)
-                    print(f"[TRYON-GEMINI][FILES] Found garment_image_{idx}: {garment_file.filename}")
-                    idx += 1
-                else:
-                    break
-            
-            if garment_images:
-                garment_files_by_garment.append(garment_images)
-                garment_type = request.form.get('garment_type', 'top')
-                garment_types.append(garment_type)
-        
-        # Strategy 3: Try simple single image format (garment_image)
-        if not garment_files_by_garment:
-            print("[TRYON-GEMINI][LEGACY] Trying simple single image format")
-            garment_file = request.files.get('garment_image')
+
+        if garment_images:
+            garment_files_by_garment.append(garment_images)
+            garment_type = form.get(f'garment_{garment_idx}_type', f'garment_{garment_idx}')
+            garment_types.append(garment_type)
+            print(f"[TRYON-GEMINI][FILES] Garment {garment_idx}: {len(garment_images)} image(s), type: {garment_type}")
+            garment_idx += 1
+        else:
+            break
+
+    # Strategy 2: Try legacy single-garment multi-view format (garment_image_1, garment_image_2, ...)
+    if not garment_files_by_garment:
+        print("[TRYON-GEMINI][LEGACY] Trying single-garment multi-view format")
+        garment_images = []
+        idx = 1
+        while True:
+            garment_file = files.get(f'garment_image_{idx}')
             if garment_file:
-                garment_files_by_garment.append([garment_file])
-                garment_type = request.form.get('garment_type', 'top')
-                garment_types.append(garment_type)
-                print(f"[TRYON-GEMINI][FILES] Found single garment_image: {garment_file.filename}")
-        
-        # Strategy 4: Try array format from multi-garment calls
-        if not garment_files_by_garment:
-            garment_files_list = request.files.getlist('garment_images')
-            if garment_files_list:
-                print(f"[TRYON-GEMINI][LEGACY] Found {len(garment_files_list)} garments in array format")
-                garment_files_by_garment = [[f] for f in garment_files_list]
-                
-                garment_types_str = request.form.get('garment_types', '')
-                if garment_types_str:
-                    garment_types = [t.strip() for t in garment_types_str.split(',')]
-                else:
-                    garment_types = [f'garment_{i+1}' for i in range(len(garment_files_list))]
-        
-        if not garment_files_by_garment:
-            print("[TRYON-GEMINI][ERROR] No garment images provided")
-            return jsonify({
-                "message": "At least one garment image is required",
-                "code": "INVALID_INPUT",
-                "statusCode": 400
-            }), 400
+                garment_images.append(garment_file)
+                print(f"[TRYON-GEMINI][FILES] Found garment_image_{idx}: {garment_file.filename}")
+                idx += 1
+            else:
+                break
+
+        if garment_images:
+            garment_files_by_garment.append(garment_images)
+            garment_types.append(form.get('garment_type', 'top'))
+
+    # Strategy 3: Try simple single image format (garment_image)
+    if not garment_files_by_garment:
+        print("[TRYON-GEMINI][LEGACY] Trying simple single image format")
+        garment_file = files.get('garment_image')
+        if garment_file:
+            garment_files_by_garment.append([garment_file])
+            garment_types.append(form.get('garment_type', 'top'))
+            print(f"[TRYON-GEMINI][FILES] Found single garment_image: {garment_file.filename}")
+
+    # Strategy 4: Try array format from multi-garment calls
+    if not garment_files_by_garment:
+        garment_files_list = files.getlist('garment_images')
+        if garment_files_list:
+            print(f"[TRYON-GEMINI][LEGACY] Found {len(garment_files_list)} garments in array format")
+            garment_files_by_garment = [[f] for f in garment_files_list]
+
+            garment_types_str = form.get('garment_types', '')
+            garment_types = [t.strip() for t in garment_types_str.split(',')] if garment_types_str else []
+            # One type per image: pad a short list with the default names, ignore extras
+            garment_types = garment_types[:len(garment_files_list)] + [
+                f'garment_{i+1}' for i in range(len(garment_types), len(garment_files_list))
+            ]
+
+    if not garment_files_by_garment:
+        print("[TRYON-GEMINI][ERROR] No garment images provided")
+        raise TryonInputError("At least one garment image is required")
+
+    print(f"[TRYON-GEMINI][FILES] Avatar: {avatar_file.filename}")
+    avatar_file.seek(0)
+    garments = []
+    for garment_type, garment_files in zip(garment_types, garment_files_by_garment):
+        images = []
+        for garment_file in garment_files:
+            garment_file.seek(0)
+            images.append(garment_file.read())
+        garments.append((garment_type, images))
+    return {
+        'avatar_image': avatar_file.read(),
+        'garments': garments,
+        'ai_model': form.get('ai_model', 'gemini'),
+    }
+
+
+def _tryon_error(message, code, status_code, details=None):
+    payload = {"message": message, "code": code, "statusCode": status_code}
+    if details is not None:
+        payload["details"] = details
+    return TryonResult(status_code, 'application/json', json.dumps(payload).encode('utf-8'), {})
+
+
+def tryon_result_response(result):
+    """Flask response for a TryonResult"""
+    return Response(result.body, status=result.status_code, mimetype=result.mimetype, headers=result.headers)
+
+
+def run_tryon(avatar_image, garments, ai_model='gemini'):
+    """
+    Run a virtual try-on and return a TryonResult (the image, or a JSON error).
+
+    ``avatar_image`` is the avatar's encoded bytes and ``garments`` a list of
+    (garment_type, [image bytes, ...]) with one or more views per garment.
+    Needs no request or app context, so the synchronous /api/tryon-gemini
+    endpoint and the background try-on jobs both call it directly.
+    """
+    print("[TRYON-GEMINI][START] Unified try-on API call initiated")
+    try:
+        if not GEMINI_API_KEY:
+            print("[TRYON-GEMINI][ERROR] Gemini API key not configured")
+            return _tryon_error("Gemini API key not configured", "MISSING_API_KEY", 500)
+
+        print(f"[TRYON-GEMINI][CONFIG] Gemini API key configured: {GEMINI_API_KEY[:10]}...")
+
+        garment_types = [garment_type for garment_type, _ in garments]
+        total_garment_count = len(garments)
+        total_image_count = sum(len(images) for _, images in garments)
 
-        total_garment_count = len(garment_files_by_garment)
-        total_image_count = sum(len(images) for images in garment_files_by_garment)
-        
-        print(f"[TRYON-GEMINI][FILES] Avatar: {avatar_file.filename}")
         print(f"[TRYON-GEMINI][FILES] Processing {total_garment_count} garment(s) with {total_image_count} total image(s)")
         print(f"[TRYON-GEMINI][MODE] {'MULTI-GARMENT' if total_garment_count > 1 else 'SINGLE-GARMENT'} try-on")
 
+        # Decode, normalize and encode every image on the shared preprocessing
+        # pool; Pillow releases the GIL for most of this work
+        preprocess_started = time.perf_counter()
+        avatar_future = tryon_preprocess_executor.submit(prepare_model_input, avatar_image, "RGB")
+        garment_futures_by_garment = [
+            [tryon_preprocess_executor.submit(prepare_model_input, image, "RGBA") for image in images]
+            for _, images in garments
+        ]
+
         # Load and normalize avatar image
         try:
-            avatar_file.seek(0)
-            avatar_pil = Image.open(avatar_file).convert("RGB")
-            print(f"[TRYON-GEMINI][IMAGES] Avatar loaded size={avatar_pil.size}, mode={avatar_pil.mode}")
+            avatar_input = avatar_future.result()
+            avatar_bytes = avatar_input.data
+            print(f"[TRYON-GEMINI][IMAGES] Avatar -> {avatar_input.mime_type} {avatar_input.size} {len(avatar_bytes)} bytes")
         except Exception as img_err:
             print(f"[TRYON-GEMINI][ERROR] Avatar image processing failed: {img_err}")
-            return jsonify({
-                "message": f"Failed to process avatar image: {str(img_err)}",
-                "code": "IMAGE_PROCESSING_ERROR",
-                "statusCode": 400
-            }), 400
+            return _tryon_error(f"Failed to process avatar image: {str(img_err)}", "IMAGE_PROCESSING_ERROR", 400)
 
         # Load and normalize garment images (now supporting multiple garments with multiple images each)
-        garment_pils_by_garment = []  # List of lists - each inner list contains PIL images of same garment
-        
+        garment_inputs_by_garment = []  # List of lists - each inner list holds the encoded images of one garment
+        garment_bytes_by_garment = []
+
         try:
-            for garment_idx, garment_files in enumerate(garment_files_by_garment):
-                garment_pils = []
-                for img_idx, garment_file in enumerate(garment_files):
-                    garment_file.seek(0)
-                    garment_pil = Image.open(garment_file).convert("RGBA")
-                    garment_pils.append(garment_pil)
-                    print(f"[TRYON-GEMINI][IMAGES] Garment {garment_idx+1}, Image {img_idx+1} loaded size={garment_pil.size}, mode={garment_pil.mode}")
-                
-                garment_pils_by_garment.append(garment_pils)
+            for garment_idx, garment_futures in enumerate(garment_futures_by_garment):
+                garment_inputs = []
+                for img_idx, garment_future in enumerate(garment_futures):
+                    garment_input = garment_future.result()
+                    garment_inputs.append(garment_input)
+                    print(f"[TRYON-GEMINI][IMAGES] Garment {garment_idx+1}, Image {img_idx+1} -> {garment_input.mime_type} {garment_input.size} {len(garment_input.data)} bytes")
+
+                garment_inputs_by_garment.append(garment_inputs)
+                garment_bytes_by_garment.append([garment_input.data for garment_input in garment_inputs])
         except Exception as img_err:
             print(f"[TRYON-GEMINI][ERROR] Garment image processing failed: {img_err}")
-            return jsonify({
-                "message": f"Failed to process garment image: {str(img_err)}",
-                "code": "IMAGE_PROCESSING_ERROR",
-                "statusCode": 400
-            }), 400
+            return _tryon_error(f"Failed to process garment image: {str(img_err)}", "IMAGE_PROCESSING_ERROR", 400)
 
-        # Convert PIL images to bytes in memory (PNG recommended to preserve alpha)
-        def pil_to_bytes(img: Image.Image, fmt="PNG"):
-            buf = BytesIO()
-            img.save(buf, format=fmt)
-            buf.seek(0)
-            return buf.read()
+        preprocess_ms = (time.perf_counter() - preprocess_started) * 1000
+        print(f"[TRYON-GEMINI][TIMING] Preprocessed {total_image_count + 1} image(s) in {preprocess_ms:.0f}ms")
 
-        avatar_bytes = pil_to_bytes(avatar_pil, fmt="PNG")
-        avatar_b64 = base64.b64encode(avatar_bytes).decode('utf-8')
-        
-        # Convert all garment images to base64 (grouped by garment)
-        garment_b64_by_garment = []
-        for garment_pils in garment_pils_by_garment:
-            garment_b64_list = []
-            for garment_pil in garment_pils:
-                garment_bytes = pil_to_bytes(garment_pil, fmt="PNG")
-                garment_b64 = base64.b64encode(garment_bytes).decode('utf-8')
-                garment_b64_list.append(garment_b64)
-            garment_b64_by_garment.append(garment_b64_list)
+        # 🤖 AI model selection from the request (default to gemini 2.5 if not specified)
+        print(f"[TRYON-GEMINI][MODEL] AI model selection from frontend: {ai_model}")
 
-        # Use genai.Client properly and select the model based on user preference
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        
-        # 🤖 Get AI model selection from request (default to gemini 2.5 if not specified)
-        ai_model_selection = request.form.get('ai_model', 'gemini')
-        print(f"[TRYON-GEMINI][MODEL] AI model selection from frontend: {ai_model_selection}")
-        
         # Map frontend model selection to actual Gemini model names
         model_mapping = {
             'gemini': 'gemini-2.5-flash-image',      # Gemini 2.5 Flash Image
             'gemini3': 'gemini-3-pro-image-preview',       # Gemini 3.0 (using 2.0-flash-exp as placeholder)
         }
-        
-        model_name = model_mapping.get(ai_model_selection, 'gemini-2.5-flash-image')
+
+        model_name = model_mapping.get(ai_model, 'gemini-2.5-flash-image')
         print(f"[TRYON-GEMINI][MODEL] Using Gemini model: {model_name}")
 
         # 🎯 Determine if this is single or multi-garment try-on
         is_multi_garment = total_garment_count > 1
-        
-        # Build garment descriptions for prompt
-        if is_multi_garment:
-            garment_descriptions = []
-            for idx, (garment_type, garment_images) in enumerate(zip(garment_types, garment_b64_by_garment)):
-                img_count = len(garment_images)
-                if img_count > 1:
-                    garment_descriptions.append(f"Garment {idx+1} ({garment_type}) - {img_count} reference images")
-                else:
-                    garment_descriptions.append(f"Garment {idx+1} ({garment_type})")
-            garments_list_str = ", ".join(garment_descriptions)
-        
-        # Generate appropriate prompt based on mode
-        if is_multi_garment:
-            # MULTI-GARMENT PROMPT
-            generation_prompt = (
-                f"🚨 CRITICAL INSTRUCTION: This is a MULTI-GARMENT VIRTUAL TRY-ON task. You MUST keep the person from the FIRST image (avatar) 100% unchanged.\n"
-                f"Your ONLY job is to add {total_garment_count} garments onto this existing person. DO NOT create a new person.\n\n"
-                
-                f"📋 IMAGE ORDER:\n"
-                f"- Image 1: AVATAR (the person to dress - keep this person exactly as-is)\n"
-                f"- Images 2-{total_image_count + 1}: GARMENT reference images (extract garment designs only)\n"
-                f"  {garments_list_str}\n\n"
-                
-                f"⛔ ABSOLUTE PROHIBITIONS - NEVER DO THESE:\n"
-                f"1. DO NOT replace the avatar person with a different person\n"
-                f"2. DO NOT use any person/model from the garment reference images\n"
-                f"3. DO NOT change the avatar's face, body, pose, or appearance in ANY way\n"
-                f"4. DO NOT change the background or lighting from the avatar image\n"
-                f"5. DO NOT create a composite of the avatar and any garment model\n\n"
-                
-                f"✅ WHAT YOU MUST DO:\n\n"
-                f"1. AVATAR PRESERVATION (100% UNCHANGED):\n"
-                f"Keep these EXACTLY as shown in the AVATAR image (image 1):\n"
-                f"- EXACT same face, eyes, nose, mouth, facial expression\n"
-                f"- EXACT same hair style, color, and position\n"
-                f"- EXACT same skin tone and complexion\n"
-                f"- EXACT same body pose, hand position, arm position\n"
-                f"- EXACT same body proportions and build\n"
-                f"- EXACT same background, floor, walls, environment\n"
-                f"- EXACT same lighting direction, color, and intensity\n"
-                f"- EXACT same camera angle and perspective\n\n"
-                
-                f"2. GARMENT EXTRACTION (from reference images):\n"
-                f"Analyze ALL {total_image_count} garment reference images to extract garment designs - ignore the people wearing them.\n"
-                f"For each garment, extract:\n"
-                f"- Design details (colors, patterns, logos, buttons, pockets, etc.)\n"
-                f"- Front, back, and side design elements (if multiple views provided)\n"
-                f"- Fabric texture and material properties\n"
-                f"- 3D structure from multiple angles\n\n"
-                
-                f"3. GARMENT COORDINATION:\n"
-                f"Layer the {total_garment_count} garments correctly:\n"
-                f"- Layer properly (top over bottom, jacket over shirt)\n"
-                f"- Position each garment appropriately on body\n"
-                f"- Maintain realistic proportions between garments\n\n"
-                
-                f"4. GARMENT ADAPTATION (Apply to extracted garments):\n"
-                f"Take the extracted garment designs and adapt them to fit the AVATAR's body:\n"
-                f"- **DRAPING:** Warp each garment to fit the avatar's body contours and pose\n"
-                f"- **WRINKLES:** Add natural wrinkles based on avatar's pose and fabric type\n"
-                f"- **SHADOWS:** Apply shadows that match the avatar's lighting\n"
-                f"- **OCCLUSION:** Layer garments behind avatar's hands/arms if they're in front\n"
-                f"- **STYLING:** If garments show styling (rolled sleeves, raised collar), apply to garments on avatar\n"
-                f"- **INTERACTION:** Show realistic interaction between garments\n\n"
-                
-                f"🎯 FINAL OUTPUT SPECIFICATION:\n"
-                f"You MUST generate an image that is:\n"
-                f"✓ The EXACT avatar person (image 1) - same face, same body, same pose, same background\n"
-                f"✓ With ALL {total_garment_count} garment designs (from garment images) now fitted onto them\n"
-                f"✓ The garments look realistically worn, not pasted on\n"
-                f"✓ All garments work together as a cohesive outfit\n\n"
-                
-                f"❌ YOUR OUTPUT MUST NOT BE:\n"
-                f"✗ A different person\n"
-                f"✗ Any model from the garment reference images\n"
-                f"✗ A blend/composite of avatar and any garment model\n"
-                f"✗ A changed/modified version of the avatar\n\n"
-                
-                f"🔴 FINAL REMINDER: Use the avatar person from image 1. Extract only the garment designs from the other images. "
-                f"DO NOT replace the avatar with anyone else. Use ALL {total_image_count} reference images to extract complete garment details."
-            )
-        else:
-            # SINGLE-GARMENT PROMPT
-            garment_type = garment_types[0]
-            num_views = len(garment_b64_by_garment[0])
-            
-            if num_views > 1:
-                reference_context = (
-                    f"REFERENCE IMAGES PROVIDED: {num_views} images of the SAME garment showing different views.\n"
-                    f"Use ALL {num_views} reference images to:\n"
-                    f"- Understand the complete structure from all angles (front, back, side views)\n"
-                    f"- Capture design details visible only in specific views\n"
-                    f"- Ensure accurate color by cross-referencing multiple views\n"
-                    f"- Identify fabric texture and material properties\n\n"
-                )
-            else:
-                reference_context = ""
-            
-            generation_prompt = (
-                f"CRITICAL INSTRUCTION: This is a VIRTUAL TRY-ON task. You MUST keep the person from the FIRST image (avatar) 100% unchanged.\n"
-                f"Your ONLY job is to add the garment onto this existing person. DO NOT create a new person.\n\n"
-                
-                f"IMAGE ORDER:\n"
-                f"- Image 1: AVATAR (the person to dress - keep this person exactly as-is)\n"
-                f"- Image{'s' if num_views > 1 else ''} {', '.join([str(i) for i in range(2, num_views + 2)])}: GARMENT reference image{'s' if num_views > 1 else ''} (extract garment design only)\n\n"
-                
-                f"{reference_context}"
-                
-                f"ABSOLUTE PROHIBITIONS - NEVER DO THESE:\n"
-                f"1. DO NOT replace the avatar person with a different person\n"
-                f"2. DO NOT use the person/model from the garment reference images\n"
-                f"3. DO NOT change the avatar's face, body, pose, or appearance in ANY way\n"
-                f"4. DO NOT change the background or lighting from the avatar image\n"
-                f"5. DO NOT create a composite of the avatar and garment model\n\n"
-                
-                f"✅ WHAT YOU MUST DO:\n\n"
-                f"1. AVATAR PRESERVATION (100% UNCHANGED):\n"
-                f"Keep these EXACTLY as shown in the AVATAR image (image 1):\n"
-                f"- EXACT same face, eyes, nose, mouth, facial expression\n"
-                f"- EXACT same hair style, color, and position\n"
-                f"- EXACT same skin tone and complexion\n"
-                f"- EXACT same body pose, hand position, arm position\n"
-                f"- EXACT same body proportions and build\n"
-                f"- EXACT same background, floor, walls, environment\n"
-                f"- EXACT same lighting direction, color, and intensity\n"
-                f"- EXACT same camera angle and perspective\n\n"
-                
-                f"2. GARMENT EXTRACTION (from reference images):\n"
-                f"{'Analyze ALL garment reference images to extract: ' if num_views > 1 else 'From the garment reference image, extract only: '}\n"
-                f"Extract ONLY the {garment_type} design - ignore the person wearing it.\n"
-                f"Always select the front facing garment image for the try on\n"
-            )
-
-        # Add specific requirements based on garment type
-        # This logic is excellent and has been preserved.
-        if garment_type.lower() in ['top', 'shirt', 'blouse', 'jacket', 'sweater', 'hoodie', 't-shirt', 'tank top']:
-            generation_prompt += (
-                f"- NECK STYLING: Preserve exact neckline (round/V-neck/collar/turtleneck).\n"
-                f"- SLEEVE DETAILS: Maintain exact sleeve length (short/long/3-quarter) and style.\n"
-                f"- COLLAR DETAILS: Keep exact collar type, shape, and positioning.\n"
-                f"- BUTTON/ZIPPER DETAILS: Preserve all buttons, zippers, and fasteners in exact positions.\n"
-                f"- POCKET DETAILS: Maintain all pockets, flaps, and positioning.\n"
-                f"- PATTERN/PRINT: Keep exact colors, patterns, logos, and graphic designs.\n"
-                f"- FABRIC TEXTURE: Preserve material appearance (cotton/denim/silk/knit texture).\n"
-                f"- HEM DETAILS: Maintain exact bottom hemline and any decorative elements.\n"
-            )
-        elif garment_type.lower() in ['pants', 'jeans', 'shorts', 'skirt', 'dress', 'trousers']:
-            generation_prompt += (
-                f"- WAISTLINE: Preserve exact waist height (high/low/mid-rise) and waistband details.\n"
-                f"- LEG SHAPE: Maintain exact fit style (skinny/straight/wide-leg/bootcut).\n"
-                f"- LENGTH: Keep exact garment length (ankle/cropped/full-length/knee-length).\n"
-                f"- POCKET DETAILS: Preserve all pockets, stitching, and positioning.\n"
-                f"- SEAM DETAILS: Maintain all visible seams, side stripes, and decorative stitching.\n"
-                f"- BUTTON/ZIPPER: Keep exact fly style, button placement, and closure details.\n"
-                f"- PATTERN/PRINT: Preserve exact colors, patterns, distressing, or fading.\n"
-                f"- FABRIC TEXTURE: Maintain material appearance (denim/cotton/leather texture).\n"
-                f"- HEM DETAILS: Keep exact bottom hem style (cuffed/raw/finished).\n"
-                f"- BELT LOOPS: Preserve belt loops, belt details, or waistband styling.\n"
-            )
-        else:
-            # Fallback for generic garments
-            generation_prompt += (
-                f"- DESIGN DETAILS: Preserve ALL design elements, embellishments, and features.\n"
-                f"- COLOR/PATTERN: Keep exact colors, patterns, prints, and graphic elements.\n"
-                f"- FABRIC TEXTURE: Maintain exact material appearance and texture.\n"
-                f"- CLOSURE DETAILS: Preserve all buttons, zippers, ties, or fastening methods.\n"
-            )
 
-        generation_prompt += (
-            f"\n3. GARMENT ADAPTATION (Apply to extracted garment):\n"
-            f"Take the extracted {garment_type} design and adapt it to fit the AVATAR's body:\n"
-            f"- **DRAPING:** Warp the garment to fit the avatar's body contours and pose\n"
-            f"- **WRINKLES:** Add natural wrinkles based on avatar's pose and fabric type\n"
-            f"- **SHADOWS:** Apply shadows that match the avatar's lighting\n"
-            f"- **OCCLUSION:** Layer garment behind avatar's hands/arms if they're in front\n"
-            f"- **STYLING:** If garment shows styling (rolled sleeves, open collar), apply to garment on avatar\n\n"
-            
-            f"🎯 FINAL OUTPUT SPECIFICATION:\n"
-            f"You MUST generate an image that is:\n"
-            f"✓ The EXACT avatar person (image 1) - same face, same body, same pose, same background\n"
-            f"✓ With the {garment_type} design (from garment images) now fitted onto them\n"
-            f"✓ The garment looks realistically worn, not pasted on\n\n"
-            
-            f"❌ YOUR OUTPUT MUST NOT BE:\n"
-            f"✗ A different person\n"
-            f"✗ The model from the garment reference images\n"
-            f"✗ A blend/composite of avatar and garment model\n"
-            f"✗ A changed/modified version of the avatar\n\n"
-            
-            f"🔴 FINAL REMINDER: Use the avatar person from image 1. Extract only the garment design from the other images. "
-            f"DO NOT replace the avatar with anyone else."
+        # 📝 Render the precompiled prompt template for this mode/category/view count
+        prompt_template, generation_prompt = tryon_prompts.build(
+            garment_types, [len(garment_inputs) for garment_inputs in garment_inputs_by_garment]
         )
+        prompt_tokens_estimate = estimate_tokens(generation_prompt)
+        print(f"[TRYON-GEMINI][PROMPT] Template {prompt_template.id}: ~{prompt_tokens_estimate} tokens "
+              f"(~{prompt_template.static_tokens} static)")
+
+        def image_result(image_data, mime_type, cache_status):
+            return TryonResult(200, mime_type, image_data, {
+                'X-AI-Model': model_name,
+                'X-Generation-Method': 'multi-garment-tryon' if is_multi_garment else 'single-garment-tryon',
+                'X-Garment-Count': str(total_garment_count),
+                'X-Total-Reference-Images': str(total_image_count),
+                'X-Cache': cache_status,
+                'X-Preprocess-Ms': f"{preprocess_ms:.0f}",
+            })
+
+        # ♻️ Serve repeated avatar+garment combinations from the result cache
+        cache_key = None
+        if tryon_cache is not None:
+            cache_key = tryon_cache_key(avatar_bytes, garment_bytes_by_garment, garment_types,
+                                        model_name, prompt_template.id)
+            cached = tryon_cache.get(cache_key)
+            if cached:
+                image_data, mime_type, tier = cached
+                print(f"[TRYON-GEMINI][CACHE] HIT ({tier}) key={cache_key[:12]} size={len(image_data)} "
+                      f"| {format_counters(tryon_cache.stats())}")
+                return image_result(image_data, mime_type, 'HIT')
+            print(f"[TRYON-GEMINI][CACHE] MISS key={cache_key[:12]} | {format_counters(tryon_cache.stats())}")
 
+        
         print(f"[TRYON-GEMINI][GEMINI] Using model {model_name}; prompt length={len(generation_prompt)}")
         print(f"[TRYON-GEMINI][MODE] {'MULTI-GARMENT' if is_multi_garment else 'SINGLE-GARMENT'} try-on with {total_garment_count} garment(s), {total_image_count} total reference image(s)")
 
+        # Format content properly for google.genai API - include ALL garment images.
+        # Built once and reused by every retry; image parts carry raw bytes.
+        contents = [
+            {"parts": [{"text": generation_prompt}]},
+            {"parts": [avatar_input.to_part()]}
+        ]
+        
+        # Add all images for each garment (multiple images per garment for improved accuracy)
+        for garment_idx, garment_inputs in enumerate(garment_inputs_by_garment):
+            for img_idx, garment_input in enumerate(garment_inputs):
+                contents.append({"parts": [garment_input.to_part()]})
+                print(f"[TRYON-GEMINI][GEMINI] Added garment {garment_idx+1}, image {img_idx+1} to contents")
+        
+        payload_bytes = len(avatar_bytes) + sum(len(data) for garment_bytes in garment_bytes_by_garment for data in garment_bytes)
+        print(f"[TRYON-GEMINI][GEMINI] Sending {len(contents)} total items to model (1 avatar + {total_image_count} garment images across {total_garment_count} garment(s), {payload_bytes} image bytes)")
+
         # Call the API with retry logic
         max_retries = 3
         backoff = 1.0
@@ -1218,23 +1295,7 @@ def tryon_gemini():
             try:
                 print(f"[TRYON-GEMINI][GEMINI] generate_content attempt {attempt}")
                 
-                # Format content properly for google.genai API - include ALL garment images
-                contents = [
-                    {"parts": [{"text": generation_prompt}]},
-                    {"parts": [{"inline_data": {"mime_type": "image/png", "data": avatar_b64}}]}
-                ]
-                
-                # Add all images for each garment (multiple images per garment for improved accuracy)
-                for garment_idx, garment_b64_list in enumerate(garment_b64_by_garment):
-                    for img_idx, garment_b64 in enumerate(garment_b64_list):
-                        contents.append({
-                            "parts": [{"inline_data": {"mime_type": "image/png", "data": garment_b64}}]
-                        })
-                        print(f"[TRYON-GEMINI][GEMINI] Added garment {garment_idx+1}, image {img_idx+1} to contents")
-                
-                print(f"[TRYON-GEMINI][GEMINI] Sending {len(contents)} total items to model (1 avatar + {total_image_count} garment images across {total_garment_count} garment(s))")
-                
-                generation_response = client.models.generate_content(
+                generation_response = gemini_manager.generate_content(
                     model=model_name,
                     contents=contents,
                     config={
@@ -1251,6 +1312,12 @@ def tryon_gemini():
                     }
                 )
                 print("[TRYON-GEMINI][GEMINI] generation_response received")
+                usage = getattr(generation_response, "usage_metadata", None)
+                prompt_tokens = getattr(usage, "prompt_token_count", None)
+                if prompt_tokens:
+                    tryon_prompts.record_usage(prompt_template, prompt_tokens)
+                    print(f"[TRYON-GEMINI][TOKENS] {prompt_template.id}: prompt={prompt_tokens} "
+                          f"output={getattr(usage, 'candidates_token_count', None)} total={getattr(usage, 'total_token_count', None)}")
                 break
             except Exception as ex:
                 last_exc = ex
@@ -1263,11 +1330,7 @@ def tryon_gemini():
                     print(traceback.format_exc())
 
         if generation_response is None:
-            return jsonify({
-                "message": f"Gemini generation failed: {str(last_exc)}",
-                "code": "GENERATION_ERROR",
-                "statusCode": 500
-            }), 500
+            return _tryon_error(f"Gemini generation failed: {str(last_exc)}", "GENERATION_ERROR", 500)
 
         print(f"[TRYON-GEMINI][DEBUG] Response dir: {dir(generation_response)}")
 
@@ -1287,15 +1350,13 @@ def tryon_gemini():
                     if safety_ratings:
                         print(f"[TRYON-GEMINI][SAFETY] Safety ratings: {safety_ratings}")
                     
-                    return jsonify({
-                        "message": "Virtual try-on was blocked by AI safety filters. This can happen with certain images or clothing items. Please try different images.",
-                        "code": "CONTENT_BLOCKED",
-                        "statusCode": 400,
-                        "details": {
+                    return _tryon_error(
+                        "Virtual try-on was blocked by AI safety filters. This can happen with certain images or clothing items. Please try different images.",
+                        "CONTENT_BLOCKED", 400,
+                        details={
                             "finish_reason": str(finish_reason),
                             "suggestion": "Try using clearer, well-lit images with simple backgrounds"
-                        }
-                    }), 400
+                        })
 
         # Some SDKs return .parts, others return .candidates[].output or similar.
         # Try to guard against several common shapes.
@@ -1310,13 +1371,9 @@ def tryon_gemini():
                     image_data = inline.data
                     mime_type = getattr(inline, "mime_type", "image/png")
                     print(f"[TRYON-GEMINI][SUCCESS] returning image part {i} mime={mime_type} size={len(image_data)}")
-                    resp = make_response(send_file(BytesIO(image_data), mimetype=mime_type, as_attachment=False))
-                    resp.headers['X-AI-Model'] = model_name
-                    resp.headers['X-Generation-Method'] = 'multi-garment-tryon' if is_multi_garment else 'single-garment-tryon'
-                    resp.headers['X-Garment-Count'] = str(total_garment_count)
-                    resp.headers['X-Total-Reference-Images'] = str(total_image_count)
-                    resp.status_code = 200
-                    return resp
+                    if cache_key:
+                        tryon_cache.put(cache_key, image_data, mime_type)
+                    return image_result(image_data, mime_type, 'MISS')
 
         # 2) Some SDKs return candidates with .output or parts nested inside candidates
         candidates = getattr(generation_response, "candidates", None)
@@ -1331,13 +1388,9 @@ def tryon_gemini():
                         if inline and getattr(inline, "data", None):
                             image_data = inline.data
                             mime_type = getattr(inline, "mime_type", "image/png")
-                            resp = make_response(send_file(BytesIO(image_data), mimetype=mime_type, as_attachment=False))
-                            resp.headers['X-AI-Model'] = model_name
-                            resp.headers['X-Generation-Method'] = 'multi-garment-tryon' if is_multi_garment else 'single-garment-tryon'
-                            resp.headers['X-Garment-Count'] = str(total_garment_count)
-                            resp.headers['X-Total-Reference-Images'] = str(total_image_count)
-                            resp.status_code = 200
-                            return resp
+                            if cache_key:
+                                tryon_cache.put(cache_key, image_data, mime_type)
+                            return image_result(image_data, mime_type, 'MISS')
 
                 # fallback: candidate might have base64 or text
                 text = getattr(cand, "text", None) or getattr(cand, "content", None)
@@ -1352,30 +1405,18 @@ def tryon_gemini():
         except Exception:
             pass
 
-        return jsonify({
-            "message": "Gemini Nano Banana failed to generate virtual try-on image",
-            "code": "GENERATION_FAILED",
-            "statusCode": 500,
-            "details": "No image data returned from Gemini model - possibly blocked or model returned text only"
-        }), 500
+        return _tryon_error("Gemini Nano Banana failed to generate virtual try-on image", "GENERATION_FAILED", 500,
+                            details="No image data returned from Gemini model - possibly blocked or model returned text only")
 
     except ValueError as ve:
         print(f"[TRYON-GEMINI][ERROR] ValueError: {ve}")
-        return jsonify({
-            "message": "Gemini request was blocked or returned no valid content",
-            "code": "CONTENT_BLOCKED",
-            "statusCode": 400,
-            "details": str(ve)
-        }), 400
+        return _tryon_error("Gemini request was blocked or returned no valid content", "CONTENT_BLOCKED", 400,
+                            details=str(ve))
 
     except Exception as e:
         print(f"[TRYON-GEMINI][ERROR] Unexpected error: {e}")
         print(traceback.format_exc())
-        return jsonify({
-            "message": f"Gemini Nano Banana virtual try-on failed: {str(e)}",
-            "code": "SERVER_ERROR",
-            "statusCode": 500
-        }), 500
+        return _tryon_error(f"Gemini Nano Banana virtual try-on failed: {str(e)}", "SERVER_ERROR", 500)
 
 @app.route('/api/tryon-gemini-multi', methods=['POST'])
 def tryon_gemini_multi():
@@ -1392,6 +1433,129 @@ def tryon_gemini_multi():
     return tryon_gemini()
 
 
+# ===== TRY-ON JOB ENDPOINTS =====
+# Submit a try-on, get a job id back immediately, then poll or stream status.
+# The generation itself runs run_tryon() on the bounded tryon_jobs pool.
+
+def _tryon_job_urls(job_id):
+    base = f"/api/tryon-gemini/jobs/{job_id}"
+    return {
+        'status_url': base,
+        'result_url': f"{base}/result",
+        'events_url': f"{base}/events",
+    }
+
+
+@app.route('/api/tryon-gemini/jobs', methods=['POST'])
+def submit_tryon_job():
+    """Accept the same multipart fields as /api/tryon-gemini and queue the generation"""
+    if not GEMINI_API_KEY:
+        return jsonify({
+            "message": "Gemini API key not configured",
+            "code": "MISSING_API_KEY",
+            "statusCode": 500
+        }), 500
+
+    # Uploaded files are closed once this request ends, so read them into memory here
+    try:
+        tryon_input = read_tryon_upload(request.files, request.form)
+    except TryonInputError as e:
+        return jsonify({"message": str(e), "code": "INVALID_INPUT", "statusCode": 400}), 400
+
+    try:
+        job = tryon_jobs.submit(lambda: run_tryon(**tryon_input))
+    except JobQueueFull as e:
+        print(f"[TRYON-JOBS][REJECT] {e}")
+        return jsonify({
+            "message": "Too many try-on requests in progress. Please retry shortly.",
+            "code": "QUEUE_FULL",
+            "statusCode": 503
+        }), 503
+
+    payload = job.to_dict()
+    payload.update(_tryon_job_urls(job.job_id))
+    return jsonify(payload), 202
+
+
+@app.route('/api/tryon-gemini/jobs/<job_id>', methods=['GET'])
+def get_tryon_job(job_id):
+    job = tryon_jobs.get(job_id)
+    if not job:
+        return jsonify({
+            "message": "Job not found or expired",
+            "code": "JOB_NOT_FOUND",
+            "statusCode": 404
+        }), 404
+    payload = job.to_dict()
+    payload.update(_tryon_job_urls(job.job_id))
+    return jsonify(payload), 200
+
+
+@app.route('/api/tryon-gemini/jobs/<job_id>/result', methods=['GET'])
+def get_tryon_job_result(job_id):
+    job = tryon_jobs.get(job_id)
+    if not job:
+        return jsonify({
+            "message": "Job not found or expired",
+            "code": "JOB_NOT_FOUND",
+            "statusCode": 404
+        }), 404
+
+    if job.status not in FINISHED_STATUSES:
+        payload = job.to_dict()
+        payload.update(_tryon_job_urls(job.job_id))
+        return jsonify(payload), 202
+
+    # Replay the captured response exactly as the synchronous endpoint returned it
+    return Response(job.body, status=job.status_code, mimetype=job.mimetype, headers=job.headers)
+
+
+@app.route('/api/tryon-gemini/jobs/<job_id>/events', methods=['GET'])
+def stream_tryon_job(job_id):
+    """
+    Server-sent events: one `status` event per state change, then the stream closes.
+
+    The stream also closes after tryon_jobs.events_max_seconds with a `timeout`
+    event; clients then poll status_url until the job finishes.
+    """
+    job = tryon_jobs.get(job_id)
+    if not job:
+        return jsonify({
+            "message": "Job not found or expired",
+            "code": "JOB_NOT_FOUND",
+            "statusCode": 404
+        }), 404
+
+    def events():
+        last_status = None
+        deadline = time.time() + tryon_jobs.events_max_seconds
+        while True:
+            status = job.status
+            if status != last_status:
+                payload = job.to_dict()
+                payload.update(_tryon_job_urls(job.job_id))
+                yield f"event: status\ndata: {json.dumps(payload)}\n\n"
+                last_status = status
+            if status in FINISHED_STATUSES:
+                event_name = 'done' if status == STATUS_DONE else 'failed'
+                yield f"event: {event_name}\ndata: {json.dumps({'job_id': job.job_id})}\n\n"
+                return
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                # Hand long waits over to polling instead of holding this worker
+                payload = {'job_id': job.job_id, 'status': status, 'retry_after': 5}
+                payload.update(_tryon_job_urls(job.job_id))
+                yield f"event: timeout\ndata: {json.dumps(payload)}\n\n"
+                return
+            if tryon_jobs.wait(job, last_status, timeout=min(15, remaining)) == last_status:
+                yield ": keep-alive\n\n"
+
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
 # ========== OLD MULTI-GARMENT ENDPOINT REMOVED ==========
 # The old /api/tryon-gemini-multi implementation has been merged into /api/tryon-gemini
 # The unified endpoint automatically detects single vs multi-garment requests
@@ -1402,17 +1566,11 @@ def tryon_gemini_multi():
 @app.route('/api/message')
 def get_message():
     try:
-        conn = mysql.connector.connect(
-            host=MYSQL_HOST,
-            user=MYSQL_USER,
-            password=MYSQL_PASSWORD,
-            database=MYSQL_DATABASE
-        )
-        cursor = conn.cursor()
-        cursor.execute('SELECT message FROM hello LIMIT 1;')
-        result = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        with db_pool.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT message FROM hello LIMIT 1;')
+            result = cursor.fetchone()
+            cursor.close()
         if result:
             return jsonify({'message': result[0]})
         else:
@@ -1539,40 +1697,44 @@ def create_account():
         userid = str(uuid.uuid4())[:8]  # 8-character unique ID
         
         # Hash password
-        hashed_password = generate_password_hash(password)
+        hashed_password = password_hasher.hash(password)
         
         # Connect to database
-        connection = mysql.connector.connect(**db_config)
-        cursor = connection.cursor()
-        
-        # Check if email already exists
-        cursor.execute("SELECT id FROM users WHERE email = %s", (email,))
-        if cursor.fetchone():
-            return jsonify({
-                'success': False,
-                'error': 'Email already registered'
-            }), 409
-        
-        # Insert user data (avatar left as NULL)
-        insert_query = """
-        INSERT INTO users (userid, email, first_name, last_name, password, age, gender, weight, height, physique, avatar)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        cursor.execute(insert_query, (
-            userid, email, first_name, last_name, hashed_password,
-            age, gender, weight, height, physique, None  # avatar is NULL
-        ))
-        
-        connection.commit()
-        user_id = cursor.lastrowid
+        with db_pool.get_connection() as connection:
+            cursor = connection.cursor()
+            
+            # Check if email already exists
+            cursor.execute("SELECT id FROM users WHERE email = %s", (email,))
+            if cursor.fetchone():
+                cursor.close()
+                return jsonify({
+                    'success': False,
+                    'error': 'Email already registered'
+                }), 409
+            
+            # Insert user data (avatar left as NULL)
+            insert_query = """
+            INSERT INTO users (userid, email, first_name, last_name, password, age, gender, weight, height, physique, avatar)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            
+            cursor.execute(insert_query, (
+                userid, email, first_name, last_name, hashed_password,
+                age, gender, weight, height, physique, None  # avatar is NULL
+            ))
+            
+            connection.commit()
+            user_id = cursor.lastrowid
+            
+            cursor.close()
         
-        cursor.close()
-        connection.close()
+        token, token_expires_at = session_tokens.issue(userid)
         
         return jsonify({
             'success': True,
             'message': 'Account created successfully',
+            'token': token,
+            'token_expires_at': token_expires_at,
             'user_data': {
                 'id': user_id,
                 'userid': userid,
@@ -1599,6 +1761,74 @@ def create_account():
             'error': f'Server error: {str(e)}'
         }), 500
 
+def session_token_from_request():
+    """Session token from the Authorization or X-Session-Token header (never the URL)"""
+    authorization = request.headers.get('Authorization', '')
+    if authorization.lower().startswith('bearer '):
+        return authorization[7:].strip()
+    return request.headers.get('X-Session-Token')
+
+
+def session_user_error(user_id):
+    """
+    Error response if the request's session token does not cover ``user_id``, else None.
+
+    A presented token must be valid and belong to ``user_id``. Requests
+    without a token pass unless SESSION_TOKEN_REQUIRED is set, so clients
+    that predate tokens keep working.
+    """
+    token = session_token_from_request()
+    if not token:
+        if session_tokens.required:
+            return jsonify({
+                'success': False,
+                'error': 'Session token required'
+            }), 401
+        return None
+    claims = session_tokens.verify(token)
+    if not claims:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid or expired session token'
+        }), 401
+    if claims['uid'] != str(user_id):
+        return jsonify({
+            'success': False,
+            'error': 'Session token does not belong to this user'
+        }), 403
+    return None
+
+
+def save_password_hash(user_pk, old_hash, new_hash):
+    """Store an upgraded password hash unless the password changed meanwhile"""
+    with db_pool.get_connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("UPDATE users SET password = %s WHERE id = %s AND password = %s",
+                           (new_hash, user_pk, old_hash))
+            connection.commit()
+            print(f"[AUTH][REHASH] Upgraded password hash for user {user_pk}")
+        finally:
+            cursor.close()
+
+
+@app.route('/api/session', methods=['GET'])
+def get_session():
+    """Validate a session token without touching the database"""
+    token = session_token_from_request()
+    claims = session_tokens.verify(token) if token else None
+    if not claims:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid or expired session token'
+        }), 401
+    return jsonify({
+        'success': True,
+        'userid': claims['uid'],
+        'token_expires_at': claims['expires_at']
+    }), 200
+
+
 @app.route('/api/login', methods=['POST'])
 def login():
         try:
@@ -1608,6 +1838,40 @@ def login():
             email = data.get('email', '').strip()
             password = data.get('password', '')
             
+            # A valid session token logs in without re-running password hashing
+            token = session_token_from_request()
+            if token and not password:
+                claims = session_tokens.verify(token)
+                if not claims:
+                    return jsonify({
+                        'success': False,
+                        'error': 'Invalid or expired session token'
+                    }), 401
+                
+                with db_pool.get_connection() as connection:
+                    cursor = connection.cursor(dictionary=True)
+                    cursor.execute("""
+                        SELECT id, userid, email, first_name, last_name, age, gender, 
+                            weight, height, physique, created_at, is_active 
+                        FROM users WHERE userid = %s AND is_active = TRUE
+                    """, (claims['uid'],))
+                    user = cursor.fetchone()
+                    cursor.close()
+                
+                if not user:
+                    return jsonify({
+                        'success': False,
+                        'error': 'Invalid or expired session token'
+                    }), 401
+                
+                return jsonify({
+                    'success': True,
+                    'message': 'Login successful',
+                    'token': token,
+                    'token_expires_at': claims['expires_at'],
+                    'user_data': user
+                }), 200
+            
             if not email or not password:
                 return jsonify({
                     'success': False,
@@ -1615,33 +1879,41 @@ def login():
                 }), 400
             
             # Connect to database
-            connection = mysql.connector.connect(**db_config)
-            cursor = connection.cursor(dictionary=True)
-            
-            # Get user by email
-            cursor.execute("""
-                SELECT id, userid, email, first_name, last_name, password, age, gender, 
-                    weight, height, physique, created_at, is_active 
-                FROM users WHERE email = %s AND is_active = TRUE
-            """, (email,))
-            
-            user = cursor.fetchone()
+            with db_pool.get_connection() as connection:
+                cursor = connection.cursor(dictionary=True)
+                
+                # Get user by email
+                cursor.execute("""
+                    SELECT id, userid, email, first_name, last_name, password, age, gender, 
+                        weight, height, physique, created_at, is_active 
+                    FROM users WHERE email = %s AND is_active = TRUE
+                """, (email,))
+                
+                user = cursor.fetchone()
+                cursor.close()
             
-            if not user or not check_password_hash(user['password'], password):
+            # Verify after the connection is back in the pool: hashing is slow on purpose
+            if not user or not password_hasher.verify(user['password'], password):
                 return jsonify({
                     'success': False,
                     'error': 'Invalid email or password'
                 }), 401
             
-            # Remove password from response
-            del user['password']
+            # Upgrade hashes made with older parameters after responding
+            stored_hash = user.pop('password')
+            if password_hasher.needs_rehash(stored_hash):
+                user_pk = user['id']
+                password_hasher.rehash_later(
+                    password, lambda new_hash: save_password_hash(user_pk, stored_hash, new_hash)
+                )
             
-            cursor.close()
-            connection.close()
+            token, token_expires_at = session_tokens.issue(user['userid'])
             
             return jsonify({
                 'success': True,
                 'message': 'Login successful',
+                'token': token,
+                'token_expires_at': token_expires_at,
                 'user_data': user
             }), 200
             
@@ -1680,6 +1952,10 @@ def save_avatar():
                 'error': 'User ID is required'
             }), 400
         
+        denied = session_user_error(user_id)
+        if denied:
+            return denied
+        
         avatar_file = request.files['avatar']
         
         # Validate file type
@@ -1705,62 +1981,52 @@ def save_avatar():
         print(f"[SAVE-AVATAR][DATA] Saving avatar for user: {user_id}, size: {len(avatar_data)} bytes")
         
         # Connect to database
-        connection = mysql.connector.connect(**db_config)
-        cursor = connection.cursor()
-        
-        # Check if user exists
-        cursor.execute("SELECT id FROM users WHERE userid = %s", (user_id,))
-        user = cursor.fetchone()
-        
-        if not user:
-            print(f"[SAVE-AVATAR][ERROR] User not found: {user_id}")
+        with db_pool.get_connection() as connection:
+            cursor = connection.cursor()
+            
+            # Check if user exists (and whether they already have an avatar)
+            cursor.execute("SELECT id, avatar_size FROM users WHERE userid = %s", (user_id,))
+            user = cursor.fetchone()
+            
+            if not user:
+                print(f"[SAVE-AVATAR][ERROR] User not found: {user_id}")
+                cursor.close()
+                return jsonify({
+                    'success': False,
+                    'error': 'User not found'
+                }), 404
+            
+            print(f"[SAVE-AVATAR][DB] User found with id: {user[0]}")
+            if user[1]:
+                print(f"[SAVE-AVATAR][DB] User already has avatar of size: {user[1]} bytes - will replace it")
+            else:
+                print(f"[SAVE-AVATAR][DB] User has no existing avatar - this will be first upload")
+            
+            # Write the image to the blob store; the row only keeps its hash, size and type
+            avatar_sha256, avatar_size = blob_store.put(avatar_data)
+            avatar_mime = sniff_image_mime(avatar_data, default='image/png')
+            print(f"[SAVE-AVATAR][BLOB] Stored {avatar_size} bytes as {avatar_sha256[:12]} ({avatar_mime})")
+            
+            # Update user's avatar reference (and drop any legacy LONGBLOB copy)
+            update_query = """
+                UPDATE users
+                SET avatar = NULL, avatar_sha256 = %s, avatar_size = %s, avatar_mime = %s
+                WHERE userid = %s
+            """
+            cursor.execute(update_query, (avatar_sha256, avatar_size, avatar_mime, user_id))
+            rows_affected = cursor.rowcount
+            
+            connection.commit()
+            
             cursor.close()
-            connection.close()
-            return jsonify({
-                'success': False,
-                'error': 'User not found'
-            }), 404
-        
-        print(f"[SAVE-AVATAR][DB] User found with id: {user[0]}")
-        
-        # Check if user already has an avatar (for debugging)
-        cursor.execute("SELECT LENGTH(avatar) as current_avatar_size FROM users WHERE userid = %s", (user_id,))
-        current_avatar = cursor.fetchone()
-        if current_avatar and current_avatar[0]:
-            print(f"[SAVE-AVATAR][DB] User already has avatar of size: {current_avatar[0]} bytes - will replace it")
-        else:
-            print(f"[SAVE-AVATAR][DB] User has no existing avatar - this will be first upload")
-        
-        # Update user's avatar
-        update_query = "UPDATE users SET avatar = %s WHERE userid = %s"
-        cursor.execute(update_query, (avatar_data, user_id))
-        rows_affected = cursor.rowcount
-        
-        connection.commit()
         
         print(f"[SAVE-AVATAR][DB] UPDATE executed, rows affected: {rows_affected}")
-        
-        # Verify the update by checking if avatar was saved
-        cursor.execute("SELECT LENGTH(avatar) as avatar_size FROM users WHERE userid = %s", (user_id,))
-        verification = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
-        
-        if verification and verification[0]:
-            print(f"[SAVE-AVATAR][SUCCESS] Avatar saved successfully! Stored size: {verification[0]} bytes")
-            print(f"[SAVE-AVATAR][SUCCESS] Expected size: {len(avatar_data)} bytes, Stored size: {verification[0]} bytes")
-            if verification[0] == len(avatar_data):
-                print(f"[SAVE-AVATAR][SUCCESS] ✅ Sizes match - avatar replaced successfully!")
-            else:
-                print(f"[SAVE-AVATAR][WARNING] ⚠️ Size mismatch - expected {len(avatar_data)}, got {verification[0]}")
-        else:
-            print(f"[SAVE-AVATAR][WARNING] Update completed but avatar not found in database!")
+        print(f"[SAVE-AVATAR][SUCCESS] Avatar saved successfully! Stored size: {avatar_size} bytes")
         
         return jsonify({
             'success': True,
             'message': 'Avatar saved successfully',
-            'avatar_size': verification[0] if verification else 0
+            'avatar_size': avatar_size
         }), 200
         
     except mysql.connector.Error as e:
@@ -1777,38 +2043,72 @@ def save_avatar():
             'error': f'Server error: {str(e)}'
         }), 500
 
+# Avatars keep a stable URL, so clients store them but revalidate with the
+# content-hash ETag on every use; unchanged avatars cost a 304 and one column read
+AVATAR_CACHE_CONTROL = 'private, no-cache'
+
 # API to get avatar blob
 @app.route('/api/get-avatar/<user_id>', methods=['GET'])
 def get_avatar(user_id):
     try:
+        denied = session_user_error(user_id)
+        if denied:
+            return denied
         # Connect to database
-        connection = mysql.connector.connect(**db_config)
-        cursor = connection.cursor()
+        with db_pool.get_connection() as connection:
+            cursor = connection.cursor()
+            
+            # Get the avatar reference only - the image itself lives in the blob store
+            cursor.execute("SELECT avatar_sha256, avatar_mime FROM users WHERE userid = %s", (user_id,))
+            result = cursor.fetchone()
+            
+            # The stored content hash is a strong validator: answer revalidations
+            # without reading the image, as long as its blob is still there
+            if (result and result[0] and request.if_none_match.contains(result[0])
+                    and blob_store.exists(result[0])):
+                cursor.close()
+                resp = Response(status=304)
+                resp.set_etag(result[0])
+                resp.headers['Cache-Control'] = AVATAR_CACHE_CONTROL
+                return resp
+            
+            legacy_avatar = None
+            if result and not result[0]:
+                # Row not migrated to the blob store yet
+                cursor.execute("SELECT avatar FROM users WHERE userid = %s", (user_id,))
+                legacy_avatar = cursor.fetchone()[0]
+            
+            cursor.close()
         
-        # Get user's avatar
-        cursor.execute("SELECT avatar FROM users WHERE userid = %s", (user_id,))
-        result = cursor.fetchone()
+        if legacy_avatar:
+            mime = sniff_image_mime(legacy_avatar, default='image/png')
+        else:
+            mime = result[1] if result and result[1] else 'image/png'
+        headers = {
+            'Content-Disposition': f'inline; filename=avatar_{user_id}.{image_extension(mime)}',
+            'Cache-Control': AVATAR_CACHE_CONTROL
+        }
         
-        cursor.close()
-        connection.close()
+        if legacy_avatar:
+            legacy_etag = hashlib.sha256(legacy_avatar).hexdigest()
+            if request.if_none_match.contains(legacy_etag):
+                resp = Response(status=304, headers={'Cache-Control': AVATAR_CACHE_CONTROL})
+            else:
+                resp = Response(legacy_avatar, mimetype=mime, headers=headers)
+            resp.set_etag(legacy_etag)
+            return resp
         
-        if not result or not result[0]:
+        if not result or not result[0] or not blob_store.exists(result[0]):
             return jsonify({
                 'success': False,
                 'error': 'Avatar not found'
             }), 404
         
-        avatar_data = result[0]
-        
-        # Return the image as binary response
-        return Response(
-            avatar_data,
-            mimetype='image/png',
-            headers={
-                'Content-Disposition': f'inline; filename=avatar_{user_id}.png',
-                'Cache-Control': 'max-age=300'  # Cache for 5 minutes
-            }
-        )
+        # Stream the file from disk (sendfile where the server supports it)
+        resp = send_file(blob_store.path(result[0]), mimetype=mime, conditional=False, etag=False)
+        resp.headers.update(headers)
+        resp.set_etag(result[0])
+        return resp
         
     except mysql.connector.Error as e:
         print(f"❌ Database error: {e}")
@@ -1843,6 +2143,10 @@ def update_avatar():
         user_id = data.get('user_id')
         avatar_base64 = data.get('avatar_data')
         
+        denied = session_user_error(user_id)
+        if denied:
+            return denied
+        
         print(f"[UPDATE-AVATAR][DATA] user_id: {user_id}, base64 length: {len(avatar_base64) if avatar_base64 else 0}")
         
         # Remove data URL prefix if present (e.g., "data:image/png;base64,")
@@ -1873,62 +2177,52 @@ def update_avatar():
         print(f"[UPDATE-AVATAR][DATA] Updating avatar for user: {user_id}, size: {len(avatar_data)} bytes")
         
         # Connect to database
-        connection = mysql.connector.connect(**db_config)
-        cursor = connection.cursor()
-        
-        # Check if user exists
-        cursor.execute("SELECT id FROM users WHERE userid = %s", (user_id,))
-        user = cursor.fetchone()
-        
-        if not user:
-            print(f"[UPDATE-AVATAR][ERROR] User not found: {user_id}")
+        with db_pool.get_connection() as connection:
+            cursor = connection.cursor()
+            
+            # Check if user exists (and whether they already have an avatar)
+            cursor.execute("SELECT id, avatar_size FROM users WHERE userid = %s", (user_id,))
+            user = cursor.fetchone()
+            
+            if not user:
+                print(f"[UPDATE-AVATAR][ERROR] User not found: {user_id}")
+                cursor.close()
+                return jsonify({
+                    'success': False,
+                    'error': 'User not found'
+                }), 404
+            
+            print(f"[UPDATE-AVATAR][DB] User found with id: {user[0]}")
+            if user[1]:
+                print(f"[UPDATE-AVATAR][DB] User already has avatar of size: {user[1]} bytes - will replace it")
+            else:
+                print(f"[UPDATE-AVATAR][DB] User has no existing avatar - this will be first upload")
+            
+            # Write the image to the blob store; the row only keeps its hash, size and type
+            avatar_sha256, avatar_size = blob_store.put(avatar_data)
+            avatar_mime = sniff_image_mime(avatar_data, default='image/png')
+            print(f"[UPDATE-AVATAR][BLOB] Stored {avatar_size} bytes as {avatar_sha256[:12]} ({avatar_mime})")
+            
+            # Update user's avatar reference (and drop any legacy LONGBLOB copy)
+            update_query = """
+                UPDATE users
+                SET avatar = NULL, avatar_sha256 = %s, avatar_size = %s, avatar_mime = %s
+                WHERE userid = %s
+            """
+            cursor.execute(update_query, (avatar_sha256, avatar_size, avatar_mime, user_id))
+            rows_affected = cursor.rowcount
+            
+            connection.commit()
+            
             cursor.close()
-            connection.close()
-            return jsonify({
-                'success': False,
-                'error': 'User not found'
-            }), 404
-        
-        print(f"[UPDATE-AVATAR][DB] User found with id: {user[0]}")
-        
-        # Check if user already has an avatar (for debugging)
-        cursor.execute("SELECT LENGTH(avatar) as current_avatar_size FROM users WHERE userid = %s", (user_id,))
-        current_avatar = cursor.fetchone()
-        if current_avatar and current_avatar[0]:
-            print(f"[UPDATE-AVATAR][DB] User already has avatar of size: {current_avatar[0]} bytes - will replace it")
-        else:
-            print(f"[UPDATE-AVATAR][DB] User has no existing avatar - this will be first upload")
-        
-        # Update user's avatar
-        update_query = "UPDATE users SET avatar = %s WHERE userid = %s"
-        cursor.execute(update_query, (avatar_data, user_id))
-        rows_affected = cursor.rowcount
-        
-        connection.commit()
         
         print(f"[UPDATE-AVATAR][DB] UPDATE executed, rows affected: {rows_affected}")
-        
-        # Verify the update by checking if avatar was saved
-        cursor.execute("SELECT LENGTH(avatar) as avatar_size FROM users WHERE userid = %s", (user_id,))
-        verification = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
-        
-        if verification and verification[0]:
-            print(f"[UPDATE-AVATAR][SUCCESS] Avatar updated successfully! Stored size: {verification[0]} bytes")
-            print(f"[UPDATE-AVATAR][SUCCESS] Expected size: {len(avatar_data)} bytes, Stored size: {verification[0]} bytes")
-            if verification[0] == len(avatar_data):
-                print(f"[UPDATE-AVATAR][SUCCESS] ✅ Sizes match - avatar replaced successfully!")
-            else:
-                print(f"[UPDATE-AVATAR][WARNING] ⚠️ Size mismatch - expected {len(avatar_data)}, got {verification[0]}")
-        else:
-            print(f"[UPDATE-AVATAR][WARNING] Update completed but avatar not found in database!")
+        print(f"[UPDATE-AVATAR][SUCCESS] Avatar updated successfully! Stored size: {avatar_size} bytes")
         
         return jsonify({
             'success': True,
             'message': 'Avatar updated successfully',
-            'avatar_size': verification[0] if verification else 0
+            'avatar_size': avatar_size
         }), 200
         
     except mysql.connector.Error as e:
@@ -1949,23 +2243,25 @@ def update_avatar():
 @app.route('/api/get-user-data/<user_id>', methods=['GET'])
 def get_user_data(user_id):
     try:
+        denied = session_user_error(user_id)
+        if denied:
+            return denied
         print(f"📥 Fetching user data for user: {user_id}")
         
         # Connect to database
-        connection = mysql.connector.connect(**db_config)
-        cursor = connection.cursor(dictionary=True)
-        
-        # Get user data (excluding password and avatar for security/performance)
-        cursor.execute("""
-            SELECT id, userid, email, first_name, last_name, age, gender, 
-                   weight, height, physique, created_at, updated_at, is_active
-            FROM users WHERE userid = %s
-        """, (user_id,))
-        
-        user = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
+        with db_pool.get_connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            
+            # Get user data (excluding password and avatar for security/performance)
+            cursor.execute("""
+                SELECT id, userid, email, first_name, last_name, age, gender, 
+                       weight, height, physique, created_at, updated_at, is_active
+                FROM users WHERE userid = %s
+            """, (user_id,))
+            
+            user = cursor.fetchone()
+            
+            cursor.close()
         
         if not user:
             return jsonify({
@@ -2007,20 +2303,19 @@ def get_user_data_by_email(email):
         print(f"📥 Fetching user data for email: {email}")
         
         # Connect to database
-        connection = mysql.connector.connect(**db_config)
-        cursor = connection.cursor(dictionary=True)
-        
-        # Get user data (excluding password and avatar)
-        cursor.execute("""
-            SELECT id, userid, email, first_name, last_name, age, gender, 
-                   weight, height, physique, created_at, updated_at, is_active
-            FROM users WHERE email = %s
-        """, (email,))
-        
-        user = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
+        with db_pool.get_connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            
+            # Get user data (excluding password and avatar)
+            cursor.execute("""
+                SELECT id, userid, email, first_name, last_name, age, gender, 
+                       weight, height, physique, created_at, updated_at, is_active
+                FROM users WHERE email = %s
+            """, (email,))
+            
+            user = cursor.fetchone()
+            
+            cursor.close()
         
         if not user:
             return jsonify({
@@ -2059,6 +2354,9 @@ def get_user_data_by_email(email):
 @app.route('/api/update-user-data/<user_id>', methods=['PUT'])
 def update_user_data(user_id):
     try:
+        denied = session_user_error(user_id)
+        if denied:
+            return denied
         print(f"📝 Updating user data for user: {user_id}")
         
         # Get JSON data
@@ -2071,68 +2369,66 @@ def update_user_data(user_id):
             }), 400
         
         # Connect to database
-        connection = mysql.connector.connect(**db_config)
-        cursor = connection.cursor()
-        
-        # Check if user exists
-        cursor.execute("SELECT id FROM users WHERE userid = %s", (user_id,))
-        user = cursor.fetchone()
-        
-        if not user:
+        with db_pool.get_connection() as connection:
+            cursor = connection.cursor()
+            
+            # Check if user exists
+            cursor.execute("SELECT id FROM users WHERE userid = %s", (user_id,))
+            user = cursor.fetchone()
+            
+            if not user:
+                cursor.close()
+                return jsonify({
+                    'success': False,
+                    'error': 'User not found'
+                }), 404
+            
+            # Build update query dynamically based on provided fields
+            allowed_fields = ['first_name', 'last_name', 'age', 'gender', 'weight', 'height', 'physique']
+            update_fields = []
+            update_values = []
+            
+            for field in allowed_fields:
+                if field in data:
+                    update_fields.append(f"{field} = %s")
+                    
+                    # Validate and convert data types
+                    if field in ['age']:
+                        try:
+                            update_values.append(int(data[field]))
+                        except ValueError:
+                            return jsonify({
+                                'success': False,
+                                'error': f'Invalid {field}: must be a number'
+                            }), 400
+                    elif field in ['weight', 'height']:
+                        try:
+                            update_values.append(float(data[field]))
+                        except ValueError:
+                            return jsonify({
+                                'success': False,
+                                'error': f'Invalid {field}: must be a number'
+                            }), 400
+                    else:
+                        update_values.append(data[field])
+            
+            if not update_fields:
+                return jsonify({
+                    'success': False,
+                    'error': 'No valid fields to update'
+                }), 400
+            
+            # Add updated_at timestamp
+            update_fields.append("updated_at = CURRENT_TIMESTAMP")
+            
+            # Build and execute update query
+            update_query = f"UPDATE users SET {', '.join(update_fields)} WHERE userid = %s"
+            update_values.append(user_id)
+            
+            cursor.execute(update_query, update_values)
+            connection.commit()
+            
             cursor.close()
-            connection.close()
-            return jsonify({
-                'success': False,
-                'error': 'User not found'
-            }), 404
-        
-        # Build update query dynamically based on provided fields
-        allowed_fields = ['first_name', 'last_name', 'age', 'gender', 'weight', 'height', 'physique']
-        update_fields = []
-        update_values = []
-        
-        for field in allowed_fields:
-            if field in data:
-                update_fields.append(f"{field} = %s")
-                
-                # Validate and convert data types
-                if field in ['age']:
-                    try:
-                        update_values.append(int(data[field]))
-                    except ValueError:
-                        return jsonify({
-                            'success': False,
-                            'error': f'Invalid {field}: must be a number'
-                        }), 400
-                elif field in ['weight', 'height']:
-                    try:
-                        update_values.append(float(data[field]))
-                    except ValueError:
-                        return jsonify({
-                            'success': False,
-                            'error': f'Invalid {field}: must be a number'
-                        }), 400
-                else:
-                    update_values.append(data[field])
-        
-        if not update_fields:
-            return jsonify({
-                'success': False,
-                'error': 'No valid fields to update'
-            }), 400
-        
-        # Add updated_at timestamp
-        update_fields.append("updated_at = CURRENT_TIMESTAMP")
-        
-        # Build and execute update query
-        update_query = f"UPDATE users SET {', '.join(update_fields)} WHERE userid = %s"
-        update_values.append(user_id)
-        
-        cursor.execute(update_query, update_values)
-        connection.commit()
-        
-        cursor.close()
-        connection.close()
         
         print(f"✅ User data updated successfully for: {user_id}")
         
@@ -2182,6 +2478,10 @@ def save_to_wardrobe():
                 'error': 'Missing required fields: user_id, garment_id, garment_image, garment_type'
             }), 400
         
+        denied = session_user_error(user_id)
+        if denied:
+            return denied
+        
         # Convert base64 to binary for storage
         try:
             # Remove data URL prefix if present
@@ -2196,25 +2496,33 @@ def save_to_wardrobe():
             }), 400
         
         # Connect to database
-        connection = mysql.connector.connect(**db_config)
-        cursor = connection.cursor()
-        
-        # Insert or replace garment in wardrobe
-        insert_query = """
-            INSERT INTO wardrobe (user_id, garment_id, garment_image, garment_type, garment_url, date_added)
-            VALUES (%s, %s, %s, %s, %s, NOW())
-            ON DUPLICATE KEY UPDATE
-            garment_image = VALUES(garment_image),
-            garment_type = VALUES(garment_type),
-            garment_url = VALUES(garment_url),
-            date_added = NOW()
-        """
-        
-        cursor.execute(insert_query, (user_id, garment_id, image_binary, garment_type, garment_url))
-        connection.commit()
-        
-        cursor.close()
-        connection.close()
+        with db_pool.get_connection() as connection:
+            cursor = connection.cursor()
+            
+            # Image goes to the blob store; the row only references it
+            image_sha256, image_size = blob_store.put(image_binary)
+            image_mime = sniff_image_mime(image_binary, default='image/png')
+            
+            # Insert or replace garment in wardrobe
+            insert_query = """
+                INSERT INTO wardrobe (user_id, garment_id, garment_image, image_sha256, image_size, image_mime,
+                                      garment_type, garment_url, date_added)
+                VALUES (%s, %s, NULL, %s, %s, %s, %s, %s, NOW())
+                ON DUPLICATE KEY UPDATE
+                garment_image = NULL,
+                image_sha256 = VALUES(image_sha256),
+                image_size = VALUES(image_size),
+                image_mime = VALUES(image_mime),
+                garment_type = VALUES(garment_type),
+                garment_url = VALUES(garment_url),
+                date_added = NOW()
+            """
+            
+            cursor.execute(insert_query, (user_id, garment_id, image_sha256, image_size, image_mime,
+                                          garment_type, garment_url))
+            connection.commit()
+            
+            cursor.close()
         
         print(f"✅ Garment saved to wardrobe: {garment_id} for user {user_id}")
         
@@ -2240,43 +2548,55 @@ def save_to_wardrobe():
 
 @app.route('/api/wardrobe/user/<user_id>', methods=['GET'])
 def get_user_wardrobe(user_id):
-    """Get all wardrobe items for a specific user"""
+    """Get all wardrobe items for a specific user (images inlined as data URLs).
+
+    Kept for existing clients; new code should page through /api/wardrobe/user/<user_id>/items.
+    """
     try:
+        denied = session_user_error(user_id)
+        if denied:
+            return denied
         # Connect to database
-        connection = mysql.connector.connect(**db_config)
-        cursor = connection.cursor(dictionary=True)
-        
-        # Query to get all wardrobe items for the user
-        select_query = """
-            SELECT 
-                id,
-                user_id,
-                garment_id,
-                garment_image,
-                garment_type,
-                garment_url,
-                date_added
-            FROM wardrobe 
-            WHERE user_id = %s 
-            ORDER BY date_added DESC
-        """
-        
-        cursor.execute(select_query, (user_id,))
-        wardrobe_items = cursor.fetchall()
-        
-        # Convert binary image data to base64 for JSON response
-        for item in wardrobe_items:
-            if item['garment_image']:
-                # Convert binary to base64 string
-                image_b64 = base64.b64encode(item['garment_image']).decode('utf-8')
-                item['garment_image'] = f"data:image/png;base64,{image_b64}"
-            
-            # Convert datetime to string for JSON serialization
-            if item['date_added']:
-                item['date_added'] = item['date_added'].isoformat()
-        
-        cursor.close()
-        connection.close()
+        with db_pool.get_connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            
+            # Query to get all wardrobe items for the user
+            select_query = """
+                SELECT 
+                    id,
+                    user_id,
+                    garment_id,
+                    garment_image,
+                    image_sha256,
+                    image_mime,
+                    garment_type,
+                    garment_url,
+                    date_added
+                FROM wardrobe 
+                WHERE user_id = %s 
+                ORDER BY date_added DESC
+            """
+            
+            cursor.execute(select_query, (user_id,))
+            wardrobe_items = cursor.fetchall()
+            
+            # Convert image data to base64 for JSON response
+            for item in wardrobe_items:
+                image_sha256 = item.pop('image_sha256')
+                image_mime = item.pop('image_mime') or 'image/png'
+                if image_sha256 and blob_store.exists(image_sha256):
+                    image_b64 = base64.b64encode(blob_store.read(image_sha256)).decode('utf-8')
+                    item['garment_image'] = f"data:{image_mime};base64,{image_b64}"
+                elif item['garment_image']:
+                    # Legacy row still holding the LONGBLOB
+                    image_b64 = base64.b64encode(item['garment_image']).decode('utf-8')
+                    item['garment_image'] = f"data:image/png;base64,{image_b64}"
+                
+                # Convert datetime to string for JSON serialization
+                if item['date_added']:
+                    item['date_added'] = item['date_added'].isoformat()
+            
+            cursor.close()
         
         print(f"✅ Retrieved {len(wardrobe_items)} wardrobe items for user {user_id}")
         
@@ -2296,6 +2616,202 @@ def get_user_wardrobe(user_id):
             'error': f'Server error: {str(e)}'
         }), 500
 
+WARDROBE_PAGE_SIZE = 24
+WARDROBE_MAX_PAGE_SIZE = 100
+
+
+def _encode_wardrobe_cursor(date_added, item_id):
+    raw = json.dumps([date_added.isoformat() if date_added else None, item_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_wardrobe_cursor(cursor_token):
+    padded = cursor_token + '=' * (-len(cursor_token) % 4)
+    date_added, item_id = json.loads(base64.urlsafe_b64decode(padded))
+    return (datetime.fromisoformat(date_added) if date_added is not None else None), int(item_id)
+
+
+def _wardrobe_keyset_condition(after):
+    """SQL condition and params selecting the rows after cursor ``after`` in listing order"""
+    date_added, item_id = after
+    # ORDER BY date_added DESC puts NULL dates last in MySQL, ordered among themselves by id
+    if date_added is None:
+        return " AND date_added IS NULL AND id < %s", [item_id]
+    return (" AND (date_added < %s OR (date_added = %s AND id < %s) OR date_added IS NULL)",
+            [date_added, date_added, item_id])
+
+
+@app.route('/api/wardrobe/user/<user_id>/items', methods=['GET'])
+def list_user_wardrobe(user_id):
+    """
+    Cursor-paginated wardrobe listing: metadata plus an image URL per item.
+
+    Query params: limit (default 24, max 100), cursor (next_cursor from the previous page).
+    Images are fetched separately from image_url, which is versioned by content hash
+    and signed, so the browser can cache it privately for as long as the signature lasts.
+    """
+    try:
+        denied = session_user_error(user_id)
+        if denied:
+            return denied
+        try:
+            limit = int(request.args.get('limit', WARDROBE_PAGE_SIZE))
+        except ValueError:
+            limit = WARDROBE_PAGE_SIZE
+        limit = max(1, min(limit, WARDROBE_MAX_PAGE_SIZE))
+        
+        cursor_token = request.args.get('cursor')
+        after = None
+        if cursor_token:
+            try:
+                after = _decode_wardrobe_cursor(cursor_token)
+            except Exception:
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid cursor'
+                }), 400
+        
+        with db_pool.get_connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            
+            # Keyset pagination on (date_added, id) - never touches garment_image
+            select_query = """
+                SELECT id, user_id, garment_id, image_sha256, image_size, image_mime,
+                       garment_type, garment_url, date_added
+                FROM wardrobe
+                WHERE user_id = %s
+            """
+            params = [user_id]
+            if after:
+                condition, condition_params = _wardrobe_keyset_condition(after)
+                select_query += condition
+                params += condition_params
+            select_query += " ORDER BY date_added DESC, id DESC LIMIT %s"
+            params.append(limit + 1)
+            
+            cursor.execute(select_query, params)
+            rows = cursor.fetchall()
+            
+            cursor.close()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        items = []
+        for row in rows:
+            image_url = f"/api/wardrobe/{quote(user_id, safe='')}/{quote(row['garment_id'], safe='')}/image"
+            # <img> tags cannot send the session token, so the URL carries a short-lived signature
+            image_query = session_tokens.sign_path(wardrobe_image_path(user_id, row['garment_id']))
+            if row['image_sha256']:
+                image_query['v'] = row['image_sha256'][:16]
+            image_url += '?' + urlencode(image_query)
+            items.append({
+                'id': row['id'],
+                'user_id': row['user_id'],
+                'garment_id': row['garment_id'],
+                'garment_type': row['garment_type'],
+                'garment_url': row['garment_url'],
+                'date_added': row['date_added'].isoformat() if row['date_added'] else None,
+                'image_url': image_url,
+                'image_size': row['image_size'],
+                'image_mime': row['image_mime']
+            })
+        
+        next_cursor = None
+        if has_more and rows:
+            next_cursor = _encode_wardrobe_cursor(rows[-1]['date_added'], rows[-1]['id'])
+        
+        print(f"✅ Listed {len(items)} wardrobe items for user {user_id} (has_more={has_more})")
+        
+        return jsonify({
+            'success': True,
+            'items': items,
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }), 200
+        
+    except mysql.connector.Error as e:
+        print(f"❌ Database error: {e}")
+        return jsonify({
+            'success': False,
+            'error': f'Database error: {str(e)}'
+        }), 500
+        
+    except Exception as e:
+        print(f"❌ Server error: {e}")
+        return jsonify({
+            'success': False,
+            'error': f'Server error: {str(e)}'
+        }), 500
+
+def wardrobe_image_path(user_id, garment_id):
+    """Canonical (unquoted) path that wardrobe image URL signatures cover"""
+    return f"/api/wardrobe/{user_id}/{garment_id}/image"
+
+
+@app.route('/api/wardrobe/<user_id>/<garment_id>/image', methods=['GET'])
+def get_wardrobe_image(user_id, garment_id):
+    """Serve one wardrobe garment image straight from the blob store"""
+    try:
+        # A signed URL from the wardrobe listing stands in for the session token
+        signed = session_tokens.verify_path(wardrobe_image_path(user_id, garment_id),
+                                            request.args.get('expires'), request.args.get('sig'))
+        denied = None if signed else session_user_error(user_id)
+        if denied:
+            return denied
+        with db_pool.get_connection() as connection:
+            cursor = connection.cursor()
+            
+            cursor.execute(
+                "SELECT image_sha256, image_mime FROM wardrobe WHERE user_id = %s AND garment_id = %s",
+                (user_id, garment_id)
+            )
+            result = cursor.fetchone()
+            
+            legacy_image = None
+            if result and not result[0]:
+                # Row not migrated to the blob store yet
+                cursor.execute(
+                    "SELECT garment_image FROM wardrobe WHERE user_id = %s AND garment_id = %s",
+                    (user_id, garment_id)
+                )
+                legacy_image = cursor.fetchone()[0]
+            
+            cursor.close()
+        
+        if legacy_image:
+            return Response(legacy_image, mimetype=sniff_image_mime(legacy_image, default='image/png'))
+        
+        if not result or not result[0] or not blob_store.exists(result[0]):
+            return jsonify({
+                'success': False,
+                'error': 'Garment image not found'
+            }), 404
+        
+        resp = send_file(blob_store.path(result[0]), mimetype=result[1] or 'image/png', conditional=False)
+        # Private to this user. URLs from the paginated listing carry ?v=<hash prefix>
+        # (bytes never change) and a signature, so cache them for as long as the URL works
+        max_age = 300
+        version = request.args.get('v')
+        if signed and version and result[0].startswith(version):
+            max_age = max(0, int(request.args['expires']) - int(time.time()))
+        resp.headers['Cache-Control'] = f'private, max-age={max_age}'
+        return resp
+        
+    except mysql.connector.Error as e:
+        print(f"❌ Database error: {e}")
+        return jsonify({
+            'success': False,
+            'error': f'Database error: {str(e)}'
+        }), 500
+        
+    except Exception as e:
+        print(f"❌ Server error: {e}")
+        return jsonify({
+            'success': False,
+            'error': f'Server error: {str(e)}'
+        }), 500
+
 @app.route('/api/wardrobe/remove', methods=['DELETE'])
 def remove_from_wardrobe():
     """Remove a garment from user's wardrobe"""
@@ -2317,25 +2833,27 @@ def remove_from_wardrobe():
                 'error': 'Missing required fields: user_id, garment_id'
             }), 400
         
-        # Connect to database
-        connection = mysql.connector.connect(**db_config)
-        cursor = connection.cursor()
-        
-        # Delete garment from wardrobe
-        delete_query = "DELETE FROM wardrobe WHERE user_id = %s AND garment_id = %s"
-        cursor.execute(delete_query, (user_id, garment_id))
+        denied = session_user_error(user_id)
+        if denied:
+            return denied
         
-        if cursor.rowcount == 0:
+        # Connect to database
+        with db_pool.get_connection() as connection:
+            cursor = connection.cursor()
+            
+            # Delete garment from wardrobe
+            delete_query = "DELETE FROM wardrobe WHERE user_id = %s AND garment_id = %s"
+            cursor.execute(delete_query, (user_id, garment_id))
+            
+            if cursor.rowcount == 0:
+                cursor.close()
+                return jsonify({
+                    'success': False,
+                    'error': 'Garment not found in wardrobe'
+                }), 404
+            
+            connection.commit()
             cursor.close()
-            connection.close()
-            return jsonify({
-                'success': False,
-                'error': 'Garment not found in wardrobe'
-            }), 404
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
         
         print(f"✅ Garment removed from wardrobe: {garment_id} for user {user_id}")
         
@@ -2358,6 +2876,22 @@ def remove_from_wardrobe():
             'error': f'Server error: {str(e)}'
         }), 500
 
+CHAT_MODEL = 'gemini-2.0-flash-exp'
+
+
+def build_chat_prompt(message):
+    """System prompt for the garment search assistant, with the user's message appended"""
+    return f"""You are an online fashion garments discovery assistant. 
+        
+        Guidelines:
+        - Take the user request for online fashion garment and give exact matching recommendations
+        - Strictly follow brand, gender, garment size, color, style preferences
+        - Respond only with results from the brand for that garment type 
+        - If no brand is mentioned give the preference to garment and gender
+
+        User message: {message}"""
+
+
 @app.route('/api/chat', methods=['POST'])
 def chat_assistance():
     """AI chat assistant for garment search and recommendations"""
@@ -2389,23 +2923,26 @@ def chat_assistance():
                 'error': 'Gemini API key not configured'
             }), 500
         
-        client = genai.Client(api_key=GEMINI_API_KEY)
+        cached = chat_cache.lookup(message) if chat_cache else None
+        if chat_cache and not cached:
+            print(f"🗄️ Chat cache miss | {format_counters(chat_cache.stats())}")
+        if cached:
+            print(f"🗄️ Chat cache hit ({cached.similarity}) via '{cached.message}' | {format_counters(chat_cache.stats())}")
+            return jsonify({
+                'success': True,
+                'response': cached.response,
+                'user_message': message,
+                'cached': True,
+                'cache_similarity': cached.similarity
+            }), 200
         
         # Create system prompt for garment search assistant
-        system_prompt = f"""You are an online fashion garments discovery assistant. 
-        
-        Guidelines:
-        - Take the user request for online fashion garment and give exact matching recommendations
-        - Strictly follow brand, gender, garment size, color, style preferences
-        - Respond only with results from the brand for that garment type 
-        - If no brand is mentioned give the preference to garment and gender
-
-        User message: {message}"""
+        system_prompt = build_chat_prompt(message)
         
         try:
             # Send request to Gemini
-            response = client.models.generate_content(
-                model='gemini-2.0-flash-exp',
+            response = gemini_manager.generate_content(
+                model=CHAT_MODEL,
                 contents=[{
                     'parts': [{'text': system_prompt}]
                 }]
@@ -2414,6 +2951,8 @@ def chat_assistance():
             if hasattr(response, 'text') and response.text:
                 ai_response = response.text.strip()
                 print(f"AI response: {ai_response}")
+                if chat_cache:
+                    chat_cache.store(message, ai_response)
                 
                 return jsonify({
                     'success': True,
@@ -2445,6 +2984,99 @@ def chat_assistance():
             'error': f'Server error: {str(e)}'
         }), 500
 
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_assistance_stream():
+    """
+    Streaming variant of /api/chat as server-sent events.
+
+    Takes the same JSON body. Events:
+        chunk     {"text": ...} incremental text as the model produces it
+        fallback  {"response": ..., "note": ...} the model failed (possibly
+                  mid-answer); replaces any text streamed so far
+        done      {"success": true, "response": <full text>, "user_message": ...}
+                  plus "cached": true when answered from the chat cache
+    Validation errors are returned as plain JSON like /api/chat.
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({
+            'success': False,
+            'error': 'No data provided'
+        }), 400
+    
+    message = data.get('message', '').strip()
+    user_id = data.get('user_id', 'guest')
+    
+    if not message:
+        return jsonify({
+            'success': False,
+            'error': 'Message cannot be empty'
+        }), 400
+    
+    if not GEMINI_API_KEY:
+        return jsonify({
+            'success': False,
+            'error': 'Gemini API key not configured'
+        }), 500
+    
+    print(f"💬 Streaming chat request from user {user_id}: {message}")
+    
+    cached = chat_cache.lookup(message) if chat_cache else None
+    if chat_cache and not cached:
+        print(f"🗄️ Chat cache miss | {format_counters(chat_cache.stats())}")
+    
+    def events():
+        if cached:
+            print(f"🗄️ Chat cache hit ({cached.similarity}) via '{cached.message}' | {format_counters(chat_cache.stats())}")
+            yield sse_event('chunk', {'text': cached.response})
+            yield sse_event('done', {'success': True, 'response': cached.response, 'user_message': message,
+                                     'cached': True, 'cache_similarity': cached.similarity})
+            return
+        started = time.time()
+        parts = []
+        note = None
+        try:
+            stream = gemini_manager.generate_content_stream(
+                model=CHAT_MODEL,
+                contents=[{
+                    'parts': [{'text': build_chat_prompt(message)}]
+                }]
+            )
+            for chunk in stream:
+                text = getattr(chunk, 'text', None)
+                if not text:
+                    continue
+                if not parts:
+                    print(f"💬 First chat token after {time.time() - started:.2f}s")
+                parts.append(text)
+                yield sse_event('chunk', {'text': text})
+            if not ''.join(parts).strip():
+                raise ValueError('Empty response from AI')
+            ai_response = ''.join(parts).strip()
+            if chat_cache:
+                chat_cache.store(message, ai_response)
+        except Exception as gemini_error:
+            print(f"❌ Gemini streaming error after {len(parts)} chunks: {gemini_error}")
+            ai_response = generate_fallback_response(message)
+            note = 'Fallback response used due to AI service issues'
+            yield sse_event('fallback', {'response': ai_response, 'note': note})
+        
+        print(f"AI response ({time.time() - started:.2f}s): {ai_response}")
+        done = {'success': True, 'response': ai_response, 'user_message': message}
+        if note:
+            done['note'] = note
+        yield sse_event('done', done)
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/api/unified-search', methods=['POST'])
 def unified_search():
     """
@@ -2462,18 +3094,51 @@ def unified_search():
 
         print(f"🔍 Direct search request for: \"{query}\"")
 
-        search_results = perform_google_search(query)
-        garment_images = extract_garment_images_from_results(search_results, query) if search_results else []
+        # Results only depend on the normalized query and its brand-site rewrite
+        normalized_query = normalize_query(query)
+        search_query = build_search_query(normalized_query)
+
+        def load_results():
+            search_results, garment_images = search_garment_images(normalized_query, search_query)
+            if not search_results:
+                return None  # API errors and empty result sets are not cached
+            if image_deduper:
+                # Hash thumbnails while the probes below are in flight
+                image_deduper.prefetch(garment_images)
+            if image_prober:
+                # Drop dead / hotlink-blocked URLs before they reach the grid
+                garment_images = image_prober.validate(garment_images, headers=PROXY_IMAGE_REQUEST_HEADERS,
+                                                       warm=warm_proxy_cache if proxy_cache else None)
+                print(f"🖼️ Image probe kept {len(garment_images)} image(s) | {format_counters(image_prober.stats())}")
+            if image_deduper:
+                # The same photo from several retailers or at several sizes takes one slot
+                garment_images = image_deduper.dedupe(garment_images)
+                print(f"🖼️ Image dedupe kept {len(garment_images)} image(s) | {format_counters(image_deduper.stats())}")
+            return {
+                'items': search_results,
+                'garment_images': garment_images,
+            }
+
+        cache_status = None
+        if search_cache is not None:
+            cached, cache_status = search_cache.get_or_load(normalize_query(search_query), load_results)
+            print(f"🗄️ Search cache {cache_status} for '{search_query}' | {format_counters(search_cache.stats())}")
+        else:
+            cached = load_results()
+        garment_images = cached['garment_images'] if cached else []
 
         print(f"🖼️ Found {len(garment_images)} images after filtering.")
 
-        return jsonify({
+        resp = jsonify({
             'success': True,
             'query': query,
-            'garment_images': garment_images[:12], # Return up to 12 images
+            'garment_images': garment_images[:SEARCH_TARGET_RESULTS], # Return up to 12 images
             'total_results': len(garment_images),
             'has_results': len(garment_images) > 0
-        }), 200
+        })
+        if cache_status:
+            resp.headers['X-Cache'] = cache_status
+        return resp, 200
 
     except Exception as e:
         print(f"❌ Unified search error: {e}")
@@ -2482,90 +3147,136 @@ def unified_search():
             'error': f'Server error: {str(e)}'
         }), 500
 
-def perform_google_search(query):
-    """Perform Google Custom Search API for fashion images"""
+
+def build_search_query(query):
+    """Rewrite a user query into the Custom Search query (brand site: or general fashion)"""
+    # Check if query contains a brand name
+    detected_brand = search_classifier.detect_brand(query)
+    if detected_brand:
+        print(f"🏷️ Brand detected: {detected_brand.alias} → {detected_brand.domain}")
+
+    # Construct search query based on brand detection
+    if detected_brand:
+        # If brand is detected, search specifically on that brand's site
+        search_query = f"site:{detected_brand.domain} {query}"
+        print(f"🔍 Brand-specific search: '{search_query}'")
+    else:
+        # No brand detected, use general fashion search
+        search_query = f"{query} clothing fashion"
+        print(f"🔍 General fashion search: '{search_query}'")
+    return search_query
+
+
+SEARCH_PAGE_SIZE = 10  # Custom Search API maximum per request
+SEARCH_TARGET_RESULTS = 12
+SEARCH_EXTRA_PAGES = int(os.getenv('SEARCH_EXTRA_PAGES', '2'))
+
+# Shared across searches so concurrent page fetches stay bounded per worker
+search_page_executor = ThreadPoolExecutor(max_workers=max(1, int(os.getenv('SEARCH_PAGE_WORKERS', '4'))),
+                                          thread_name_prefix='search-page')
+
+
+def _merge_garment_images(merged, seen_urls, garment_images):
+    """Append images whose URL has not been seen yet"""
+    for garment_image in garment_images:
+        url_key = garment_image['image_url'].split('#', 1)[0]
+        if url_key in seen_urls:
+            continue
+        seen_urls.add(url_key)
+        merged.append(garment_image)
+
+
+def search_garment_images(query, search_query, target=SEARCH_TARGET_RESULTS):
+    """
+    Search and filter garment images, fetching more result pages only when needed.
+
+    The first page is fetched on its own, so a query that filters well stays a
+    single round trip. If it leaves fewer than ``target`` images and the page
+    was full, up to SEARCH_EXTRA_PAGES further pages are requested
+    concurrently and merged (de-duplicated by image URL) in page order, so
+    ranking does not depend on which response arrives first; merging stops
+    once ``target`` is reached. Returns (search_results, garment_images).
+    """
+    search_results, raw_count = fetch_search_page(query, search_query)
+    garment_images = []
+    seen_urls = set()
+    _merge_garment_images(garment_images, seen_urls, extract_garment_images_from_results(search_results, query))
+
+    if len(garment_images) < target and raw_count >= SEARCH_PAGE_SIZE and SEARCH_EXTRA_PAGES > 0:
+        # The API serves at most 100 results (start + num <= 101)
+        starts = [1 + SEARCH_PAGE_SIZE * page for page in range(1, SEARCH_EXTRA_PAGES + 1)
+                  if SEARCH_PAGE_SIZE * page + SEARCH_PAGE_SIZE <= 100]
+        print(f"🔍 Only {len(garment_images)}/{target} images after page 1; fetching pages at start={starts}")
+        futures = [search_page_executor.submit(fetch_search_page, query, search_query, start) for start in starts]
+        try:
+            # Fetched in parallel, merged in start order
+            for future in futures:
+                page_results, _ = future.result()
+                search_results.extend(page_results)
+                _merge_garment_images(garment_images, seen_urls,
+                                      extract_garment_images_from_results(page_results, query))
+                if len(garment_images) >= target:
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+
+    for idx, garment_image in enumerate(garment_images):
+        garment_image['id'] = f"item-{idx}"
+    return search_results, garment_images
+
+
+def perform_google_search(query, search_query=None, start=1):
+    """
+    Perform Google Custom Search API for fashion images.
+
+    ``search_query`` is the already rewritten query from build_search_query();
+    it is derived from ``query`` when not given.
+    """
+    return fetch_search_page(query, search_query, start)[0]
+
+
+def fetch_search_page(query, search_query=None, start=1):
+    """
+    Fetch and pre-filter one page of Custom Search image results.
+
+    Returns (search_results, raw_count) where raw_count is the number of items
+    the API returned before filtering (fewer than a full page means there is
+    no next page).
+    """
     try:    
-        print(f"🔍 Google Custom Search API for query: '{query}'")
+        print(f"🔍 Google Custom Search API for query: '{query}' (start={start})")
         
         # Check API configuration
         if not GOOGLE_API_KEY:
             print("❌ GOOGLE_API_KEY not configured")
-            return []
+            return [], 0
             
         if not GOOGLE_CSE_ID:
             print("❌ GOOGLE_CSE_ID not configured")
-            return []
-        
-        # Build the Google Custom Search service
-        service = build("customsearch", "v1", developerKey=GOOGLE_API_KEY)
-        
-        # Detect brand in query and map to official domain
-        brand_domains = {
-            'nike': 'nike.com',
-            'adidas': 'adidas.com',
-            'zara': 'zara.com',
-            'h&m': 'hm.com',
-            'hm': 'hm.com',
-            'gap': 'gap.com',
-            'uniqlo': 'uniqlo.com',
-            'target': 'target.com',
-            'walmart': 'walmart.com',
-            'amazon': 'amazon.com',
-            'levi': 'levi.com',
-            'levis': 'levi.com',
-            'gucci': 'gucci.com',
-            'prada': 'prada.com',
-            'versace': 'versace.com',
-            'burberry': 'burberry.com',
-            'calvin klein': 'calvinklein.com',
-            'tommy hilfiger': 'tommy.com',
-            'ralph lauren': 'ralphlauren.com',
-            'forever 21': 'forever21.com',
-            'forever21': 'forever21.com',
-            'old navy': 'oldnavy.com',
-            'oldnavy': 'oldnavy.com',
-            'banana republic': 'bananarepublic.com',
-            'j crew': 'jcrew.com',
-            'jcrew': 'jcrew.com'
-        }
+            return [], 0
         
-        # Check if query contains a brand name
-        query_lower = query.lower()
-        detected_brand = None
-        brand_site = None
-        
-        for brand, domain in brand_domains.items():
-            if brand in query_lower:
-                detected_brand = brand
-                brand_site = domain
-                print(f"🏷️ Brand detected: {brand} → {domain}")
-                break
-        
-        # Construct search query based on brand detection
-        if detected_brand and brand_site:
-            # If brand is detected, search specifically on that brand's site
-            search_query = f"site:{brand_site} {query}"
-            print(f"🔍 Brand-specific search: '{search_query}'")
-        else:
-            # No brand detected, use general fashion search
-            search_query = f"{query} clothing fashion"
-            print(f"🔍 General fashion search: '{search_query}'")
+        if search_query is None:
+            search_query = build_search_query(query)
         
         # Search parameters optimized for fashion images from quality retailers
         search_params = {
             'q': search_query,
             'cx': GOOGLE_CSE_ID,
             'searchType': 'image',  # Image search
-            'num': 10,  # Number of results (max 10 per request)
+            'num': SEARCH_PAGE_SIZE,  # Number of results (max 10 per request)
             'imgType': 'photo',  # Photo images (not clipart)
             'imgSize': 'LARGE',  # Changed to LARGE for better quality images
             'safe': 'active',  # Safe search
             'fields': 'items(title,link,image,displayLink,snippet)'  # Only get needed fields
         }
         
+        if start > 1:
+            search_params['start'] = start
+        
         # Perform the search
         print(f"🔍 Calling Google Custom Search API...")
-        response = service.cse().list(**search_params).execute()
+        response = custom_search_client.list(**search_params)
         
         # Process results
         search_results = []
@@ -2593,35 +3304,17 @@ def perform_google_search(query):
                     continue
                 
                 # Filter out low-quality sources and non-fashion sites
-                excluded_domains = [
-                    'ebay', 'vecteezy', 'shutterstock', 'getty', 'alamy', 'depositphotos',
-                    'unsplash', 'pexels', 'pixabay', 'cart2india', 'alibaba', 'aliexpress',
-                    'pinterest', 'instagram', 'facebook', 'twitter', 'youtube',
-                    'modaknits.com'  # This seems to be a blog/info site, not retail
-                ]
-                
-                source_domain = source_site.lower()
-                if any(excluded in source_domain for excluded in excluded_domains):
+                if search_classifier.is_excluded(source_site):
                     print(f"   ❌ Skipping low-quality source: {source_site}")
                     continue
                 
-                # Prefer established fashion retailers
-                preferred_domains = [
-                    'target.com', 'walmart.com', 'amazon.com', 'kohls.com', 'macys.com',
-                    'nordstrom.com', 'zappos.com', 'asos.com', 'hm.com', 'zara.com',
-                    'gap.com', 'oldnavy.com', 'express.com', 'forever21.com',
-                    'nike.com', 'adidas.com', 'uniqlo.com', 'jcrew.com', 'bananarepublic.com'
-                ]
-                
-                # Give priority to known fashion retailers
-                is_preferred_retailer = any(domain in source_domain for domain in preferred_domains)
-                
                 search_results.append({
                     'title': title,
                     'image_url': image_url,
                     'page_url': context_url,  # URL of the page containing the image
                     'price': None,  # Custom Search API doesn't provide price directly
                     'store': source_site,
+                    'thumbnail_url': image_info.get('thumbnailLink'),
                     'query': query,
                     'snippet': snippet[:100] if snippet else None  # Truncate snippet
                 })
@@ -2637,18 +3330,12 @@ def perform_google_search(query):
         # If no results from API, return empty list
         if not search_results:
             print("🔍 No valid results from API")
-            return []
-        
-        return search_results
         
-    except ImportError as e:
-        print(f"❌ Google API client not installed: {e}")
-        print("   Please install: pip install google-api-python-client")
-        return []
+        return search_results, len(items)
         
     except Exception as e:
         print(f"❌ Google Custom Search API error: {e}")
-        return []
+        return [], 0
 
 def extract_garment_images_from_results(results, query=None):
     """Process and filter search results to extract valid garment images"""
@@ -2657,45 +3344,10 @@ def extract_garment_images_from_results(results, query=None):
     # Detect if a brand was mentioned in the query
     detected_brand_domain = None
     if query:
-        query_lower = query.lower()
-        brand_domains = {
-            'nike': 'nike.com',
-            'adidas': 'adidas.com',
-            'zara': 'zara.com',
-            'h&m': 'hm.com',
-            'hm': 'hm.com',
-            'gap': 'gap.com',
-            'uniqlo': 'uniqlo.com',
-            'target': 'target.com',
-            'walmart': 'walmart.com',
-            'amazon': 'amazon.com',
-            'levi': 'levi.com',
-            'levis': 'levi.com',
-            'gucci': 'gucci.com',
-            'prada': 'prada.com',
-            'versace': 'versace.com'
-        }
-        
-        for brand, domain in brand_domains.items():
-            if brand in query_lower:
-                detected_brand_domain = domain
-                print(f"🏷️ Filtering results for brand: {domain}")
-                break
-    
-    # Define quality criteria for fashion results
-    excluded_domains = [
-        'ebay', 'vecteezy', 'shutterstock', 'getty', 'alamy', 'depositphotos',
-        'unsplash', 'pexels', 'pixabay', 'cart2india', 'alibaba', 'aliexpress',
-        'pinterest', 'instagram', 'facebook', 'twitter', 'youtube', 'tiktok',
-        'modaknits', 'blog', 'wiki', 'reddit'
-    ]
-    
-    preferred_retailers = [
-        'target', 'walmart', 'amazon', 'kohls', 'macys', 'nordstrom', 'zappos',
-        'asos', 'hm', 'zara', 'gap', 'oldnavy', 'express', 'forever21',
-        'nike', 'adidas', 'uniqlo', 'jcrew', 'bananarepublic', 'loft',
-        'anntaylor', 'chicos', 'dressbarn', 'talbots', 'lanebryant'
-    ]
+        detected_brand = search_classifier.detect_brand(query)
+        if detected_brand:
+            detected_brand_domain = detected_brand.domain
+            print(f"🏷️ Filtering results for brand: {detected_brand_domain}")
     
     for result in results:
         try:
@@ -2705,42 +3357,28 @@ def extract_garment_images_from_results(results, query=None):
             
             title = result.get('title', '').lower()
             store = result.get('store', '').lower()
+            flags = search_classifier.classify(title, store, detected_brand_domain)
             
             # If a brand was detected, ONLY include results from that brand's domain
             if detected_brand_domain:
-                if detected_brand_domain not in store:
+                if not flags.brand_match:
                     print(f"   ❌ Skipping non-brand result: {store} (looking for {detected_brand_domain})")
                     continue
                 else:
                     print(f"   ✅ Brand match: {store}")
             
             # Skip excluded domains
-            if any(excluded in store for excluded in excluded_domains):
+            if flags.excluded:
                 print(f"   ❌ Skipping excluded domain: {store}")
                 continue
             
-            # Check for fashion keywords in title
-            fashion_keywords = [
-                'dress', 'shirt', 'blouse', 'top', 'sweater', 'cardigan', 'jacket', 'coat',
-                'pants', 'jeans', 'trousers', 'shorts', 'skirt', 'leggings',
-                'shoes', 'sneakers', 'boots', 'sandals', 'heels', 'flats',
-                'hoodie', 'sweatshirt', 't-shirt', 'tank', 'camisole',
-                'suit', 'blazer', 'vest', 'jumpsuit', 'romper'
-            ]
-            
-            has_fashion_keywords = any(keyword in title for keyword in fashion_keywords)
-            is_preferred_retailer = any(retailer in store for retailer in preferred_retailers)
-            
             # Filter out non-fashion items
-            non_fashion_keywords = ['dog', 'pet', 'vlog', 'filming', 'medium shot', 'handheld', 'stock', 'photo']
-            has_non_fashion = any(keyword in title for keyword in non_fashion_keywords)
-            
-            if has_non_fashion:
+            if flags.non_fashion:
                 print(f"   ❌ Skipping non-fashion item: {title[:50]}...")
                 continue
             
             # Include if it has fashion keywords OR is from a preferred retailer OR brand match
-            if has_fashion_keywords or is_preferred_retailer or detected_brand_domain:
+            if flags.fashion or flags.preferred or detected_brand_domain:
                 garment_images.append({
                     'id': f"item-{len(garment_images)}",
                     'image_url': img_url,  # For frontend compatibility
@@ -2748,6 +3386,7 @@ def extract_garment_images_from_results(results, query=None):
                     'title': result.get('title', 'Fashion Item'),
                     'price': result.get('price'),
                     'store': result.get('store'),
+                    'thumbnail_url': result.get('thumbnail_url'),
                     'source_url': result.get('page_url') or img_url,  # For frontend compatibility
                     'url': result.get('page_url') or img_url  # Alternative field name
                 })
@@ -2826,8 +3465,10 @@ if __name__ == "__main__":
     print("🌐 Starting server on http://0.0.0.0:5000")
     print("🎯 Gemini Try-On API: /api/tryon-gemini")
     print("👔 Multi-Garment Try-On API: /api/tryon-gemini-multi")
+    print("⏳ Try-On Jobs API: /api/tryon-gemini/jobs")
     print("�️ Remove Person Background API: /api/remove-person-bg")
     print("🖼️  Remove Background (Rembg) API: /api/remove-bg-rembg")
+    print("🗂️  Batch Remove Background API: /api/remove-bg-rembg/batch")
     print("�🔍🤖 Unified Search API: /api/unified-search")
     print("💬 Chat Assistant API: /api/chat")
     print("🧪 Gemini Test API: /api/gemini/test")
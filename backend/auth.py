@@ -0,0 +1,178 @@
+"""
+Password hashing and signed session tokens.
+
+Password hashes use werkzeug's generate_password_hash with a configurable
+method. Hashing is deliberately CPU-heavy and still runs on the request
+thread (the handler needs the result to answer), but at most
+PASSWORD_HASH_CONCURRENCY hashes run at once per worker, so a burst of logins
+queues instead of saturating every CPU. Stored hashes made with other
+parameters are upgraded after the next successful login on a separate
+background thread; upgrades are skipped while that thread is backed up, and
+happen on a later login instead.
+
+A successful login issues a session token: the user id and issue time,
+signed with HMAC (itsdangerous, as used by Flask's own sessions). Checking
+a token is one HMAC and needs no database lookup. Clients can present it
+on later logins and on user-scoped routes instead of re-sending the
+password, so password hashing runs once per token lifetime instead of once
+per popup. Tokens stay valid until they expire; there is no server-side
+revocation list.
+
+Tokens never travel in URLs (they would end up in access logs, history and
+Referer headers). Resources loaded by <img> tags, which cannot send headers,
+get short-lived signed URLs instead: an HMAC over the path and an expiry,
+valid only for that one path.
+
+Configuration (environment variables):
+    SESSION_TOKEN_SECRET     Signing key, at least 32 characters (random per process
+                             when unset, too short or the .env.example placeholder,
+                             so tokens do not survive restarts or span workers)
+    SESSION_TOKEN_TTL        Token lifetime in seconds (default 604800 = 7 days)
+    SESSION_TOKEN_REQUIRED   "true" to reject user-scoped requests without a token (default "false")
+    SIGNED_URL_TTL           Minimum lifetime of signed image URLs in seconds (default 600)
+    PASSWORD_HASH_METHOD     werkzeug method, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000"
+                             (default "scrypt")
+    PASSWORD_HASH_CONCURRENCY  Concurrent hash computations per worker (default 2)
+"""
+
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from itsdangerous import BadData, Signer, URLSafeTimedSerializer
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+MAX_PENDING_REHASHES = 16
+MIN_SECRET_LENGTH = 32
+# Values that have shipped in .env.example; anyone could sign tokens with them
+PLACEHOLDER_SECRETS = {'change-me-to-a-long-random-string'}
+
+
+class PasswordHasher:
+    def __init__(self, method='scrypt', concurrency=2):
+        self.method = method
+        # werkzeug expands defaults ("scrypt" -> "scrypt:32768:8:1"); stored hashes carry the expanded form
+        self.method_id = generate_password_hash('', method=method).split('$', 1)[0]
+        self._slots = threading.BoundedSemaphore(max(1, concurrency))
+        # Rehashes are optional work; they never take a slot from a waiting login
+        self._rehasher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='password-rehash')
+        self._lock = threading.Lock()
+        self._pending_rehashes = 0
+        self.rehashed = 0
+        self.rehash_skipped = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            method=os.getenv('PASSWORD_HASH_METHOD', 'scrypt'),
+            concurrency=int(os.getenv('PASSWORD_HASH_CONCURRENCY', '2')),
+        )
+
+    @contextmanager
+    def _slot(self):
+        started = time.time()
+        with self._slots:
+            waited = time.time() - started
+            if waited > 0.5:
+                print(f"[AUTH][QUEUE] Waited {waited:.2f}s for a password hashing slot")
+            yield
+
+    def hash(self, password):
+        """Hash ``password`` on the calling thread, within the concurrency limit"""
+        with self._slot():
+            return generate_password_hash(password, self.method)
+
+    def verify(self, stored_hash, password):
+        """Check ``password`` on the calling thread, within the concurrency limit"""
+        with self._slot():
+            return check_password_hash(stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        return stored_hash.split('$', 1)[0] != self.method_id
+
+    def rehash_later(self, password, save):
+        """
+        Hash ``password`` with the current method in the background and pass it to ``save``.
+
+        Skipped (returns False) while earlier rehashes are still queued; the
+        hash is then upgraded on a later login.
+        """
+        with self._lock:
+            if self._pending_rehashes >= MAX_PENDING_REHASHES:
+                self.rehash_skipped += 1
+                return False
+            self._pending_rehashes += 1
+
+        def rehash():
+            try:
+                save(generate_password_hash(password, self.method))
+                with self._lock:
+                    self.rehashed += 1
+            except Exception as e:
+                print(f"[AUTH][WARNING] Password rehash failed: {e}")
+            finally:
+                with self._lock:
+                    self._pending_rehashes -= 1
+
+        self._rehasher.submit(rehash)
+        return True
+
+
+class SessionTokens:
+    def __init__(self, secret, ttl=604800, required=False, url_ttl=600):
+        self.ttl = ttl
+        self.required = required
+        self.url_ttl = max(1, url_ttl)
+        self._serializer = URLSafeTimedSerializer(secret, salt='session-token')
+        self._url_signer = Signer(secret, salt='signed-url')
+
+    @classmethod
+    def from_env(cls):
+        secret = os.getenv('SESSION_TOKEN_SECRET', '').strip()
+        if not secret:
+            print("[AUTH][WARNING] SESSION_TOKEN_SECRET not set; using a per-process key")
+            secret = secrets.token_hex(32)
+        elif secret in PLACEHOLDER_SECRETS or len(secret) < MIN_SECRET_LENGTH:
+            print(f"[AUTH][WARNING] SESSION_TOKEN_SECRET is a placeholder or shorter than "
+                  f"{MIN_SECRET_LENGTH} characters; ignoring it and using a per-process key")
+            secret = secrets.token_hex(32)
+        return cls(
+            secret,
+            ttl=int(os.getenv('SESSION_TOKEN_TTL', '604800')),
+            required=os.getenv('SESSION_TOKEN_REQUIRED', 'false').lower() == 'true',
+            url_ttl=int(os.getenv('SIGNED_URL_TTL', '600')),
+        )
+
+    def issue(self, user_id):
+        """Return (token, expires_at) for ``user_id``"""
+        return self._serializer.dumps({'uid': str(user_id)}), int(time.time()) + self.ttl
+
+    def verify(self, token):
+        """The token's claims (with 'uid' and 'expires_at'), or None if forged or expired"""
+        try:
+            claims, issued_at = self._serializer.loads(token, max_age=self.ttl, return_timestamp=True)
+        except BadData:
+            return None
+        claims['expires_at'] = int(issued_at.timestamp()) + self.ttl
+        return claims
+
+    def sign_path(self, path):
+        """Query parameters ({'expires', 'sig'}) that authorize GET ``path`` for a short time"""
+        # Rounded up to the next window so one image keeps one URL (and browser cache
+        # entry) for a while; valid for between url_ttl and 2 * url_ttl seconds
+        expires = (int(time.time()) // self.url_ttl + 2) * self.url_ttl
+        signature = self._url_signer.get_signature(f"{path}|{expires}").decode('ascii')
+        return {'expires': expires, 'sig': signature}
+
+    def verify_path(self, path, expires, signature):
+        if not expires or not expires.isdigit() or int(expires) < time.time() or not signature:
+            return False
+        return self._url_signer.verify_signature(f"{path}|{expires}", signature)
+
+
+password_hasher = PasswordHasher.from_env()
+session_tokens = SessionTokens.from_env()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the per-query client overhead of Custom Search calls.
+
+Compares the previous approach (googleapiclient.discovery.build per query,
+then cse().list().execute()) with custom_search.CustomSearchClient reused
+across queries. The network is stubbed out on both sides with the same
+canned response, so the numbers are pure client-side cost; the connection
+reuse of the pooled session saves a TCP + TLS handshake per query on top of
+this in production.
+
+Usage:
+    python bench_custom_search.py [queries]
+"""
+
+import json
+import sys
+import time
+
+import requests
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpMock
+from requests.adapters import BaseAdapter
+
+from custom_search import CustomSearchClient
+from http_sessions import http_sessions
+
+CANNED = json.dumps({'items': [
+    {'title': f'White T-Shirt {i}', 'link': f'https://example.com/{i}.jpg', 'displayLink': 'example.com',
+     'snippet': 'Cotton tee', 'image': {'contextLink': f'https://example.com/p/{i}'}}
+    for i in range(10)
+]}).encode('utf-8')
+
+PARAMS = {
+    'q': 'white t-shirt clothing fashion',
+    'cx': 'bench-cse-id',
+    'searchType': 'image',
+    'num': 10,
+    'imgType': 'photo',
+    'imgSize': 'LARGE',
+    'safe': 'active',
+    'fields': 'items(title,link,image,displayLink,snippet)',
+}
+
+
+class CannedAdapter(BaseAdapter):
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = CANNED
+        response.headers['Content-Type'] = 'application/json'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def legacy_query():
+    service = build("customsearch", "v1", developerKey='bench-key',
+                    http=HttpMock(headers={'status': '200'}), static_discovery=True)
+    request = service.cse().list(**PARAMS)
+    request.http.data = CANNED
+    return request.execute()
+
+
+def pooled_query(client):
+    return client.list(**PARAMS)
+
+
+def measure(func, queries):
+    func()  # warm-up (imports, first session creation)
+    started = time.perf_counter()
+    for _ in range(queries):
+        result = func()
+    elapsed = time.perf_counter() - started
+    assert len(result['items']) == 10
+    return elapsed / queries
+
+
+def main():
+    queries = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    http_sessions.get('custom-search').mount('https://', CannedAdapter())
+    client = CustomSearchClient('bench-key')
+
+    legacy = measure(legacy_query, queries)
+    pooled = measure(lambda: pooled_query(client), queries)
+    print(f"{'client':>28} {'per query ms':>13}")
+    print(f"{'build() per query':>28} {legacy * 1000:>13.3f}")
+    print(f"{'CustomSearchClient (shared)':>28} {pooled * 1000:>13.3f}")
+    print(f"{'speedup':>28} {legacy / pooled:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the remove-person-bg transparency post-processor.
+
+Compares the previous inline implementation (several full-size masks plus a
+float64 np.sqrt over the whole frame) with image_postprocess.make_background_transparent
+on synthetic 1024px and 2048px frames, reporting wall time and peak memory.
+
+Usage:
+    python bench_transparency.py [repeats]
+"""
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from image_postprocess import make_background_transparent
+
+
+def legacy_postprocess(data):
+    """The masking/fade block formerly duplicated in remove_person_bg"""
+    r, g, b = data[:, :, 0], data[:, :, 1], data[:, :, 2]
+    white_mask = (r > 240) & (g > 240) & (b > 240)
+    gray_mask = (r > 200) & (r < 240) & (g > 200) & (g < 240) & (b > 200) & (b < 240)
+    near_white_mask = (r > 235) & (g > 235) & (b > 235)
+    background_mask = white_mask | gray_mask | near_white_mask
+    data[background_mask, 3] = 0
+    if np.any(background_mask):
+        bg_pixels = data[background_mask]
+        if len(bg_pixels) > 100:
+            avg_r = float(np.mean(bg_pixels[:, 0]))
+            avg_g = float(np.mean(bg_pixels[:, 1]))
+            avg_b = float(np.mean(bg_pixels[:, 2]))
+            color_diff = np.sqrt(
+                (r.astype(float) - avg_r) ** 2 +
+                (g.astype(float) - avg_g) ** 2 +
+                (b.astype(float) - avg_b) ** 2
+            )
+            data[color_diff < 40, 3] = 0
+            edge_mask = (color_diff >= 40) & (color_diff < 80)
+            if np.any(edge_mask):
+                alpha_fade = ((color_diff[edge_mask] - 40) / 40 * 255).astype(np.uint8)
+                data[edge_mask, 3] = np.minimum(data[edge_mask, 3], alpha_fade)
+    return int(np.sum(data[:, :, 3] == 0))
+
+
+def synthetic_frame(size, seed=0):
+    """Checkerboard 'fake transparency' background with a noisy figure in the middle"""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size, 0:size]
+    checker = np.where(((yy // 16) + (xx // 16)) % 2 == 0, 255, 222).astype(np.uint8)
+    data = np.empty((size, size, 4), dtype=np.uint8)
+    data[..., :3] = checker[..., None]
+    data[..., 3] = 255
+    figure = ((yy - size / 2) / (size * 0.22)) ** 2 + ((xx - size / 2) / (size * 0.12)) ** 2 < 1
+    data[figure, :3] = rng.integers(20, 200, size=(int(figure.sum()), 3), dtype=np.uint8)
+    return data
+
+
+def measure(func, frame, repeats):
+    timings = []
+    peak = 0
+    for _ in range(repeats):
+        data = frame.copy()
+        tracemalloc.start()
+        started = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return min(timings), peak, data
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'frame':>7} {'impl':>8} {'best ms':>9} {'peak MB':>9} {'alpha diff':>11}")
+    for size in (1024, 2048):
+        frame = synthetic_frame(size)
+        legacy_time, legacy_peak, legacy_out = measure(legacy_postprocess, frame, repeats)
+        new_time, new_peak, new_out = measure(make_background_transparent, frame, repeats)
+        # Fraction of pixels whose alpha differs by more than 8 levels
+        diff = np.mean(np.abs(legacy_out[..., 3].astype(np.int16) - new_out[..., 3]) > 8) * 100
+        print(f"{size:>6}px {'legacy':>8} {legacy_time * 1000:>9.1f} {legacy_peak / 2**20:>9.1f}")
+        print(f"{size:>6}px {'single':>8} {new_time * 1000:>9.1f} {new_peak / 2**20:>9.1f} {diff:>10.2f}%")
+
+
+if __name__ == "__main__":
+    main()
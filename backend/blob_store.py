@@ -0,0 +1,112 @@
+"""
+Content-addressed filesystem store for avatar and wardrobe images.
+
+Each blob is written once to <root>/<aa>/<bb>/<sha256>, where aa/bb are the
+first two byte pairs of the hash. Database rows keep only the hash, size and
+mime type, and the files are served straight from disk with send_file (which
+lets the WSGI server use sendfile).
+
+Blobs are shared by every row with the same content, so replacing or removing
+an item never deletes its file directly. Unreferenced blobs are removed by
+`python gc_blobs.py` (run it from cron). It only deletes files older than a
+grace period, and put() refreshes the mtime of content it reuses, so a blob
+written just before its row is saved is never collected.
+
+Configuration (environment variables):
+    BLOB_STORE_DIR    Root directory (default ./blobs next to this file)
+"""
+
+import hashlib
+import os
+import threading
+
+HASH_PATTERN_LENGTH = 64
+
+
+def sniff_image_mime(data, default='application/octet-stream'):
+    """Detect the image type from magic bytes"""
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    return default
+
+
+IMAGE_EXTENSIONS = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/webp': 'webp',
+    'image/gif': 'gif',
+}
+
+
+def image_extension(mime, default='png'):
+    """File extension (without the dot) for an image mime type"""
+    return IMAGE_EXTENSIONS.get(mime, default)
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = root
+
+    @classmethod
+    def from_env(cls):
+        default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blobs')
+        return cls(os.getenv('BLOB_STORE_DIR', default_dir))
+
+    @staticmethod
+    def is_valid_hash(sha256):
+        return (isinstance(sha256, str) and len(sha256) == HASH_PATTERN_LENGTH
+                and all(c in '0123456789abcdef' for c in sha256))
+
+    def path(self, sha256):
+        if not self.is_valid_hash(sha256):
+            raise ValueError(f"Invalid blob hash: {sha256!r}")
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def exists(self, sha256):
+        return os.path.isfile(self.path(sha256))
+
+    def put(self, data):
+        """Store ``data`` and return (sha256, size); identical content is stored once"""
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.path(sha256)
+        if os.path.isfile(path):
+            # Mark as recently used so a concurrent gc_blobs run keeps it
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        return sha256, len(data)
+
+    def read(self, sha256):
+        with open(self.path(sha256), 'rb') as f:
+            return f.read()
+
+    def iter_blobs(self):
+        """Yield (sha256, size, mtime) for every stored blob"""
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if not self.is_valid_hash(filename):
+                    continue
+                stat = os.stat(os.path.join(dirpath, filename))
+                yield filename, stat.st_size, stat.st_mtime
+
+    def delete(self, sha256):
+        try:
+            os.remove(self.path(sha256))
+            return True
+        except FileNotFoundError:
+            return False
+
+
+blob_store = BlobStore.from_env()
@@ -0,0 +1,37 @@
+-- Move avatar / wardrobe images out of LONGBLOB columns into the blob store.
+-- 1. Run this script to add the reference columns.
+-- 2. Run `python migrate_blobs.py` to copy existing blobs to BLOB_STORE_DIR
+--    and clear the LONGBLOB columns.
+--
+-- Safe to re-run, and safe on fresh installs where wardrobe_setup.sql already
+-- created the wardrobe columns: each column is only added when
+-- information_schema says it is missing (MySQL has no ADD COLUMN IF NOT EXISTS).
+
+DROP PROCEDURE IF EXISTS add_column_if_missing;
+
+DELIMITER //
+CREATE PROCEDURE add_column_if_missing(IN table_name_in VARCHAR(64), IN column_name_in VARCHAR(64),
+                                       IN column_definition VARCHAR(255))
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = table_name_in AND COLUMN_NAME = column_name_in
+    ) THEN
+        SET @add_column_sql = CONCAT('ALTER TABLE ', table_name_in, ' ADD COLUMN ', column_name_in, ' ', column_definition);
+        PREPARE add_column_stmt FROM @add_column_sql;
+        EXECUTE add_column_stmt;
+        DEALLOCATE PREPARE add_column_stmt;
+    END IF;
+END //
+DELIMITER ;
+
+CALL add_column_if_missing('users', 'avatar_sha256', 'CHAR(64) NULL');
+CALL add_column_if_missing('users', 'avatar_size', 'INT UNSIGNED NULL');
+CALL add_column_if_missing('users', 'avatar_mime', 'VARCHAR(64) NULL');
+
+ALTER TABLE wardrobe MODIFY garment_image LONGBLOB NULL;
+CALL add_column_if_missing('wardrobe', 'image_sha256', 'CHAR(64) NULL AFTER garment_image');
+CALL add_column_if_missing('wardrobe', 'image_size', 'INT UNSIGNED NULL AFTER image_sha256');
+CALL add_column_if_missing('wardrobe', 'image_mime', 'VARCHAR(64) NULL AFTER image_size');
+
+DROP PROCEDURE add_column_if_missing;
@@ -0,0 +1,197 @@
+"""
+Semantic response cache for the /api/chat assistant.
+
+Chat messages are often near-paraphrases of each other ("black nike running
+shoes men" / "men's black Nike runners"), and each one used to cost a full
+Gemini call. Messages are normalized (accent folding, possessives, plurals,
+filler words, a small fashion synonym table) and embedded locally as a
+hashed bag of words and character trigrams, so lookups need no model or
+network call. Embeddings live in a fixed-size numpy matrix; a lookup is one
+matrix-vector product over all cached messages.
+
+A cached answer is reused when the cosine similarity reaches
+CHAT_CACHE_THRESHOLD and the messages agree exactly on brand, colours,
+gender, size words and numbers (sizes, prices, model numbers). Those change
+the right answer while barely moving the similarity.
+
+Configuration (environment variables):
+    CHAT_CACHE_ENABLED      "false" to disable (default "true")
+    CHAT_CACHE_THRESHOLD    Minimum cosine similarity for a hit (default 0.9)
+    CHAT_CACHE_TTL          Seconds an answer is reused (default 3600)
+    CHAT_CACHE_MAX_ENTRIES  Cached messages per worker (default 1000)
+"""
+
+import os
+import re
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+import numpy as np
+
+from search_classifier import fold_text, search_classifier
+
+EMBEDDING_DIM = 1024
+TOKEN_WEIGHT = 1.0
+TRIGRAM_WEIGHT = 0.4
+
+FILLER_WORDS = {
+    'a', 'an', 'the', 'and', 'or', 'for', 'of', 'in', 'on', 'with', 'to', 'by', 'from',
+    'i', 'me', 'my', 'im', 'want', 'need', 'looking', 'look', 'find', 'show', 'get', 'buy',
+    'some', 'any', 'please', 'can', 'you', 'could', 'would', 'like', 'recommend', 'suggest',
+    'pair', 'pairs', 'good', 'best', 'nice', 'new',
+}
+SYNONYMS = {
+    'mens': 'men', 'man': 'men', 'male': 'men', 'guy': 'men', 'guys': 'men',
+    'womens': 'women', 'woman': 'women', 'female': 'women', 'ladies': 'women', 'lady': 'women',
+    'runner': 'running shoe', 'sneaker': 'shoe', 'trainer': 'shoe', 'footwear': 'shoe',
+    'tee': 't shirt', 'tshirt': 't shirt', 'jean': 'jeans', 'denim': 'jeans',
+    'hoody': 'hoodie', 'sweatshirt': 'hoodie', 'pant': 'trousers', 'pants': 'trousers',
+    'grey': 'gray', 'navy': 'blue',
+    'child': 'kid', 'children': 'kid',
+}
+COLOURS = {
+    'black', 'white', 'gray', 'blue', 'red', 'green', 'yellow', 'orange', 'pink', 'purple',
+    'brown', 'beige', 'cream', 'khaki', 'olive', 'maroon', 'burgundy', 'gold', 'silver', 'tan',
+}
+
+GENDERS = {'men', 'women', 'kid', 'boy', 'girl', 'unisex'}
+SIZES = {
+    'xxs', 'xs', 's', 'm', 'l', 'xl', 'xxl', 'xxxl', '2xl', '3xl', '4xl',
+    'small', 'medium', 'large', 'extra', 'petite', 'plus', 'tall', 'regular',
+}
+
+ChatCacheHit = namedtuple('ChatCacheHit', 'response similarity message')
+
+
+def _singular(token):
+    if len(token) <= 3 or not token.endswith('s') or token.endswith(('ss', 'us', 'as', 'is', 'jeans')):
+        return token
+    if token.endswith(('sses', 'shes', 'ches', 'xes')):
+        return token[:-2]
+    if token.endswith('ies') and len(token) > 4:
+        return token[:-3] + 'y'
+    return token[:-1]
+
+
+def normalize_message(message):
+    """Sorted, de-duplicated content tokens of a chat message"""
+    text = re.sub(r"'s\b", '', fold_text(message))
+    tokens = set()
+    for raw in re.findall(r'[a-z0-9]+', text):
+        if raw in FILLER_WORDS:
+            continue
+        token = SYNONYMS.get(raw) or SYNONYMS.get(_singular(raw)) or _singular(raw)
+        tokens.update(token.split())
+    return tuple(sorted(tokens))
+
+
+def _bucket(feature):
+    return zlib.crc32(feature.encode('utf-8')) % EMBEDDING_DIM
+
+
+def embed_tokens(tokens):
+    """L2-normalized hashed embedding of word and character-trigram features"""
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token in tokens:
+        vector[_bucket('w:' + token)] += TOKEN_WEIGHT
+        padded = f"#{token}#"
+        for i in range(len(padded) - 2):
+            vector[_bucket('c:' + padded[i:i + 3])] += TRIGRAM_WEIGHT
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _guard(message, tokens):
+    """Attributes that must match exactly for two messages to share an answer"""
+    brand = search_classifier.detect_brand(message)
+    return (
+        brand.name if brand else None,
+        frozenset(t for t in tokens if t in COLOURS),
+        frozenset(t for t in tokens if t in GENDERS),
+        frozenset(t for t in tokens if t in SIZES),
+        frozenset(t for t in tokens if any(c.isdigit() for c in t)),
+    )
+
+
+class SemanticChatCache:
+    def __init__(self, threshold=0.9, ttl=3600, max_entries=1000):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._vectors = np.zeros((self.max_entries, EMBEDDING_DIM), dtype=np.float32)
+        self._stored_at = np.zeros(self.max_entries, dtype=np.float64)  # 0 marks a free slot
+        self._last_used = np.zeros(self.max_entries, dtype=np.float64)
+        self._entries = [None] * self.max_entries  # (tokens, guard, message, response)
+        self._slot_by_tokens = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        if os.getenv('CHAT_CACHE_ENABLED', 'true').lower() == 'false':
+            return None
+        return cls(
+            threshold=float(os.getenv('CHAT_CACHE_THRESHOLD', '0.9')),
+            ttl=int(os.getenv('CHAT_CACHE_TTL', '3600')),
+            max_entries=int(os.getenv('CHAT_CACHE_MAX_ENTRIES', '1000')),
+        )
+
+    def lookup(self, message):
+        """ChatCacheHit for the closest cached message, or None"""
+        tokens = normalize_message(message)
+        if not tokens:
+            return None
+        vector = embed_tokens(tokens)
+        guard = _guard(message, tokens)
+        now = time.time()
+        with self._lock:
+            live = self._stored_at > now - self.ttl
+            if live.any():
+                similarities = np.where(live, self._vectors @ vector, -1.0)
+                # Walk candidates best-first; the guard may reject the closest one
+                for slot in np.argsort(similarities)[::-1][:5]:
+                    similarity = float(similarities[slot])
+                    if similarity < self.threshold:
+                        break
+                    entry = self._entries[slot]
+                    if entry[1] == guard:
+                        self._last_used[slot] = now
+                        self.hits += 1
+                        return ChatCacheHit(entry[3], round(similarity, 3), entry[2])
+            self.misses += 1
+        return None
+
+    def store(self, message, response):
+        tokens = normalize_message(message)
+        if not tokens:
+            return
+        vector = embed_tokens(tokens)
+        guard = _guard(message, tokens)
+        now = time.time()
+        with self._lock:
+            slot = self._slot_by_tokens.get(tokens)
+            if slot is None:
+                free = np.flatnonzero(self._stored_at <= now - self.ttl)
+                # Expired or never used slots first, otherwise the least recently used
+                slot = int(free[0]) if len(free) else int(np.argmin(self._last_used))
+                if self._entries[slot]:
+                    self._slot_by_tokens.pop(self._entries[slot][0], None)
+                self._slot_by_tokens[tokens] = slot
+            self._vectors[slot] = vector
+            self._stored_at[slot] = now
+            self._last_used[slot] = now
+            self._entries[slot] = (tokens, guard, message, response)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': int((self._stored_at > time.time() - self.ttl).sum()),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+chat_cache = SemanticChatCache.from_env()
@@ -0,0 +1,41 @@
+"""
+Thin client for the Google Custom Search JSON API.
+
+Replaces googleapiclient.discovery.build("customsearch", "v1") per query:
+building a discovery service parses the discovery document and constructs a
+resource tree every time, and its httplib2 transport cannot be shared across
+request threads. This client is created once per worker and sends plain GETs
+through the pooled 'custom-search' session from http_sessions, so queries
+reuse kept-alive TLS connections to customsearch.googleapis.com.
+
+Only cse.list is needed by the app; parameters are passed through unchanged.
+"""
+
+from http_sessions import http_sessions
+
+CUSTOM_SEARCH_URL = 'https://customsearch.googleapis.com/customsearch/v1'
+
+
+class CustomSearchError(Exception):
+    def __init__(self, status_code, message):
+        super().__init__(f"Custom Search API error {status_code}: {message}")
+        self.status_code = status_code
+
+
+class CustomSearchClient:
+    def __init__(self, api_key, url=CUSTOM_SEARCH_URL, session_name='custom-search'):
+        self.api_key = api_key
+        self.url = url
+        self.session_name = session_name
+
+    def list(self, **params):
+        """Equivalent of service.cse().list(**params).execute(); returns the decoded JSON"""
+        params['key'] = self.api_key
+        response = http_sessions.get(self.session_name).get(self.url, params=params)
+        if response.status_code != 200:
+            try:
+                message = response.json()['error']['message']
+            except (ValueError, KeyError, TypeError):
+                message = response.text[:200]
+            raise CustomSearchError(response.status_code, message)
+        return response.json()
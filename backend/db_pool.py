@@ -0,0 +1,179 @@
+"""
+Process-wide MySQL connection pool.
+
+Routes check a connection out with db_pool.get_connection() and hand it back
+when it is closed, exactly like a plain mysql.connector connection, so the
+TCP + auth handshake is paid once per pooled connection instead of once per
+request. Use it as a context manager so every return and exception path
+gives the connection back:
+
+    with db_pool.get_connection() as connection:
+        cursor = connection.cursor()
+        ...
+
+Configuration (environment variables):
+    MYSQL_HOST / MYSQL_PORT / MYSQL_USER / MYSQL_PASSWORD / MYSQL_DATABASE
+    MYSQL_POOL_SIZE            Max open connections per worker (default 10)
+    MYSQL_POOL_TIMEOUT         Seconds to wait for a free connection (default 10)
+    MYSQL_POOL_MAX_LIFETIME    Recycle connections older than this, in seconds (default 1800)
+    MYSQL_POOL_PING_INTERVAL   Ping connections idle longer than this on checkout (default 10)
+"""
+
+import os
+import threading
+import time
+
+import mysql.connector
+from mysql.connector.errors import PoolError
+
+
+def _config_from_env():
+    return {
+        'host': os.getenv('MYSQL_HOST', 'localhost'),
+        'port': int(os.getenv('MYSQL_PORT', '3306')),
+        'user': os.getenv('MYSQL_USER', 'root'),
+        'password': os.getenv('MYSQL_PASSWORD', 'root'),
+        'database': os.getenv('MYSQL_DATABASE', 'hello_db'),
+        'charset': 'utf8mb4',
+        'collation': 'utf8mb4_unicode_ci',
+        'autocommit': True
+    }
+
+
+class _PoolEntry:
+    __slots__ = ('raw', 'created_at', 'last_used')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.time()
+        self.last_used = self.created_at
+
+
+class PooledConnection:
+    """
+    One checkout of a pooled connection; close() returns it to the pool.
+
+    A fresh proxy is handed out per checkout so a leaked proxy can be
+    reclaimed by garbage collection without affecting later borrowers.
+    """
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        return getattr(self._entry.raw, name)
+
+    def close(self):
+        entry, self._entry = self.__dict__.get('_entry'), None
+        if entry is not None:
+            self._pool._release(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        # Last resort for code that neither closes nor uses ``with``; logged so it gets fixed
+        try:
+            if self.__dict__.get('_entry') is not None:
+                print("[DB-POOL][WARNING] Connection was not closed; returning it to the pool")
+                self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    def __init__(self, config, size=10, timeout=10, max_lifetime=1800, ping_interval=10):
+        self.config = config
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+        self._idle = []
+        self._open = 0
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            _config_from_env(),
+            size=int(os.getenv('MYSQL_POOL_SIZE', '10')),
+            timeout=float(os.getenv('MYSQL_POOL_TIMEOUT', '10')),
+            max_lifetime=float(os.getenv('MYSQL_POOL_MAX_LIFETIME', '1800')),
+            ping_interval=float(os.getenv('MYSQL_POOL_PING_INTERVAL', '10')),
+        )
+
+    def _discard(self, entry):
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def _usable(self, entry):
+        """Validate an idle connection before handing it out"""
+        now = time.time()
+        if self.max_lifetime and now - entry.created_at > self.max_lifetime:
+            return False
+        if now - entry.last_used > self.ping_interval:
+            try:
+                entry.raw.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def get_connection(self):
+        deadline = time.time() + self.timeout
+        while True:
+            entry = None
+            with self._cond:
+                while not self._idle and self._open >= self.size:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise PoolError(f"MySQL pool exhausted ({self.size} connections in use)")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    self._open += 1
+
+            if entry is None:
+                try:
+                    entry = _PoolEntry(mysql.connector.connect(**self.config))
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._usable(entry):
+                self._discard(entry)
+                continue
+
+            return PooledConnection(self, entry)
+
+    def _release(self, entry):
+        try:
+            # Leave the session clean for the next borrower
+            if entry.raw.unread_result:
+                entry.raw.consume_results()
+            if entry.raw.in_transaction:
+                entry.raw.rollback()
+        except Exception:
+            self._discard(entry)
+            return
+        entry.last_used = time.time()
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {'size': self.size, 'open': self._open, 'idle': len(self._idle)}
+
+
+db_pool = ConnectionPool.from_env()
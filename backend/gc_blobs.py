@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Delete blob store files that no avatar or wardrobe row references any more.
+
+Avatars and wardrobe images share content-addressed blobs, so routes that
+replace or remove an image leave the file behind. This tool collects every
+hash still referenced by users.avatar_sha256 and wardrobe.image_sha256, then
+removes unreferenced blobs older than --min-age. The age check covers blobs
+written just before their row is saved (BlobStore.put refreshes the mtime of
+reused content). Safe to run while the app is serving; schedule it from cron,
+e.g. nightly.
+
+Usage:
+    python gc_blobs.py [--dry-run] [--min-age SECONDS]
+"""
+
+import argparse
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from blob_store import blob_store
+from db_pool import db_pool
+
+REFERENCES = {
+    'users': 'avatar_sha256',
+    'wardrobe': 'image_sha256',
+}
+
+
+def referenced_hashes():
+    with db_pool.get_connection() as connection:
+        cursor = connection.cursor()
+        hashes = set()
+        for table, column in REFERENCES.items():
+            cursor.execute(f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL")
+            hashes.update(row[0] for row in cursor.fetchall())
+        cursor.close()
+    return hashes
+
+
+def collect(dry_run=False, min_age=3600):
+    # Read the references first: anything stored after this point is newer than min_age
+    referenced = referenced_hashes()
+    cutoff = time.time() - min_age
+    print(f"[GC-BLOBS] {len(referenced)} referenced blob(s)")
+
+    deleted = 0
+    freed = 0
+    kept_recent = 0
+    for sha256, size, mtime in blob_store.iter_blobs():
+        if sha256 in referenced:
+            continue
+        if mtime > cutoff:
+            kept_recent += 1
+            continue
+        if dry_run:
+            print(f"   would delete {sha256[:12]} ({size} bytes)")
+        elif not blob_store.delete(sha256):
+            continue
+        deleted += 1
+        freed += size
+
+    action = "Would delete" if dry_run else "Deleted"
+    print(f"[GC-BLOBS] {action} {deleted} blob(s), {freed} bytes; "
+          f"{kept_recent} unreferenced blob(s) younger than {min_age}s kept")
+    return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dry-run', action='store_true', help='List blobs without deleting anything')
+    parser.add_argument('--min-age', type=int, default=3600,
+                        help='Only delete unreferenced blobs older than this many seconds (default 3600)')
+    args = parser.parse_args()
+
+    print(f"[GC-BLOBS] Blob store: {blob_store.root}")
+    try:
+        collect(dry_run=args.dry_run, min_age=args.min_age)
+    except Exception as e:
+        print(f"❌ Blob collection failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Shared Gemini client manager.
+
+One genai.Client is created per worker process when this module is imported
+(worker boot) and reused by every route that talks to Gemini, so HTTP
+connections and TLS sessions to the model endpoint are pooled instead of being
+rebuilt on each request. Without an API key the client is not built and Gemini
+calls fail with "Gemini API key not configured".
+
+Configuration (environment variables):
+    GEMINI_API_KEY                 API key (required for any Gemini call)
+    GEMINI_MAX_CONNECTIONS         Max pooled connections (default 20)
+    GEMINI_MAX_KEEPALIVE           Max idle keep-alive connections (default 10)
+    GEMINI_TIMEOUT_MS              Per-request HTTP timeout in ms (default 120000)
+    GEMINI_DEFAULT_CONCURRENCY     Concurrent calls allowed per model (default 4)
+    GEMINI_MODEL_CONCURRENCY       Per-model overrides, e.g.
+                                   "gemini-2.5-flash-image=2,gemini-2.0-flash-exp=8"
+    GEMINI_WARMUP                  "true" to warm the connection on boot
+    GEMINI_WARMUP_MODEL            Model used for the warm-up call
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+from google import genai
+from google.genai import types
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _parse_model_limits(raw):
+    """Parse "model=N,model2=M" into a dict of model -> limit"""
+    limits = {}
+    for entry in (raw or '').split(','):
+        if '=' not in entry:
+            continue
+        model, _, value = entry.partition('=')
+        try:
+            limits[model.strip()] = max(1, int(value))
+        except ValueError:
+            print(f"[GEMINI-CLIENT][WARNING] Ignoring invalid concurrency entry: {entry}")
+    return limits
+
+
+class GeminiClientManager:
+    """Process-wide owner of the Gemini client and per-model concurrency slots"""
+
+    def __init__(self, api_key, max_connections=20, max_keepalive=10, timeout_ms=120000,
+                 default_concurrency=4, model_concurrency=None):
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.timeout_ms = timeout_ms
+        self.default_concurrency = max(1, default_concurrency)
+        self.model_concurrency = dict(model_concurrency or {})
+        self._client = None
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            api_key=os.getenv('GEMINI_API_KEY'),
+            max_connections=_env_int('GEMINI_MAX_CONNECTIONS', 20),
+            max_keepalive=_env_int('GEMINI_MAX_KEEPALIVE', 10),
+            timeout_ms=_env_int('GEMINI_TIMEOUT_MS', 120000),
+            default_concurrency=_env_int('GEMINI_DEFAULT_CONCURRENCY', 4),
+            model_concurrency=_parse_model_limits(os.getenv('GEMINI_MODEL_CONCURRENCY')),
+        )
+
+    @property
+    def configured(self):
+        return bool(self.api_key)
+
+    def get_client(self):
+        """Return the shared client, creating it if boot did not"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    if not self.api_key:
+                        raise RuntimeError("Gemini API key not configured")
+                    limits = httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_keepalive,
+                    )
+                    self._client = genai.Client(
+                        api_key=self.api_key,
+                        http_options=types.HttpOptions(
+                            timeout=self.timeout_ms,
+                            client_args={'limits': limits},
+                        ),
+                    )
+                    print(f"[GEMINI-CLIENT][INIT] Shared client created "
+                          f"(max_connections={self.max_connections}, keepalive={self.max_keepalive})")
+        return self._client
+
+    def _semaphore(self, model):
+        sem = self._semaphores.get(model)
+        if sem is None:
+            with self._lock:
+                sem = self._semaphores.get(model)
+                if sem is None:
+                    limit = self.model_concurrency.get(model, self.default_concurrency)
+                    sem = threading.BoundedSemaphore(limit)
+                    self._semaphores[model] = sem
+        return sem
+
+    @contextmanager
+    def slot(self, model):
+        """Hold one of the concurrency slots configured for ``model``"""
+        sem = self._semaphore(model)
+        started = time.time()
+        sem.acquire()
+        waited = time.time() - started
+        if waited > 0.5:
+            print(f"[GEMINI-CLIENT][QUEUE] Waited {waited:.2f}s for a {model} slot")
+        try:
+            yield
+        finally:
+            sem.release()
+
+    def generate_content(self, model, contents, config=None):
+        """Call models.generate_content on the shared client within the model's slot"""
+        client = self.get_client()
+        with self.slot(model):
+            return client.models.generate_content(model=model, contents=contents, config=config)
+
+    def generate_content_stream(self, model, contents, config=None):
+        """
+        Yield response chunks from models.generate_content_stream.
+
+        The model's slot is held until the stream is exhausted or the
+        generator is closed (e.g. the HTTP client disconnected).
+        """
+        client = self.get_client()
+        with self.slot(model):
+            for chunk in client.models.generate_content_stream(model=model, contents=contents, config=config):
+                yield chunk
+
+    def warm_up(self, model=None):
+        """Open a pooled connection ahead of the first request (best effort)"""
+        if not self.configured:
+            print("[GEMINI-CLIENT][WARMUP] Skipped - API key not configured")
+            return False
+        model = model or os.getenv('GEMINI_WARMUP_MODEL', 'gemini-2.0-flash-exp')
+        try:
+            started = time.time()
+            self.get_client().models.get(model=model)
+            print(f"[GEMINI-CLIENT][WARMUP] Connected in {time.time() - started:.2f}s ({model})")
+            return True
+        except Exception as e:
+            print(f"[GEMINI-CLIENT][WARMUP] Warning: warm-up failed: {e}")
+            return False
+
+
+gemini_manager = GeminiClientManager.from_env()
+
+if gemini_manager.configured:
+    try:
+        gemini_manager.get_client()
+    except Exception as e:
+        print(f"[GEMINI-CLIENT][WARNING] Client creation at boot failed, retrying on first use: {e}")
+
+if os.getenv('GEMINI_WARMUP', 'false').lower() == 'true':
+    threading.Thread(target=gemini_manager.warm_up, name='gemini-warmup', daemon=True).start()
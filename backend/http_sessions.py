@@ -0,0 +1,110 @@
+"""
+Named, pooled requests sessions for outbound HTTP calls.
+
+Each outbound service gets one process-wide requests.Session with its own
+HTTPAdapter pool, so repeated calls reuse kept-alive TCP/TLS connections
+instead of paying a fresh handshake per request. Sessions apply a default
+(connect, read) timeout per service when the caller does not pass one.
+
+Services:
+    bg-service      api.becausefuture.tech background removal
+    mixer-service   api.becausefuture.tech try-on mixer
+    custom-search   Google Custom Search JSON API
+    image-origin    arbitrary retailer/CDN image hosts (/api/proxy-image);
+                    cookies are never stored so nothing leaks between users
+
+Configuration (environment variables):
+    HTTP_POOL_SIZE          Kept-alive connections per host (default 10)
+    HTTP_POOL_ORIGIN_HOSTS  Distinct image hosts to keep pools for (default 32)
+"""
+
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+HTTP_POOL_ORIGIN_HOSTS = int(os.getenv('HTTP_POOL_ORIGIN_HOSTS', '32'))
+
+SERVICES = {
+    'bg-service': {
+        'timeout': (5, 60),
+        'pool_hosts': 1,
+        'connect_retries': 1,
+    },
+    'mixer-service': {
+        'timeout': (5, 120),
+        'pool_hosts': 1,
+        'connect_retries': 1,
+    },
+    'custom-search': {
+        'timeout': (5, 15),
+        'pool_hosts': 1,
+        'connect_retries': 1,
+    },
+    'image-origin': {
+        'timeout': (10, 30),
+        'pool_hosts': HTTP_POOL_ORIGIN_HOSTS,
+        'connect_retries': 1,
+        'store_cookies': False,
+    },
+}
+
+
+class ServiceSession(requests.Session):
+    """requests.Session that falls back to the service's default timeout"""
+
+    def __init__(self, default_timeout):
+        super().__init__()
+        self.default_timeout = default_timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+
+def _build_session(settings):
+    session = ServiceSession(settings['timeout'])
+    # Only connection failures are retried: nothing has reached the server yet,
+    # so this is safe for uploads too
+    retries = Retry(total=None, connect=settings['connect_retries'], read=0, redirect=5,
+                    status=0, other=0, backoff_factor=0.2, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=settings['pool_hosts'], pool_maxsize=max(1, HTTP_POOL_SIZE),
+                          max_retries=retries, pool_block=False)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not settings.get('store_cookies', True):
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+class HttpSessions:
+    def __init__(self, services=SERVICES):
+        self.services = services
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """Return the shared session for ``name``, creating it on first use"""
+        session = self._sessions.get(name)
+        if session is None:
+            if name not in self.services:
+                raise KeyError(f"Unknown outbound HTTP service: {name}")
+            with self._lock:
+                session = self._sessions.get(name)
+                if session is None:
+                    session = _build_session(self.services[name])
+                    self._sessions[name] = session
+        return session
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+http_sessions = HttpSessions()
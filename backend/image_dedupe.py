@@ -0,0 +1,184 @@
+"""
+Perceptual-hash de-duplication of /api/unified-search result images.
+
+Custom Search often returns the same product photo from several retailers
+or at several sizes, which wastes result slots and makes the extension
+download the same picture twice. Each candidate gets a 64-bit difference
+hash (dHash) computed on a 9x8 grayscale thumbnail; results whose hashes
+are within IMAGE_DEDUPE_MAX_DISTANCE bits of an earlier (higher ranked)
+result are collapsed into it, keeping the larger copy when dimensions are
+known.
+
+Hashes are computed from Google's small thumbnail of the image when the API
+provided one (a few KB from a fast CDN) and from the image itself otherwise.
+They are cached by URL in an LRU, so repeat and overlapping queries hash
+nothing. Hashing shares one deadline per search; images whose hash is not
+ready in time are never collapsed.
+
+Configuration (environment variables):
+    IMAGE_DEDUPE_ENABLED        "false" to disable (default "true")
+    IMAGE_DEDUPE_MAX_DISTANCE   Hamming distance treated as the same image (default 6 of 64 bits)
+    IMAGE_DEDUPE_DEADLINE       Seconds to wait for missing hashes of one search (default 2.0)
+    IMAGE_DEDUPE_WORKERS        Concurrent thumbnail downloads per worker (default 8)
+    IMAGE_DEDUPE_CACHE_ENTRIES  Hashes kept in memory (default 5000)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from io import BytesIO
+
+from PIL import Image
+
+from http_sessions import http_sessions
+
+HASH_SIZE = 8
+MAX_HASH_SOURCE_BYTES = 5 * 1024 * 1024
+
+
+def difference_hash(img, hash_size=HASH_SIZE):
+    """64-bit dHash: one bit per horizontally adjacent pixel pair of a (hash_size+1)x hash_size thumbnail"""
+    # Let JPEG decoders skip straight to a small scale
+    img.draft('L', (hash_size * 8, hash_size * 8))
+    pixels = list(img.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR).getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(a, b):
+    return (a ^ b).bit_count()
+
+
+def hash_source(image):
+    """URL to hash for a garment image dict"""
+    return image.get('thumbnail_url') or image['image_url']
+
+
+def _area(image):
+    return (image.get('width') or 0) * (image.get('height') or 0)
+
+
+class ImageHashDeduper:
+    def __init__(self, max_distance=6, deadline=2.0, workers=8, max_entries=5000):
+        self.max_distance = max_distance
+        self.deadline = deadline
+        self.max_entries = max(1, max_entries)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='image-hash')
+        self._hashes = OrderedDict()  # url -> hash, or None when the image could not be read
+        self._pending = {}  # url -> Future of an in-flight hash
+        # Re-entrant: a future that finishes before add_done_callback runs the callback inline
+        self._lock = threading.RLock()
+        self.cache_hits = 0
+        self.computed = 0
+        self.collapsed = 0
+
+    @classmethod
+    def from_env(cls):
+        if os.getenv('IMAGE_DEDUPE_ENABLED', 'true').lower() == 'false':
+            return None
+        return cls(
+            max_distance=int(os.getenv('IMAGE_DEDUPE_MAX_DISTANCE', '6')),
+            deadline=float(os.getenv('IMAGE_DEDUPE_DEADLINE', '2.0')),
+            workers=int(os.getenv('IMAGE_DEDUPE_WORKERS', '8')),
+            max_entries=int(os.getenv('IMAGE_DEDUPE_CACHE_ENTRIES', '5000')),
+        )
+
+    def compute_hash(self, url):
+        """Download ``url`` and return its dHash, or None if it is not a readable image"""
+        try:
+            response = http_sessions.get('image-origin').get(url, stream=True, timeout=(self.deadline, self.deadline))
+            try:
+                if response.status_code != 200:
+                    return None
+                data = b''
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    data += chunk
+                    if len(data) > MAX_HASH_SOURCE_BYTES:
+                        return None
+            finally:
+                response.close()
+            with Image.open(BytesIO(data)) as img:
+                return difference_hash(img)
+        except Exception as e:
+            print(f"🧬 Could not hash {url}: {e}")
+            return None
+
+    def _store(self, url, future):
+        value = None if future.cancelled() or future.exception() else future.result()
+        with self._lock:
+            self._pending.pop(url, None)
+            self._hashes[url] = value
+            self._hashes.move_to_end(url)
+            while len(self._hashes) > self.max_entries:
+                self._hashes.popitem(last=False)
+            self.computed += 1
+
+    def hash_async(self, url):
+        """Future for the hash of ``url``; already resolved when it is cached"""
+        with self._lock:
+            if url in self._hashes:
+                self._hashes.move_to_end(url)
+                self.cache_hits += 1
+                future = Future()
+                future.set_result(self._hashes[url])
+                return future
+            future = self._pending.get(url)
+            if future is None:
+                future = self._pending[url] = self._executor.submit(self.compute_hash, url)
+                future.add_done_callback(lambda done, url=url: self._store(url, done))
+            return future
+
+    def prefetch(self, images):
+        """Start hashing ``images`` in the background (e.g. while they are being probed)"""
+        for image in images:
+            self.hash_async(hash_source(image))
+
+    def dedupe(self, images):
+        """Return ``images`` with near-duplicates collapsed into the first (highest ranked) copy"""
+        if len(images) < 2:
+            return images
+        futures = [self.hash_async(hash_source(image)) for image in images]
+        wait(futures, timeout=self.deadline)
+
+        kept = []  # [image, hash]
+        collapsed = 0
+        for image, future in zip(images, futures):
+            image_hash = future.result() if future.done() and not future.cancelled() else None
+            duplicate_of = None
+            if image_hash is not None:
+                for slot in kept:
+                    if slot[1] is not None and hamming_distance(slot[1], image_hash) <= self.max_distance:
+                        duplicate_of = slot
+                        break
+            if duplicate_of is None:
+                kept.append([image, image_hash])
+                continue
+            collapsed += 1
+            print(f"🧬 Collapsing duplicate of {duplicate_of[0]['image_url']}: {image['image_url']}")
+            # Same picture at a higher resolution takes over the slot
+            if _area(image) > _area(duplicate_of[0]):
+                image['id'] = duplicate_of[0]['id']
+                duplicate_of[0] = image
+
+        with self._lock:
+            self.collapsed += collapsed
+        if collapsed:
+            print(f"🧬 Collapsed {collapsed} near-duplicate images, {len(kept)} left")
+        return [image for image, _ in kept]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cached_hashes': len(self._hashes),
+                'cache_hits': self.cache_hits,
+                'computed': self.computed,
+                'collapsed': self.collapsed,
+            }
+
+
+image_deduper = ImageHashDeduper.from_env()
@@ -0,0 +1,136 @@
+"""
+Transparency post-processing for Gemini person cut-outs.
+
+Gemini often paints a white or checkered "transparent" background instead of
+real alpha. make_background_transparent() clears those pixels and fades the
+alpha of pixels close to the detected background colour, in a single pass over
+row blocks. Distances are integer squared distances from per-channel lookup
+tables, and the fade is a table lookup too, so there are no full-frame float64
+temporaries and no square roots per pixel.
+"""
+
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+# Background candidates: all channels > 235 (white / near-white) or all within
+# 201..239 (light gray checkerboard squares)
+NEAR_WHITE_MIN = 235
+GRAY_MIN = 200
+GRAY_MAX = 240
+
+# Colour distance thresholds (Euclidean, RGB units) to the detected background
+CLEAR_DISTANCE = 40
+FADE_DISTANCE = 80
+
+MIN_BACKGROUND_SAMPLES = 100
+BORDER_WIDTH = 8
+SAMPLE_STRIDE = 8
+BLOCK_PIXELS = 1 << 18
+
+
+def _background_mask(rgb):
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    lo = np.minimum(np.minimum(r, g), b)
+    hi = np.maximum(np.maximum(r, g), b)
+    return (lo > GRAY_MIN) & ((lo > NEAR_WHITE_MIN) | (hi < GRAY_MAX))
+
+
+def _alpha_cap_table():
+    """Max alpha allowed for each squared distance 0..FADE_DISTANCE**2"""
+    distance = np.sqrt(np.arange(FADE_DISTANCE * FADE_DISTANCE + 1, dtype=np.float32))
+    fade = (distance - CLEAR_DISTANCE) * (255.0 / (FADE_DISTANCE - CLEAR_DISTANCE))
+    return np.clip(fade, 0, 255).astype(np.uint8)
+
+
+ALPHA_CAP = _alpha_cap_table()
+
+
+def estimate_background_color(data):
+    """
+    Mean colour of background-looking pixels, or None if there are too few.
+
+    Looks at a border strip first (the background normally surrounds the
+    person) and falls back to a strided sample of the whole frame.
+    """
+    height, width = data.shape[:2]
+    bw = max(1, min(BORDER_WIDTH, height // 2, width // 2))
+    border = np.concatenate([
+        data[:bw, :, :3].reshape(-1, 3),
+        data[-bw:, :, :3].reshape(-1, 3),
+        data[bw:-bw, :bw, :3].reshape(-1, 3),
+        data[bw:-bw, -bw:, :3].reshape(-1, 3),
+    ])
+    samples = border[_background_mask(border)]
+    if len(samples) < MIN_BACKGROUND_SAMPLES:
+        sampled = data[::SAMPLE_STRIDE, ::SAMPLE_STRIDE, :3].reshape(-1, 3)
+        samples = sampled[_background_mask(sampled)]
+        if len(samples) < MIN_BACKGROUND_SAMPLES:
+            return None
+    return tuple(int(round(c)) for c in samples.mean(axis=0, dtype=np.float64))
+
+
+def make_background_transparent(data):
+    """
+    Clear background pixels of an RGBA uint8 array in place.
+
+    Returns a dict with the detected background colour (or None) and the
+    number of fully transparent pixels afterwards.
+    """
+    if data.ndim != 3 or data.shape[2] != 4 or data.dtype != np.uint8:
+        raise ValueError("Expected an RGBA uint8 array")
+
+    background_color = estimate_background_color(data)
+    if background_color is not None:
+        # Per-channel squared-distance lookup tables: dist² = R[r] + G[g] + B[b]
+        levels = np.arange(256, dtype=np.int32)
+        square_tables = [(levels - c) ** 2 for c in background_color]
+    max_sq = FADE_DISTANCE * FADE_DISTANCE
+
+    transparent = 0
+    rows = max(1, BLOCK_PIXELS // max(1, data.shape[1]))
+    for start in range(0, data.shape[0], rows):
+        block = data[start:start + rows]
+        alpha = block[..., 3]
+
+        if background_color is not None:
+            dist_sq = np.take(square_tables[0], block[..., 0])
+            dist_sq += np.take(square_tables[1], block[..., 1])
+            dist_sq += np.take(square_tables[2], block[..., 2])
+            np.minimum(dist_sq, max_sq, out=dist_sq)
+            # 0 inside CLEAR_DISTANCE, linear fade up to FADE_DISTANCE, 255 beyond
+            cap = np.take(ALPHA_CAP, dist_sq)
+            cap[_background_mask(block)] = 0
+            np.minimum(alpha, cap, out=alpha)
+        else:
+            alpha[_background_mask(block)] = 0
+
+        transparent += int(np.count_nonzero(alpha == 0))
+
+    return {
+        'background_color': background_color,
+        'transparent_pixels': transparent,
+        'total_pixels': data.shape[0] * data.shape[1],
+    }
+
+
+def postprocess_transparency(image_data, log_prefix="[POST-PROCESS]"):
+    """Decode image bytes, make the background transparent and return PNG bytes"""
+    print(f"{log_prefix} Starting background removal...")
+    with Image.open(BytesIO(image_data)) as result_image:
+        if result_image.mode != 'RGBA':
+            print(f"{log_prefix} Converted to RGBA mode")
+        data = np.array(result_image.convert('RGBA'))
+
+    stats = make_background_transparent(data)
+    if stats['background_color']:
+        print(f"{log_prefix} Detected background color: RGB{stats['background_color']}")
+    percent = stats['transparent_pixels'] / stats['total_pixels'] * 100
+    print(f"{log_prefix} Transparency: {percent:.1f}% ({stats['transparent_pixels']}/{stats['total_pixels']} pixels)")
+
+    output_buffer = BytesIO()
+    Image.fromarray(data, 'RGBA').save(output_buffer, format='PNG', optimize=True)
+    processed = output_buffer.getvalue()
+    print(f"{log_prefix} ✅ Complete! Output size: {len(processed)} bytes")
+    return processed
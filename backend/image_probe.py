@@ -0,0 +1,179 @@
+"""
+Liveness validation for /api/unified-search result images.
+
+Custom Search returns many image URLs that are dead or hotlink-blocked; the
+extension used to discover that only after a failed /api/proxy-image call.
+validate() probes every candidate concurrently with a ranged GET (first
+IMAGE_PROBE_BYTES only) through the same 'image-origin' session and headers
+the proxy uses, so a URL that passes here is one the proxy can fetch. The
+partial body is fed to PIL's incremental parser to record the dimensions.
+
+Probes share one overall deadline: URLs that answer with an error or a
+non-image body are dropped, URLs still pending at the deadline are kept
+without dimensions (a slow origin is not a dead one). Optionally the top
+live results are then fetched in full in the background to warm the proxy
+cache before the extension asks for them.
+
+Configuration (environment variables):
+    IMAGE_PROBE_ENABLED    "false" to disable (default "true")
+    IMAGE_PROBE_DEADLINE   Seconds to wait for all probes of one search (default 2.0)
+    IMAGE_PROBE_WORKERS    Concurrent probes per worker (default 8)
+    IMAGE_PROBE_BYTES      Bytes requested per probe (default 32768)
+    IMAGE_PROBE_WARM_TOP   Live results to prefetch into the proxy cache (default 6, 0 disables)
+"""
+
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from PIL import ImageFile
+
+from blob_store import sniff_image_mime
+from http_sessions import http_sessions
+
+GENERIC_CONTENT_TYPES = ('application/octet-stream', 'binary/octet-stream', '')
+
+ProbeResult = namedtuple('ProbeResult', 'url alive status content_type width height reason')
+
+
+def image_dimensions(data):
+    """(width, height) parsed from the start of an image, or (None, None)"""
+    parser = ImageFile.Parser()
+    try:
+        parser.feed(data)
+    except Exception:
+        return None, None
+    if parser.image is None:
+        return None, None
+    return parser.image.size
+
+
+class ImageProber:
+    def __init__(self, deadline=2.0, workers=8, probe_bytes=32 * 1024, warm_top=6):
+        self.deadline = deadline
+        self.probe_bytes = probe_bytes
+        self.warm_top = warm_top
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='image-probe')
+        # Warming downloads whole images; keep it off the probe pool
+        self._warmer = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-warm')
+        self._lock = threading.Lock()
+        self.probed = 0
+        self.dropped = 0
+        self.timed_out = 0
+        self.warmed = 0
+
+    @classmethod
+    def from_env(cls):
+        if os.getenv('IMAGE_PROBE_ENABLED', 'true').lower() == 'false':
+            return None
+        return cls(
+            deadline=float(os.getenv('IMAGE_PROBE_DEADLINE', '2.0')),
+            workers=int(os.getenv('IMAGE_PROBE_WORKERS', '8')),
+            probe_bytes=int(os.getenv('IMAGE_PROBE_BYTES', str(32 * 1024))),
+            warm_top=int(os.getenv('IMAGE_PROBE_WARM_TOP', '6')),
+        )
+
+    def probe(self, url, headers=None):
+        """Fetch the first probe_bytes of ``url`` and report whether it is a usable image"""
+        probe_headers = dict(headers or {})
+        probe_headers['Range'] = f"bytes=0-{self.probe_bytes - 1}"
+        try:
+            response = http_sessions.get('image-origin').get(
+                url, headers=probe_headers, stream=True, timeout=(self.deadline, self.deadline)
+            )
+        except requests.exceptions.RequestException as e:
+            return ProbeResult(url, False, None, None, None, None, type(e).__name__)
+
+        try:
+            if response.status_code == 416:
+                # Range not supported for this resource; the URL itself is reachable
+                return ProbeResult(url, True, 416, None, None, None, 'range-unsatisfiable')
+            if response.status_code not in (200, 206):
+                return ProbeResult(url, False, response.status_code, None, None, None, f"HTTP {response.status_code}")
+
+            content_type = response.headers.get('content-type', '').split(';')[0].strip().lower()
+            if not content_type.startswith('image/') and content_type not in GENERIC_CONTENT_TYPES:
+                return ProbeResult(url, False, response.status_code, content_type, None, None, 'not-an-image')
+
+            head = b''
+            # Origins that ignore Range send the whole body; stop after probe_bytes
+            for chunk in response.iter_content(chunk_size=8192):
+                head += chunk
+                if len(head) >= self.probe_bytes:
+                    break
+            head = head[:self.probe_bytes]
+
+            sniffed = sniff_image_mime(head, default=None)
+            if content_type in GENERIC_CONTENT_TYPES:
+                if not sniffed:
+                    return ProbeResult(url, False, response.status_code, content_type, None, None, 'not-an-image')
+                content_type = sniffed
+            width, height = image_dimensions(head)
+            return ProbeResult(url, True, response.status_code, content_type, width, height, None)
+        except requests.exceptions.RequestException as e:
+            return ProbeResult(url, False, response.status_code, None, None, None, type(e).__name__)
+        finally:
+            response.close()
+
+    def validate(self, images, headers=None, warm=None):
+        """
+        Probe ``images`` (dicts with 'image_url') and return the ones not known to be dead.
+
+        Kept images gain 'width' and 'height' when they could be read. ``warm``
+        is called in the background with the URLs of the first warm_top live
+        images.
+        """
+        if not images:
+            return images
+        futures = {self._executor.submit(self.probe, image['image_url'], headers): image for image in images}
+        done, pending = wait(futures, timeout=self.deadline)
+
+        kept = []
+        dropped = 0
+        for future, image in futures.items():
+            if future not in done:
+                future.cancel()
+                kept.append(image)
+                continue
+            result = future.result()
+            if not result.alive:
+                dropped += 1
+                print(f"🖼️ Dropping dead image ({result.reason}): {result.url}")
+                continue
+            if result.width and result.height:
+                image['width'] = result.width
+                image['height'] = result.height
+            kept.append(image)
+
+        with self._lock:
+            self.probed += len(done)
+            self.dropped += dropped
+            self.timed_out += len(pending)
+        print(f"🖼️ Probed {len(images)} images: {len(kept)} kept, {dropped} dropped, {len(pending)} undecided")
+
+        if warm and self.warm_top > 0:
+            for image in kept[:self.warm_top]:
+                self._warmer.submit(self._warm, warm, image['image_url'])
+        return kept
+
+    def _warm(self, warm, url):
+        try:
+            if warm(url):
+                with self._lock:
+                    self.warmed += 1
+        except Exception as e:
+            print(f"🖼️ Proxy cache warm-up failed for {url}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'probed': self.probed,
+                'dropped': self.dropped,
+                'timed_out': self.timed_out,
+                'warmed': self.warmed,
+            }
+
+
+image_prober = ImageProber.from_env()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Migrate avatar and wardrobe images from LONGBLOB columns into the blob store.
+
+Run blob_store_migration.sql first to add the reference columns. The tool walks
+rows that still hold a LONGBLOB, one row at a time (so memory stays flat),
+writes the bytes to BLOB_STORE_DIR, records hash/size/mime on the row and
+clears the LONGBLOB. Safe to re-run: rows already migrated are skipped.
+
+Usage:
+    python migrate_blobs.py [--dry-run] [--keep-blobs] [--table users|wardrobe]
+"""
+
+import argparse
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from blob_store import blob_store, sniff_image_mime
+from db_pool import db_pool
+
+TABLES = {
+    'users': {
+        'blob': 'avatar',
+        'sha': 'avatar_sha256',
+        'size': 'avatar_size',
+        'mime': 'avatar_mime',
+    },
+    'wardrobe': {
+        'blob': 'garment_image',
+        'sha': 'image_sha256',
+        'size': 'image_size',
+        'mime': 'image_mime',
+    },
+}
+
+
+def migrate_table(table, dry_run=False, keep_blobs=False):
+    cols = TABLES[table]
+    with db_pool.get_connection() as connection:
+        cursor = connection.cursor()
+
+        # Collect ids first so each blob is fetched on its own
+        cursor.execute(
+            f"SELECT id FROM {table} WHERE {cols['blob']} IS NOT NULL AND {cols['sha']} IS NULL ORDER BY id"
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+        print(f"[MIGRATE-BLOBS][{table.upper()}] {len(ids)} row(s) to migrate")
+
+        migrated = 0
+        total_bytes = 0
+        for row_id in ids:
+            cursor.execute(f"SELECT {cols['blob']} FROM {table} WHERE id = %s", (row_id,))
+            row = cursor.fetchone()
+            if not row or not row[0]:
+                continue
+            data = bytes(row[0])
+            mime = sniff_image_mime(data, default='image/png')
+            if dry_run:
+                print(f"   would migrate id={row_id} ({len(data)} bytes, {mime})")
+                continue
+
+            sha256, size = blob_store.put(data)
+            blob_value = f"{cols['blob']}" if keep_blobs else "NULL"
+            cursor.execute(
+                f"UPDATE {table} SET {cols['sha']} = %s, {cols['size']} = %s, {cols['mime']} = %s, "
+                f"{cols['blob']} = {blob_value} WHERE id = %s",
+                (sha256, size, mime, row_id)
+            )
+            connection.commit()
+            migrated += 1
+            total_bytes += size
+            print(f"   ✅ id={row_id} -> {sha256[:12]} ({size} bytes, {mime})")
+
+        cursor.close()
+    print(f"[MIGRATE-BLOBS][{table.upper()}] Migrated {migrated} row(s), {total_bytes} bytes")
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dry-run', action='store_true', help='List rows without changing anything')
+    parser.add_argument('--keep-blobs', action='store_true', help='Do not clear the LONGBLOB after copying')
+    parser.add_argument('--table', choices=sorted(TABLES), help='Only migrate one table')
+    args = parser.parse_args()
+
+    print(f"[MIGRATE-BLOBS] Blob store: {blob_store.root}")
+    tables = [args.table] if args.table else list(TABLES)
+    try:
+        for table in tables:
+            migrate_table(table, dry_run=args.dry_run, keep_blobs=args.keep_blobs)
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Compact encoding of images sent to Gemini as model input.
+
+Images are downscaled to the model's effective input resolution and encoded
+lossy (JPEG, or WebP) unless they carry real transparency, in which case a
+lossless format is kept. The encoded bytes are passed to the SDK as-is; the
+SDK handles the wire encoding, so no base64 strings are built in Python.
+
+Configuration (environment variables):
+    TRYON_INPUT_MAX_SIDE   Longest side in pixels after downscaling (default 1024, 0 = no resize)
+    TRYON_INPUT_FORMAT     auto | jpeg | webp | png (default auto = JPEG, PNG when alpha matters)
+    TRYON_INPUT_QUALITY    JPEG/WebP quality 1-95 (default 90)
+"""
+
+import os
+from io import BytesIO
+
+from PIL import Image
+
+FORMATS = ('auto', 'jpeg', 'webp', 'png')
+
+MIME_TYPES = {
+    'JPEG': 'image/jpeg',
+    'WEBP': 'image/webp',
+    'PNG': 'image/png',
+}
+
+
+class EncodedImage:
+    __slots__ = ('data', 'mime_type', 'size')
+
+    def __init__(self, data, mime_type, size):
+        self.data = data
+        self.mime_type = mime_type
+        self.size = size
+
+    def to_part(self):
+        """Inline-data part for gemini generate_content contents"""
+        return {"inline_data": {"mime_type": self.mime_type, "data": self.data}}
+
+
+def has_transparency(img):
+    """True if the image has an alpha channel with at least one non-opaque pixel"""
+    if img.mode in ('RGBA', 'LA', 'PA'):
+        return img.getchannel('A').getextrema()[0] < 255
+    return img.mode == 'P' and 'transparency' in img.info
+
+
+class ModelInputEncoder:
+    def __init__(self, max_side=1024, fmt='auto', quality=90):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown model input format {fmt!r}; expected one of {', '.join(FORMATS)}")
+        self.max_side = max(0, max_side)
+        self.format = fmt
+        self.quality = min(95, max(1, quality))
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_side=int(os.getenv('TRYON_INPUT_MAX_SIDE', '1024')),
+            fmt=os.getenv('TRYON_INPUT_FORMAT', 'auto').strip().lower(),
+            quality=int(os.getenv('TRYON_INPUT_QUALITY', '90')),
+        )
+
+    def open(self, fp):
+        """
+        Open an uploaded image, letting the JPEG decoder skip straight to a
+        reduced scale when the source is much larger than max_side.
+        """
+        img = Image.open(fp)
+        if self.max_side and img.format == 'JPEG':
+            img.draft('RGB', (self.max_side, self.max_side))
+        return img
+
+    def fit(self, img):
+        """Downscale so the longest side is at most max_side (never upscales)"""
+        if self.max_side and max(img.size) > self.max_side:
+            img = img.copy()
+            img.thumbnail((self.max_side, self.max_side), Image.LANCZOS)
+        return img
+
+    def encode(self, img):
+        """Resize and encode a PIL image; returns an EncodedImage"""
+        img = self.fit(img)
+        keep_alpha = has_transparency(img)
+
+        if self.format == 'png' or (keep_alpha and self.format in ('auto', 'jpeg')):
+            fmt, save_kwargs = 'PNG', {}
+            img = img.convert('RGBA' if keep_alpha else 'RGB')
+        elif self.format == 'webp':
+            fmt = 'WEBP'
+            save_kwargs = {'lossless': True} if keep_alpha else {'quality': self.quality, 'method': 4}
+            img = img.convert('RGBA' if keep_alpha else 'RGB')
+        else:
+            fmt, save_kwargs = 'JPEG', {'quality': self.quality, 'optimize': True}
+            img = img.convert('RGB')
+
+        buf = BytesIO()
+        img.save(buf, format=fmt, **save_kwargs)
+        return EncodedImage(buf.getvalue(), MIME_TYPES[fmt], img.size)
+
+
+model_input_encoder = ModelInputEncoder.from_env()
@@ -0,0 +1,290 @@
+"""
+Disk cache for /api/proxy-image.
+
+Entries are keyed by a SHA-256 of the remote URL and stored as a body file
+plus a small JSON sidecar (content type, upstream ETag / Last-Modified and
+expiry) under <dir>/<key[:2]>/. Freshness follows the upstream Cache-Control
+/ Expires headers, falling back to PROXY_CACHE_DEFAULT_TTL. Stale entries
+that carry a validator are revalidated with a conditional request, so an
+unchanged image costs a 304 instead of a full download. The directory is
+kept under a byte budget by evicting the least recently used bodies.
+
+Configuration (environment variables):
+    PROXY_CACHE_ENABLED       "false" to disable (default "true")
+    PROXY_CACHE_DIR           Cache directory (default ./cache/proxy)
+    PROXY_CACHE_DISK_MB       Byte budget in MB (default 512)
+    PROXY_CACHE_DEFAULT_TTL   Freshness in seconds when upstream sends none (default 3600)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+def freshness_lifetime(headers, default_ttl):
+    """
+    Seconds an upstream response stays fresh, or None if it must not be stored.
+
+    ``headers`` is a case-insensitive mapping (requests' response.headers).
+    """
+    directives = {}
+    for part in headers.get('cache-control', '').split(','):
+        name, _, value = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip('"')
+    if 'no-store' in directives or 'private' in directives:
+        return None
+    if 'no-cache' in directives:
+        return 0
+    for name in ('s-maxage', 'max-age'):
+        if directives.get(name, '').isdigit():
+            return int(directives[name])
+    if headers.get('expires'):
+        try:
+            expires = parsedate_to_datetime(headers['expires']).timestamp()
+            date = parsedate_to_datetime(headers['date']).timestamp() if headers.get('date') else time.time()
+            return max(0, int(expires - date))
+        except (TypeError, ValueError):
+            return 0  # invalid Expires means already expired
+    return default_ttl
+
+
+class ProxyCacheEntry:
+    __slots__ = ('key', 'body_path', 'meta_path', 'meta')
+
+    def __init__(self, key, body_path, meta_path, meta):
+        self.key = key
+        self.body_path = body_path
+        self.meta_path = meta_path
+        self.meta = meta
+
+    @property
+    def content_type(self):
+        return self.meta['content_type']
+
+    @property
+    def size(self):
+        return self.meta['size']
+
+    def is_fresh(self):
+        return time.time() < self.meta['expires_at']
+
+    def validators(self):
+        """Conditional request headers for revalidating this entry"""
+        headers = {}
+        if self.meta.get('etag'):
+            headers['If-None-Match'] = self.meta['etag']
+        if self.meta.get('last_modified'):
+            headers['If-Modified-Since'] = self.meta['last_modified']
+        return headers
+
+
+class ProxyCacheWriter:
+    """Tee for a streamed upstream body; nothing becomes visible until commit()"""
+
+    def __init__(self, cache, key, meta):
+        self.cache = cache
+        self.key = key
+        self.meta = meta
+        self.size = 0
+        body_path, _ = cache._paths(key)
+        self._tmp_path = f"{body_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        self._file = open(self._tmp_path, 'wb')
+
+    def write(self, chunk):
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self):
+        self._file.close()
+        self.meta['size'] = self.size
+        self.cache._store(self.key, self._tmp_path, self.meta)
+        self._file = None
+
+    def close(self):
+        """Discard the partial body unless commit() already ran"""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+class ProxyImageCache:
+    def __init__(self, cache_dir, disk_bytes=512 * 1024 * 1024, default_ttl=3600):
+        self.cache_dir = cache_dir
+        self.disk_bytes = disk_bytes
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._disk_usage = None  # approximate; recomputed when pruning
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls):
+        if os.getenv('PROXY_CACHE_ENABLED', 'true').lower() == 'false':
+            return None
+        default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'proxy')
+        return cls(
+            os.getenv('PROXY_CACHE_DIR', default_dir),
+            disk_bytes=int(float(os.getenv('PROXY_CACHE_DISK_MB', '512')) * 1024 * 1024),
+            default_ttl=int(os.getenv('PROXY_CACHE_DEFAULT_TTL', '3600')),
+        )
+
+    @staticmethod
+    def key_for(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        shard = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(shard, f"{key}.body"), os.path.join(shard, f"{key}.json")
+
+    def lookup(self, url):
+        """Return the stored entry for ``url`` (fresh or stale) or None"""
+        key = self.key_for(url)
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"[PROXY-CACHE][WARNING] Unreadable metadata for {key[:12]}: {e}")
+            return None
+        if meta.get('url') != url or not os.path.isfile(body_path):
+            return None
+        return ProxyCacheEntry(key, body_path, meta_path, meta)
+
+    def writer(self, url, content_type, upstream_headers):
+        """Start caching a streamed body, or return None if it must not be stored"""
+        ttl = freshness_lifetime(upstream_headers, self.default_ttl)
+        if ttl is None:
+            return None
+        # Without a validator a zero-lifetime entry could never be reused
+        if ttl == 0 and not (upstream_headers.get('etag') or upstream_headers.get('last-modified')):
+            return None
+        meta = {
+            'url': url,
+            'content_type': content_type,
+            'etag': upstream_headers.get('etag'),
+            'last_modified': upstream_headers.get('last-modified'),
+            'expires_at': time.time() + ttl,
+        }
+        try:
+            return ProxyCacheWriter(self, self.key_for(url), meta)
+        except OSError as e:
+            print(f"[PROXY-CACHE][WARNING] Cannot open cache file: {e}")
+            return None
+
+    def _write_meta(self, meta_path, meta):
+        tmp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def _store(self, key, tmp_body_path, meta):
+        body_path, meta_path = self._paths(key)
+        try:
+            os.replace(tmp_body_path, body_path)
+            self._write_meta(meta_path, meta)
+        except OSError as e:
+            print(f"[PROXY-CACHE][WARNING] Disk write failed for {key[:12]}: {e}")
+            return
+        if not self.disk_bytes:
+            return
+        with self._lock:
+            if self._disk_usage is not None:
+                self._disk_usage += meta['size']
+            needs_prune = self._disk_usage is None or self._disk_usage > self.disk_bytes
+        if needs_prune:
+            self._prune()
+
+    def refresh(self, entry, upstream_headers):
+        """Extend an entry after the origin answered 304 Not Modified"""
+        ttl = freshness_lifetime(upstream_headers, self.default_ttl)
+        entry.meta['expires_at'] = time.time() + (ttl or 0)
+        if upstream_headers.get('etag'):
+            entry.meta['etag'] = upstream_headers['etag']
+        if upstream_headers.get('last-modified'):
+            entry.meta['last_modified'] = upstream_headers['last-modified']
+        try:
+            self._write_meta(entry.meta_path, entry.meta)
+        except OSError as e:
+            print(f"[PROXY-CACHE][WARNING] Metadata update failed for {entry.key[:12]}: {e}")
+
+    def record_hit(self, entry, revalidated=False):
+        try:
+            os.utime(entry.body_path)  # keep eviction roughly LRU
+        except OSError:
+            pass
+        with self._lock:
+            if revalidated:
+                self.revalidated += 1
+            else:
+                self.hits += 1
+            self.bytes_saved += entry.size
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def _prune(self):
+        """Evict least recently used bodies (and their metadata) once over budget"""
+        bodies = []
+        total = 0
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                total += stat.st_size
+                if name.endswith('.body'):
+                    bodies.append((stat.st_mtime, stat.st_size, path))
+        evicted = 0
+        if total > self.disk_bytes:
+            bodies.sort()
+            for _, size, path in bodies:
+                if total <= self.disk_bytes:
+                    break
+                meta_path = path[:-len('.body')] + '.json'
+                for victim in (meta_path, path):
+                    try:
+                        total -= os.path.getsize(victim)
+                        os.remove(victim)
+                    except OSError:
+                        pass
+                evicted += 1
+        with self._lock:
+            self._disk_usage = total
+            self.evictions += evicted
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.revalidated + self.misses
+            return {
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.revalidated) / lookups, 3) if lookups else None,
+                'bytes_saved': self.bytes_saved,
+                'evictions': self.evictions,
+                'disk_bytes': self._disk_usage,
+                'disk_budget': self.disk_bytes,
+            }
+
+
+proxy_cache = ProxyImageCache.from_env()
@@ -0,0 +1,79 @@
+"""
+Registry of preloaded rembg (ONNX) sessions.
+
+rembg.remove() without a session builds (and on first use downloads) its
+model lazily. Here one session per configured model is created when the worker
+boots and then shared by every request; ONNX Runtime sessions are safe to call
+from multiple threads, so no per-request locking is needed once a session exists.
+
+Configuration (environment variables):
+    REMBG_MODELS          Comma-separated models to load
+                          (default "u2net,u2netp,isnet-general-use,u2net_human_seg")
+    REMBG_DEFAULT_MODEL   Model used when a request does not pick one (default "u2net")
+    REMBG_PRELOAD         "false" to load sessions lazily on first use (default "true")
+"""
+
+import os
+import threading
+import time
+
+from rembg import new_session
+
+DEFAULT_REMBG_MODELS = 'u2net,u2netp,isnet-general-use,u2net_human_seg'
+
+
+class UnknownRembgModel(ValueError):
+    """Raised when a request asks for a model that is not configured"""
+
+
+class RembgSessionRegistry:
+    def __init__(self, models, default_model):
+        self.models = [m for m in models if m]
+        if default_model not in self.models:
+            self.models.insert(0, default_model)
+        self.default_model = default_model
+        self._sessions = {}
+        self._locks = {model: threading.Lock() for model in self.models}
+
+    @classmethod
+    def from_env(cls):
+        models = [m.strip() for m in os.getenv('REMBG_MODELS', DEFAULT_REMBG_MODELS).split(',')]
+        return cls(models, os.getenv('REMBG_DEFAULT_MODEL', 'u2net').strip())
+
+    def get(self, model=None):
+        """Return the shared session for ``model`` (default model when None)"""
+        model = model or self.default_model
+        session = self._sessions.get(model)
+        if session is not None:
+            return session
+        lock = self._locks.get(model)
+        if lock is None:
+            raise UnknownRembgModel(f"Unknown model '{model}'. Available: {', '.join(self.models)}")
+        # Only one thread builds a given session; others wait for it instead of loading twice
+        with lock:
+            session = self._sessions.get(model)
+            if session is None:
+                started = time.time()
+                session = new_session(model)
+                self._sessions[model] = session
+                print(f"[REMBG-SESSIONS][LOAD] {model} ready in {time.time() - started:.1f}s")
+        return session
+
+    def preload(self):
+        """Create every configured session, default model first"""
+        for model in self.models:
+            try:
+                self.get(model)
+            except Exception as e:
+                print(f"[REMBG-SESSIONS][ERROR] Failed to load {model}: {e}")
+
+    def loaded_models(self):
+        return [model for model in self.models if model in self._sessions]
+
+
+rembg_sessions = RembgSessionRegistry.from_env()
+
+if os.getenv('REMBG_PRELOAD', 'true').lower() != 'false':
+    # Load in the background so the worker can start serving other routes;
+    # a request that needs a model still loading waits on that model's lock.
+    threading.Thread(target=rembg_sessions.preload, name='rembg-preload', daemon=True).start()
@@ -0,0 +1,143 @@
+"""
+TTL cache for /api/unified-search results with stale-while-revalidate.
+
+Entries are keyed by the normalized search query (after brand-site
+rewriting) and hold both the raw Custom Search items and the filtered garment
+images. A fresh entry is returned as-is. An entry past its TTL but still
+within the stale window is returned immediately while one background thread
+refreshes it. Anything older is loaded synchronously. Concurrent misses for
+the same key share one load, so a burst of identical queries costs one API
+call.
+
+Configuration (environment variables):
+    SEARCH_CACHE_ENABLED      "false" to disable (default "true")
+    SEARCH_CACHE_TTL          Seconds an entry is fresh (default 900)
+    SEARCH_CACHE_STALE_TTL    Extra seconds a stale entry may be served while refreshing (default 3600)
+    SEARCH_CACHE_MAX_ENTRIES  LRU bound on cached queries (default 500)
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_HIT = 'HIT'
+CACHE_STALE = 'STALE'
+CACHE_MISS = 'MISS'
+
+
+def normalize_query(query):
+    """Lowercase and collapse whitespace so trivially different queries share an entry"""
+    return re.sub(r'\s+', ' ', query.strip().lower())
+
+
+class SearchResultCache:
+    def __init__(self, ttl=900, stale_ttl=3600, max_entries=500):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+        self._loading = {}  # key -> Event set when the in-flight load finishes
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='search-refresh')
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    @classmethod
+    def from_env(cls):
+        if os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() == 'false':
+            return None
+        return cls(
+            ttl=int(os.getenv('SEARCH_CACHE_TTL', '900')),
+            stale_ttl=int(os.getenv('SEARCH_CACHE_STALE_TTL', '3600')),
+            max_entries=int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', '500')),
+        )
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, key, loader):
+        """Run ``loader`` once per key at a time; returns its value"""
+        with self._lock:
+            pending = self._loading.get(key)
+            if pending is None:
+                pending = self._loading[key] = threading.Event()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            pending.wait()
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry:
+                return entry[0]
+            return self._load(key, loader)  # the other load was not cacheable; do our own
+        try:
+            value = loader()
+            if value is not None:
+                self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            pending.set()
+
+    def _refresh(self, key, loader):
+        try:
+            self._load(key, loader)
+        except Exception as e:
+            print(f"[SEARCH-CACHE][WARNING] Background refresh failed for '{key}': {e}")
+
+    def get_or_load(self, key, loader):
+        """
+        Return (value, status) where status is HIT, STALE or MISS.
+
+        ``loader`` returns the value to cache, or None when the result should
+        not be cached (e.g. an upstream error).
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                value, stored_at = entry
+                age = now - stored_at
+                if age < self.ttl:
+                    self.hits += 1
+                    return value, CACHE_HIT
+                if age < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    start_refresh = key not in self._loading
+                    if start_refresh:
+                        self.refreshes += 1
+                else:
+                    entry = None
+            if not entry:
+                self.misses += 1
+
+        if entry:
+            if start_refresh:
+                self._refresher.submit(self._refresh, key, loader)
+            return value, CACHE_STALE
+        return self._load(key, loader), CACHE_MISS
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+            }
+
+
+search_cache = SearchResultCache.from_env()
@@ -0,0 +1,126 @@
+"""
+Brand and domain classifier for /api/unified-search filtering.
+
+Brands come from the "brands" list in the extension's
+chrome-extension/brands.json, so both sides recognise the same brands. The
+backend-only tables (extra retailer brands, excluded/preferred domains and
+title keywords) live next to this module in search_rules.json. Everything
+is compiled into regular expressions once at import, so a query needs one
+scan for brand detection and a result needs one classify() call for all of
+its flags.
+
+Brand names are matched as whole words in the accent-folded query (so
+"gap" does not fire inside "singapore"); common spellings are derived
+automatically ("H&M" -> "hm", "Forever 21" -> "forever21"). Spellings that
+would leave a one-letter word ("h m", "levi s") are not derived, since they
+match ordinary text; list them as explicit aliases if needed. Spellings
+that are also a colour or a common word ("off-white", "coach") are listed
+under "ambiguous_aliases" in search_rules.json and never detect a brand on
+their own; such brands are still found through longer aliases
+("off-white c/o", "coach new york"). Domain and keyword lists keep
+substring semantics, as before.
+
+Configuration (environment variables):
+    BRANDS_FILE         Path to brands.json (default ../chrome-extension/brands.json)
+    SEARCH_RULES_FILE   Path to the backend tables (default ./search_rules.json)
+"""
+
+import json
+import os
+import re
+import unicodedata
+from collections import namedtuple
+
+DEFAULT_BRANDS_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'chrome-extension', 'brands.json'
+)
+DEFAULT_SEARCH_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'search_rules.json')
+
+BrandMatch = namedtuple('BrandMatch', 'name alias domain')
+ResultFlags = namedtuple('ResultFlags', 'brand_match excluded preferred fashion non_fashion')
+
+
+def fold_text(text):
+    """Lowercase and strip accents ("Hermès" -> "hermes")"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def brand_aliases(name, extra=()):
+    """Spellings of a brand name to look for in queries"""
+    folded = fold_text(name)
+    without_punctuation = re.sub(r"\s+", ' ', re.sub(r"[&.'\-]", ' ', folded)).strip()
+    aliases = {folded, without_punctuation.replace(' ', '')}
+    if min(len(word) for word in without_punctuation.split() or ['']) >= 2:
+        aliases.add(without_punctuation)
+    aliases.update(fold_text(alias) for alias in extra)
+    return {alias for alias in aliases if len(alias) >= 2}
+
+
+def _substring_pattern(words):
+    # Longest first so overlapping alternatives prefer the most specific word
+    ordered = sorted({word.lower() for word in words}, key=len, reverse=True)
+    return re.compile('|'.join(re.escape(word) for word in ordered)) if ordered else None
+
+
+class SearchClassifier:
+    def __init__(self, brands, excluded_domains=(), preferred_retailers=(),
+                 fashion_keywords=(), non_fashion_keywords=(), ambiguous_aliases=()):
+        ambiguous = {fold_text(alias) for alias in ambiguous_aliases}
+        self.brand_by_alias = {}
+        for brand in brands:
+            for alias in brand_aliases(brand['name'], brand.get('aliases', ())) - ambiguous:
+                # First listed brand wins for duplicated names
+                self.brand_by_alias.setdefault(alias, BrandMatch(brand['name'], alias, brand['domain'].lower()))
+
+        aliases = sorted(self.brand_by_alias, key=len, reverse=True)
+        self._brand_pattern = re.compile(
+            r'(?<![a-z0-9])(' + '|'.join(re.escape(alias) for alias in aliases) + r')(?![a-z0-9])'
+        ) if aliases else None
+        self._excluded = _substring_pattern(excluded_domains)
+        self._preferred = _substring_pattern(preferred_retailers)
+        self._fashion = _substring_pattern(fashion_keywords)
+        self._non_fashion = _substring_pattern(non_fashion_keywords)
+
+    @classmethod
+    def from_files(cls, brands_path, rules_path):
+        with open(brands_path, 'r', encoding='utf-8') as f:
+            brands = json.load(f).get('brands', [])
+        with open(rules_path, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+        return cls(
+            brands + rules.get('extra_brands', []),
+            excluded_domains=rules.get('excluded_domains', ()),
+            preferred_retailers=rules.get('preferred_retailers', ()),
+            fashion_keywords=rules.get('fashion_keywords', ()),
+            non_fashion_keywords=rules.get('non_fashion_keywords', ()),
+            ambiguous_aliases=rules.get('ambiguous_aliases', ()),
+        )
+
+    def detect_brand(self, query):
+        """First brand mentioned in ``query`` as a BrandMatch, or None"""
+        if not self._brand_pattern or not query:
+            return None
+        match = self._brand_pattern.search(fold_text(query))
+        return self.brand_by_alias[match.group(1)] if match else None
+
+    def is_excluded(self, store):
+        return bool(self._excluded and self._excluded.search(store.lower()))
+
+    def classify(self, title, store, brand_domain=None):
+        """All filtering flags for one search result"""
+        title = title.lower()
+        store = store.lower()
+        return ResultFlags(
+            brand_match=bool(brand_domain) and brand_domain in store,
+            excluded=bool(self._excluded and self._excluded.search(store)),
+            preferred=bool(self._preferred and self._preferred.search(store)),
+            fashion=bool(self._fashion and self._fashion.search(title)),
+            non_fashion=bool(self._non_fashion and self._non_fashion.search(title)),
+        )
+
+
+search_classifier = SearchClassifier.from_files(
+    os.getenv('BRANDS_FILE', DEFAULT_BRANDS_FILE),
+    os.getenv('SEARCH_RULES_FILE', DEFAULT_SEARCH_RULES_FILE),
+)
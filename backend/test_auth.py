@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Checks for session tokens, signed image URLs and password hashing (auth.py).
+
+Tokens and URL signatures must be rejected once expired or tampered with,
+signed URLs must only authorize their own path, and the example secret
+from .env.example must never be used as a signing key. Runs without a
+server, database or network:
+
+    python test_auth.py      (or: python -m pytest test_auth.py)
+"""
+
+import os
+import time
+
+from auth import PLACEHOLDER_SECRETS, PasswordHasher, SessionTokens
+
+SECRET = 'x' * 40
+PATH = '/api/wardrobe/u1/g1/image'
+
+
+def flip_first(signature):
+    # The first base64 character carries no padding bits, so changing it always changes the bytes
+    return ('B' if signature[0] == 'A' else 'A') + signature[1:]
+
+
+def test_token_round_trip():
+    tokens = SessionTokens(SECRET, ttl=60)
+    token, expires_at = tokens.issue(42)
+    claims = tokens.verify(token)
+    assert claims['uid'] == '42' and abs(claims['expires_at'] - expires_at) <= 1
+
+
+def test_tampered_or_foreign_tokens_are_rejected():
+    tokens = SessionTokens(SECRET)
+    token, _ = tokens.issue(42)
+    head, signature = token.rsplit('.', 1)
+    assert tokens.verify(tokens.issue(43)[0].rsplit('.', 1)[0] + '.' + signature) is None
+    assert tokens.verify(head + '.' + flip_first(signature)) is None
+    assert SessionTokens('y' * 40).verify(token) is None
+    assert tokens.verify('') is None and tokens.verify('garbage') is None
+
+
+def test_expired_token_is_rejected():
+    tokens = SessionTokens(SECRET, ttl=1)
+    token, _ = tokens.issue(42)
+    time.sleep(2.1)
+    assert tokens.verify(token) is None
+
+
+def test_signed_url_is_bound_to_path_and_expiry():
+    tokens = SessionTokens(SECRET, url_ttl=600)
+    query = tokens.sign_path(PATH)
+    expires, sig = str(query['expires']), query['sig']
+    assert query['expires'] - time.time() >= 600
+    assert tokens.verify_path(PATH, expires, sig)
+    assert not tokens.verify_path('/api/wardrobe/u2/g1/image', expires, sig)
+    assert not tokens.verify_path(PATH, str(query['expires'] + 600), sig)
+    assert not tokens.verify_path(PATH, expires, flip_first(sig))
+    assert not tokens.verify_path(PATH, expires, None)
+    assert not tokens.verify_path(PATH, '-1', sig)
+
+
+def test_expired_signed_url_is_rejected():
+    tokens = SessionTokens(SECRET)
+    expires = str(int(time.time()) - 1)
+    sig = tokens._url_signer.get_signature(f"{PATH}|{expires}").decode('ascii')
+    assert not tokens.verify_path(PATH, expires, sig)
+
+
+def test_placeholder_and_short_secrets_are_ignored():
+    for secret in (*PLACEHOLDER_SECRETS, 'too-short'):
+        os.environ['SESSION_TOKEN_SECRET'] = secret
+        try:
+            tokens = SessionTokens.from_env()
+        finally:
+            del os.environ['SESSION_TOKEN_SECRET']
+        forged, _ = SessionTokens(secret).issue('admin')
+        assert tokens.verify(forged) is None, secret
+
+
+def test_password_hash_and_rehash_detection():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000')
+    stored = hasher.hash('hunter2')
+    assert hasher.verify(stored, 'hunter2') and not hasher.verify(stored, 'hunter3')
+    assert not hasher.needs_rehash(stored)
+    assert PasswordHasher(method='pbkdf2:sha256:2000').needs_rehash(stored)
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
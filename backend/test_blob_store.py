@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Checks for the content-addressed blob store (blob_store.py) and its
+garbage collector (gc_blobs.py).
+
+Identical content must be stored once, hashes must never escape the store
+root, and gc_blobs must only delete unreferenced blobs older than the grace
+period. Runs without a server, MySQL or network:
+
+    python test_blob_store.py      (or: python -m pytest test_blob_store.py)
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+
+import gc_blobs
+from blob_store import BlobStore, sniff_image_mime
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'png-body'
+JPEG = b'\xff\xd8\xff\xe0' + b'jpeg-body'
+
+
+def age(store, sha256, seconds):
+    then = time.time() - seconds
+    os.utime(store.path(sha256), (then, then))
+
+
+def test_put_is_content_addressed():
+    with tempfile.TemporaryDirectory() as root:
+        store = BlobStore(root)
+        sha256, size = store.put(PNG)
+        assert sha256 == hashlib.sha256(PNG).hexdigest() and size == len(PNG)
+        assert store.path(sha256) == os.path.join(root, sha256[:2], sha256[2:4], sha256)
+        assert store.put(PNG) == (sha256, size)
+        assert store.read(sha256) == PNG
+        assert [blob[0] for blob in store.iter_blobs()] == [sha256]
+
+
+def test_put_refreshes_mtime_of_reused_content():
+    with tempfile.TemporaryDirectory() as root:
+        store = BlobStore(root)
+        sha256, _ = store.put(PNG)
+        age(store, sha256, 7200)
+        store.put(PNG)
+        assert time.time() - os.path.getmtime(store.path(sha256)) < 60
+
+
+def test_invalid_hashes_are_rejected():
+    store = BlobStore('/nonexistent')
+    for bad in ('../../etc/passwd', 'ab' * 31, 'AB' * 32, None):
+        try:
+            store.path(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} accepted as a blob hash")
+
+
+def test_sniff_image_mime():
+    assert sniff_image_mime(PNG) == 'image/png'
+    assert sniff_image_mime(JPEG) == 'image/jpeg'
+    assert sniff_image_mime(b'RIFF\x00\x00\x00\x00WEBPVP8 ') == 'image/webp'
+    assert sniff_image_mime(b'not an image', default='image/png') == 'image/png'
+
+
+def test_gc_deletes_only_old_unreferenced_blobs():
+    with tempfile.TemporaryDirectory() as root:
+        store = BlobStore(root)
+        referenced, _ = store.put(PNG)
+        orphan, _ = store.put(JPEG)
+        recent, _ = store.put(b'written just before its row')
+        age(store, referenced, 7200)
+        age(store, orphan, 7200)
+
+        original = gc_blobs.blob_store, gc_blobs.referenced_hashes
+        gc_blobs.blob_store, gc_blobs.referenced_hashes = store, lambda: {referenced}
+        try:
+            assert gc_blobs.collect(dry_run=True, min_age=3600) == 1
+            assert store.exists(orphan)
+            assert gc_blobs.collect(min_age=3600) == 1
+        finally:
+            gc_blobs.blob_store, gc_blobs.referenced_hashes = original
+        assert store.exists(referenced) and store.exists(recent) and not store.exists(orphan)
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Checks for the semantic chat cache (chat_cache.py).
+
+Near-identical messages that differ in size, gender or price must never
+share a cached answer, while plain paraphrases should. Runs without a
+server, database or network:
+
+    python test_chat_cache.py      (or: python -m pytest test_chat_cache.py)
+"""
+
+from chat_cache import SemanticChatCache, _guard, embed_tokens, normalize_message
+
+# Pairs above the default similarity threshold that still ask for different things
+MUST_NOT_SHARE = [
+    ("lightweight breathable cushioned trail running shoes for men size 10",
+     "lightweight breathable cushioned trail running shoes for men size 12"),
+    ("slim fit button down cotton oxford shirt with chest pocket for men",
+     "slim fit button down cotton oxford shirt with chest pocket for women"),
+    ("zara black midi wrap dress with long sleeves and belt size small",
+     "zara black midi wrap dress with long sleeves and belt size large"),
+    ("white leather low top minimalist sneakers under $50",
+     "white leather low top minimalist sneakers under $100"),
+]
+
+MUST_SHARE = [
+    ("black nike running shoes men", "men's black Nike runners"),
+    ("red summer dress for women", "women red dress summer"),
+]
+
+
+def similarity(a, b):
+    return float(embed_tokens(normalize_message(a)) @ embed_tokens(normalize_message(b)))
+
+
+def test_distinct_requests_do_not_share_answers():
+    for stored, asked in MUST_NOT_SHARE:
+        # Only the guard can tell these apart
+        assert similarity(stored, asked) >= 0.9, (stored, asked)
+        cache = SemanticChatCache(threshold=0.9)
+        cache.store(stored, 'cached answer')
+        hit = cache.lookup(asked)
+        assert hit is None, f"{asked!r} reused the answer for {stored!r} (similarity {similarity(stored, asked):.3f})"
+
+
+def test_guard_differs_for_distinct_requests():
+    for a, b in MUST_NOT_SHARE:
+        assert _guard(a, normalize_message(a)) != _guard(b, normalize_message(b)), (a, b)
+
+
+def test_paraphrases_share_answers():
+    for stored, asked in MUST_SHARE:
+        cache = SemanticChatCache(threshold=0.9)
+        cache.store(stored, 'cached answer')
+        hit = cache.lookup(asked)
+        assert hit is not None and hit.response == 'cached answer', (stored, asked)
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
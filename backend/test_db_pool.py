@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Checks for the MySQL connection pool (db_pool.py).
+
+A stand-in for mysql.connector.connect records what the pool does with its
+connections: reuse on checkout, cleanup on release, validation of idle or
+old connections, and the size limit. Runs without a server, MySQL or
+network:
+
+    python test_db_pool.py      (or: python -m pytest test_db_pool.py)
+"""
+
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector.errors import PoolError
+
+from db_pool import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.unread_result = False
+        self.in_transaction = False
+        self.closed = False
+        self.rolled_back = False
+        self.ping_fails = False
+        self.pings = 0
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if self.ping_fails:
+            raise mysql.connector.errors.InterfaceError("gone away")
+
+    def consume_results(self):
+        self.unread_result = False
+
+    def rollback(self):
+        self.rolled_back = True
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+@contextmanager
+def fake_mysql():
+    opened = []
+
+    def connect(**config):
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    original = mysql.connector.connect
+    mysql.connector.connect = connect
+    try:
+        yield opened
+    finally:
+        mysql.connector.connect = original
+
+
+def test_released_connection_is_reused():
+    with fake_mysql() as opened:
+        pool = ConnectionPool({}, size=2)
+        with pool.get_connection():
+            pass
+        with pool.get_connection():
+            pass
+        assert len(opened) == 1
+        assert pool.stats() == {'size': 2, 'open': 1, 'idle': 1}
+
+
+def test_release_rolls_back_open_transaction():
+    with fake_mysql() as opened:
+        pool = ConnectionPool({})
+        with pool.get_connection():
+            opened[0].in_transaction = True
+            opened[0].unread_result = True
+        assert opened[0].rolled_back and not opened[0].unread_result
+
+
+def test_close_twice_releases_once():
+    with fake_mysql():
+        pool = ConnectionPool({}, size=2)
+        connection = pool.get_connection()
+        connection.close()
+        connection.close()
+        assert pool.stats()['idle'] == 1
+
+
+def test_idle_connection_is_pinged_and_replaced_when_dead():
+    with fake_mysql() as opened:
+        pool = ConnectionPool({}, ping_interval=0)
+        with pool.get_connection():
+            pass
+        opened[0].ping_fails = True
+        time.sleep(0.01)
+        with pool.get_connection():
+            pass
+        assert opened[0].pings == 1 and opened[0].closed
+        assert len(opened) == 2 and pool.stats()['open'] == 1
+
+
+def test_old_connection_is_recycled():
+    with fake_mysql() as opened:
+        pool = ConnectionPool({}, max_lifetime=0.01)
+        with pool.get_connection():
+            pass
+        time.sleep(0.02)
+        with pool.get_connection():
+            pass
+        assert opened[0].closed and len(opened) == 2
+
+
+def test_exhausted_pool_times_out():
+    with fake_mysql():
+        pool = ConnectionPool({}, size=1, timeout=0.05)
+        with pool.get_connection():
+            try:
+                pool.get_connection()
+            except PoolError:
+                pass
+            else:
+                raise AssertionError("second checkout should time out")
+        with pool.get_connection():
+            pass
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
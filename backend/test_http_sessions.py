@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Checks for the named outbound HTTP sessions (http_sessions.py).
+
+Each service must get one shared session with its default timeout (unless
+the caller passes one), connection-only retries, and no cookie storage for
+arbitrary image origins. Requests go to a recording transport adapter, so
+this runs without a server, database or network:
+
+    python test_http_sessions.py      (or: python -m pytest test_http_sessions.py)
+"""
+
+import threading
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+
+from http_sessions import SERVICES, HttpSessions
+
+
+class RecordingAdapter(BaseAdapter):
+    def __init__(self):
+        super().__init__()
+        self.timeouts = []
+
+    def send(self, request, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        response = Response()
+        response.status_code = 204
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def test_one_shared_session_per_service():
+    sessions = HttpSessions()
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(sessions.get('custom-search'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(session) for session in seen}) == 1
+    assert sessions.get('bg-service') is not seen[0]
+
+
+def test_unknown_service_is_refused():
+    try:
+        HttpSessions().get('not-a-service')
+    except KeyError:
+        return
+    raise AssertionError("unknown service accepted")
+
+
+def test_default_timeout_unless_caller_passes_one():
+    session = HttpSessions().get('mixer-service')
+    adapter = RecordingAdapter()
+    session.mount('http://sessions.test/', adapter)
+    session.get('http://sessions.test/a')
+    session.get('http://sessions.test/b', timeout=3)
+    assert adapter.timeouts == [SERVICES['mixer-service']['timeout'], 3]
+
+
+def test_only_connection_failures_are_retried():
+    retries = HttpSessions().get('bg-service').get_adapter('https://api.example/').max_retries
+    assert retries.connect == 1 and retries.read == 0 and retries.status == 0
+
+
+def test_image_origins_never_store_cookies():
+    sessions = HttpSessions()
+    assert sessions.get('image-origin').cookies.get_policy().is_not_allowed('shop.example')
+    assert not sessions.get('custom-search').cookies.get_policy().is_not_allowed('shop.example')
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
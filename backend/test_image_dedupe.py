@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Checks for perceptual-hash de-duplication of search results (image_dedupe.py).
+
+Canned images are served through a transport adapter mounted on the shared
+'image-origin' session: the same photo at two sizes must collapse into one
+slot (keeping the larger copy), different photos and unreadable URLs must
+not, and a repeated search must hash nothing. Runs without a server,
+database or network:
+
+    python test_image_dedupe.py      (or: python -m pytest test_image_dedupe.py)
+"""
+
+import io
+from contextlib import contextmanager
+
+from PIL import Image, ImageDraw
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from http_sessions import http_sessions
+from image_dedupe import ImageHashDeduper, difference_hash, hamming_distance
+
+ORIGIN = 'http://dedupe.test/'
+
+
+def photo(size, flipped=False):
+    img = Image.new('L', (200, 200), 0)
+    draw = ImageDraw.Draw(img)
+    for x in range(0, 200, 40):
+        draw.rectangle([x, 0, x + 20, 200 if x % 80 else 100], fill=255)
+    if flipped:
+        img = img.transpose(Image.FLIP_LEFT_RIGHT)
+    buffer = io.BytesIO()
+    img.resize((size, size)).convert('RGB').save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+class CannedOrigin(BaseAdapter):
+    ROUTES = {
+        'small.jpg': photo(120),
+        'large.jpg': photo(600),
+        'other.jpg': photo(300, flipped=True),
+        'broken.jpg': b'not an image',
+    }
+
+    def __init__(self):
+        super().__init__()
+        self.requests = 0
+
+    def send(self, request, **kwargs):
+        self.requests += 1
+        response = Response()
+        response.status_code = 200
+        response.headers = CaseInsensitiveDict({'Content-Type': 'image/jpeg'})
+        response.raw = io.BytesIO(self.ROUTES[request.url[len(ORIGIN):]])
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@contextmanager
+def canned_origin():
+    session = http_sessions.get('image-origin')
+    adapter = CannedOrigin()
+    session.mount(ORIGIN, adapter)
+    try:
+        yield adapter
+    finally:
+        session.adapters.pop(ORIGIN, None)
+
+
+def results():
+    return [
+        {'id': 1, 'image_url': ORIGIN + 'small.jpg', 'width': 120, 'height': 120},
+        {'id': 2, 'image_url': ORIGIN + 'other.jpg'},
+        {'id': 3, 'image_url': ORIGIN + 'large.jpg', 'width': 600, 'height': 600},
+        {'id': 4, 'image_url': ORIGIN + 'broken.jpg'},
+    ]
+
+
+def test_hash_is_stable_across_sizes():
+    small = difference_hash(Image.open(io.BytesIO(photo(120))))
+    large = difference_hash(Image.open(io.BytesIO(photo(600))))
+    other = difference_hash(Image.open(io.BytesIO(photo(300, flipped=True))))
+    assert hamming_distance(small, large) <= 6 < hamming_distance(small, other)
+
+
+def test_duplicates_collapse_into_the_larger_copy():
+    deduper = ImageHashDeduper(deadline=5.0)
+    with canned_origin():
+        kept = deduper.dedupe(results())
+    assert [(image['id'], image['image_url']) for image in kept] == [
+        (1, ORIGIN + 'large.jpg'), (2, ORIGIN + 'other.jpg'), (4, ORIGIN + 'broken.jpg'),
+    ]
+    assert deduper.stats()['collapsed'] == 1
+
+
+def test_repeated_search_hashes_nothing():
+    deduper = ImageHashDeduper(deadline=5.0)
+    with canned_origin() as origin:
+        deduper.dedupe(results())
+        fetched = origin.requests
+        deduper.dedupe(results())
+    assert fetched == 4 and origin.requests == 4
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
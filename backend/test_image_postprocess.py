@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Checks for the transparency post-processor (image_postprocess.py).
+
+The single-pass implementation must keep matching the inline code it
+replaced (kept in bench_transparency.py) on frames with a fake checkerboard
+background, including block boundaries inside the frame. Runs without a
+server, database or network:
+
+    python test_image_postprocess.py      (or: python -m pytest test_image_postprocess.py)
+"""
+
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+import image_postprocess
+from bench_transparency import legacy_postprocess, synthetic_frame
+from image_postprocess import make_background_transparent, postprocess_transparency
+
+
+def alpha_mismatch(frame):
+    legacy, new = frame.copy(), frame.copy()
+    legacy_postprocess(legacy)
+    make_background_transparent(new)
+    return np.mean(np.abs(legacy[..., 3].astype(np.int16) - new[..., 3]) > 8)
+
+
+def test_matches_previous_implementation():
+    for size, seed in ((256, 0), (300, 1)):
+        assert alpha_mismatch(synthetic_frame(size, seed)) < 0.001, size
+
+
+def test_block_boundaries_do_not_change_the_result():
+    frame = synthetic_frame(256)
+    whole, blocked = frame.copy(), frame.copy()
+    make_background_transparent(whole)
+    original = image_postprocess.BLOCK_PIXELS
+    image_postprocess.BLOCK_PIXELS = 256 * 7  # 7 rows per block, so blocks split the figure
+    try:
+        make_background_transparent(blocked)
+    finally:
+        image_postprocess.BLOCK_PIXELS = original
+    assert np.array_equal(whole, blocked)
+
+
+def test_background_cleared_and_figure_kept():
+    frame = synthetic_frame(256)
+    stats = make_background_transparent(frame)
+    assert stats['background_color'] is not None
+    assert frame[0, 0, 3] == 0 and frame[128, 128, 3] == 255
+
+
+def test_postprocess_returns_rgba_png():
+    buffer = BytesIO()
+    Image.fromarray(synthetic_frame(128)[..., :3], 'RGB').save(buffer, 'JPEG')
+    with Image.open(BytesIO(postprocess_transparency(buffer.getvalue()))) as result:
+        assert result.format == 'PNG' and result.mode == 'RGBA' and result.size == (128, 128)
+
+
+def test_rejects_non_rgba_input():
+    try:
+        make_background_transparent(np.zeros((4, 4, 3), dtype=np.uint8))
+    except ValueError:
+        return
+    raise AssertionError("RGB input accepted")
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Checks for search result image probing (image_probe.py).
+
+Canned origin responses are served through a transport adapter mounted on
+the shared 'image-origin' session, so the real probe code runs end to end:
+dead and non-image URLs are dropped, live ones gain dimensions, and URLs
+still pending at the deadline are kept. Runs without a server, database or
+network:
+
+    python test_image_probe.py      (or: python -m pytest test_image_probe.py)
+"""
+
+import io
+import time
+from contextlib import contextmanager
+
+from PIL import Image
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from http_sessions import http_sessions
+from image_probe import ImageProber, image_dimensions
+
+ORIGIN = 'http://probe.test/'
+
+
+def png_bytes(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'white').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class CannedOrigin(BaseAdapter):
+    """Answers ORIGIN/<name> with ROUTES[name] = (status, content type, body, delay)"""
+
+    ROUTES = {
+        'shirt.png': (206, 'image/png', png_bytes(300, 400), 0),
+        'octet.png': (200, 'application/octet-stream', png_bytes(50, 60), 0),
+        'gone.png': (404, 'text/html', b'not found', 0),
+        'page.png': (200, 'text/html', b'<html>blocked</html>', 0),
+        'slow.png': (200, 'image/png', png_bytes(10, 10), 1.0),
+    }
+
+    def send(self, request, **kwargs):
+        status, content_type, body, delay = self.ROUTES[request.url[len(ORIGIN):]]
+        time.sleep(delay)
+        response = Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict({'Content-Type': content_type})
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@contextmanager
+def canned_origin():
+    session = http_sessions.get('image-origin')
+    session.mount(ORIGIN, CannedOrigin())
+    try:
+        yield
+    finally:
+        session.adapters.pop(ORIGIN, None)
+
+
+def test_image_dimensions_from_partial_body():
+    assert image_dimensions(png_bytes(300, 400)[:64]) == (300, 400)
+    assert image_dimensions(b'<html>') == (None, None)
+
+
+def test_probe_classifies_responses():
+    prober = ImageProber(deadline=0.5)
+    with canned_origin():
+        live = prober.probe(ORIGIN + 'shirt.png')
+        assert live.alive and (live.width, live.height) == (300, 400)
+        sniffed = prober.probe(ORIGIN + 'octet.png')
+        assert sniffed.alive and sniffed.content_type == 'image/png'
+        assert prober.probe(ORIGIN + 'gone.png').reason == 'HTTP 404'
+        assert prober.probe(ORIGIN + 'page.png').reason == 'not-an-image'
+
+
+def test_validate_drops_dead_and_keeps_undecided():
+    prober = ImageProber(deadline=0.3, warm_top=0)
+    images = [{'id': name, 'image_url': ORIGIN + name} for name in ('shirt.png', 'gone.png', 'slow.png', 'page.png')]
+    with canned_origin():
+        kept = prober.validate(images)
+    assert [image['id'] for image in kept] == ['shirt.png', 'slow.png']
+    assert kept[0]['width'] == 300 and 'width' not in kept[1]
+    stats = prober.stats()
+    assert stats['dropped'] == 2 and stats['timed_out'] == 1
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Checks for the compact Gemini input encoding (model_input.py).
+
+Opaque images must be downscaled and sent lossy, real transparency must
+survive in a lossless format, and images are never upscaled. Runs without
+a server, database or network:
+
+    python test_model_input.py      (or: python -m pytest test_model_input.py)
+"""
+
+from io import BytesIO
+
+from PIL import Image
+
+from model_input import ModelInputEncoder, has_transparency
+
+
+def encoded_image(encoded):
+    return Image.open(BytesIO(encoded.data))
+
+
+def test_opaque_image_is_downscaled_jpeg():
+    encoded = ModelInputEncoder(max_side=512).encode(Image.new('RGB', (2048, 1024), 'navy'))
+    assert encoded.mime_type == 'image/jpeg' and encoded.size == (512, 256)
+    assert encoded_image(encoded).size == (512, 256)
+
+
+def test_fully_opaque_alpha_is_dropped():
+    img = Image.new('RGBA', (64, 64), (10, 20, 30, 255))
+    assert not has_transparency(img)
+    assert ModelInputEncoder().encode(img).mime_type == 'image/jpeg'
+
+
+def test_transparency_is_kept_lossless():
+    img = Image.new('RGBA', (64, 64), (0, 0, 0, 0))
+    img.paste((200, 30, 30, 255), (16, 16, 48, 48))
+    for fmt, mime in (('auto', 'image/png'), ('jpeg', 'image/png'), ('webp', 'image/webp')):
+        encoded = ModelInputEncoder(fmt=fmt).encode(img)
+        assert encoded.mime_type == mime, fmt
+        decoded = encoded_image(encoded).convert('RGBA')
+        assert decoded.getpixel((0, 0))[3] == 0 and decoded.getpixel((32, 32)) == (200, 30, 30, 255)
+
+
+def test_small_images_are_not_upscaled():
+    encoded = ModelInputEncoder(max_side=1024).encode(Image.new('RGB', (300, 200), 'white'))
+    assert encoded.size == (300, 200)
+
+
+def test_open_uses_jpeg_draft_scaling():
+    buffer = BytesIO()
+    Image.new('RGB', (4000, 3000), 'gray').save(buffer, 'JPEG')
+    encoder = ModelInputEncoder(max_side=1000)
+    img = encoder.open(BytesIO(buffer.getvalue()))
+    assert max(img.size) < 4000  # decoder skipped straight to a reduced scale
+    assert max(encoder.encode(img).size) == 1000
+
+
+def test_unknown_format_is_rejected():
+    try:
+        ModelInputEncoder(fmt='gif')
+    except ValueError:
+        return
+    raise AssertionError("gif accepted as a model input format")
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Checks for the /api/proxy-image disk cache (proxy_cache.py).
+
+Covers freshness parsing of upstream headers, what may be stored at all,
+the write-then-commit lifecycle, revalidation validators and LRU eviction
+under the byte budget. Runs without a server, database or network:
+
+    python test_proxy_cache.py      (or: python -m pytest test_proxy_cache.py)
+"""
+
+import os
+import tempfile
+import time
+
+from requests.structures import CaseInsensitiveDict
+
+from proxy_cache import ProxyImageCache, freshness_lifetime
+
+
+def headers(**values):
+    return CaseInsensitiveDict({name.replace('_', '-'): value for name, value in values.items()})
+
+
+def store(cache, url, body, **upstream):
+    writer = cache.writer(url, 'image/jpeg', headers(**upstream))
+    assert writer is not None, url
+    writer.write(body)
+    writer.commit()
+
+
+def test_freshness_lifetime():
+    assert freshness_lifetime(headers(cache_control='public, max-age=600'), 60) == 600
+    assert freshness_lifetime(headers(cache_control='max-age=600, s-maxage=30'), 60) == 30
+    assert freshness_lifetime(headers(cache_control='no-cache'), 60) == 0
+    assert freshness_lifetime(headers(cache_control='private, max-age=600'), 60) is None
+    assert freshness_lifetime(headers(cache_control='no-store'), 60) is None
+    assert freshness_lifetime(headers(expires='Thu, 01 Jan 2015 00:01:40 GMT',
+                                      date='Thu, 01 Jan 2015 00:00:00 GMT'), 60) == 100
+    assert freshness_lifetime(headers(expires='0'), 60) == 0
+    assert freshness_lifetime(headers(), 60) == 60
+
+
+def test_key_is_per_url():
+    assert ProxyImageCache.key_for('https://a.example/x.jpg') != ProxyImageCache.key_for('https://a.example/x.jpg?v=2')
+
+
+def test_uncacheable_responses_are_not_stored():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ProxyImageCache(cache_dir)
+        assert cache.writer('https://a.example/1.jpg', 'image/jpeg', headers(cache_control='no-store')) is None
+        # Immediately stale and no validator: could never be reused
+        assert cache.writer('https://a.example/2.jpg', 'image/jpeg', headers(cache_control='no-cache')) is None
+        assert cache.writer('https://a.example/3.jpg', 'image/jpeg',
+                            headers(cache_control='no-cache', etag='"v1"')) is not None
+
+
+def test_uncommitted_body_is_invisible():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ProxyImageCache(cache_dir)
+        writer = cache.writer('https://a.example/x.jpg', 'image/jpeg', headers())
+        writer.write(b'partial')
+        writer.close()
+        assert cache.lookup('https://a.example/x.jpg') is None
+        assert not any(names for _, _, names in os.walk(cache_dir))
+
+
+def test_stored_entry_round_trip_and_validators():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ProxyImageCache(cache_dir)
+        store(cache, 'https://a.example/x.jpg', b'jpeg-bytes', cache_control='max-age=0', etag='"v1"',
+              last_modified='Thu, 01 Jan 2015 00:00:00 GMT')
+        entry = cache.lookup('https://a.example/x.jpg')
+        assert entry.size == len(b'jpeg-bytes') and entry.content_type == 'image/jpeg'
+        assert not entry.is_fresh()
+        assert entry.validators() == {'If-None-Match': '"v1"',
+                                      'If-Modified-Since': 'Thu, 01 Jan 2015 00:00:00 GMT'}
+        cache.refresh(entry, headers(cache_control='max-age=600', etag='"v2"'))
+        entry = cache.lookup('https://a.example/x.jpg')
+        assert entry.is_fresh() and entry.meta['etag'] == '"v2"'
+
+
+def test_prune_evicts_least_recently_used():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ProxyImageCache(cache_dir, disk_bytes=3000)
+        store(cache, 'https://a.example/old.jpg', b'o' * 1000)
+        store(cache, 'https://a.example/used.jpg', b'u' * 1000)
+        old = cache.lookup('https://a.example/old.jpg')
+        used = cache.lookup('https://a.example/used.jpg')
+        for entry in (old, used):
+            os.utime(entry.body_path, (time.time() - 60, time.time() - 60))
+        cache.record_hit(used)  # touches the body, so 'old' is now the least recently used
+        store(cache, 'https://a.example/new.jpg', b'n' * 1000)
+        assert cache.lookup('https://a.example/old.jpg') is None
+        assert cache.lookup('https://a.example/used.jpg') and cache.lookup('https://a.example/new.jpg')
+        stats = cache.stats()
+        assert stats['evictions'] == 1 and stats['disk_bytes'] <= 3000
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
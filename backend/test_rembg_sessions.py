@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Checks for the shared rembg session registry (rembg_sessions.py).
+
+Session creation is replaced by a counting stand-in, so no ONNX model is
+downloaded: each model must be built once even under concurrent first use,
+and unknown models must be refused. Runs without a server, database or
+network (the real models are never loaded):
+
+    python test_rembg_sessions.py      (or: python -m pytest test_rembg_sessions.py)
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+os.environ.setdefault('REMBG_PRELOAD', 'false')
+
+import rembg_sessions
+from rembg_sessions import RembgSessionRegistry, UnknownRembgModel
+
+
+@contextmanager
+def counted_sessions():
+    built = []
+
+    def new_session(model):
+        time.sleep(0.05)  # long enough for concurrent callers to pile up on the lock
+        built.append(model)
+        return f"session:{model}"
+
+    original = rembg_sessions.new_session
+    rembg_sessions.new_session = new_session
+    try:
+        yield built
+    finally:
+        rembg_sessions.new_session = original
+
+
+def test_default_model_is_always_available():
+    registry = RembgSessionRegistry(['u2netp', ''], 'u2net')
+    assert registry.models == ['u2net', 'u2netp']
+
+
+def test_concurrent_first_use_builds_once():
+    registry = RembgSessionRegistry(['u2net', 'u2netp'], 'u2net')
+    with counted_sessions() as built:
+        sessions = []
+        threads = [threading.Thread(target=lambda: sessions.append(registry.get('u2netp'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert built == ['u2netp'] and set(sessions) == {'session:u2netp'}
+        assert registry.get() == 'session:u2net'
+        assert registry.loaded_models() == ['u2net', 'u2netp']
+
+
+def test_unknown_model_is_refused():
+    registry = RembgSessionRegistry(['u2net'], 'u2net')
+    with counted_sessions() as built:
+        try:
+            registry.get('not-a-model')
+        except UnknownRembgModel:
+            pass
+        else:
+            raise AssertionError("unknown model accepted")
+        assert built == []
+
+
+def test_preload_survives_a_failing_model():
+    registry = RembgSessionRegistry(['u2net', 'broken', 'u2netp'], 'u2net')
+    with counted_sessions() as built:
+        original = rembg_sessions.new_session
+
+        def new_session(model):
+            if model == 'broken':
+                raise RuntimeError("download failed")
+            return original(model)
+
+        rembg_sessions.new_session = new_session
+        registry.preload()
+        assert built == ['u2net', 'u2netp'] and registry.loaded_models() == ['u2net', 'u2netp']
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
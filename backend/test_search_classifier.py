@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Checks for brand detection in the search classifier (search_classifier.py).
+
+Uses the shipped brands.json and search_rules.json, so a data change that
+turns a colour or an ordinary word into a site: search fails here. Runs
+without a server, database or network:
+
+    python test_search_classifier.py      (or: python -m pytest test_search_classifier.py)
+"""
+
+from search_classifier import search_classifier
+
+# Query -> brand name that must be detected
+BRANDS = [
+    ("gap hoodie", "Gap"),
+    ("H&M linen shirt", "H&M"),
+    ("hm linen shirt", "H&M"),
+    ("forever 21 crop top", "Forever 21"),
+    ("levis 501 jeans", "Levi's"),
+    ("Hermes scarf", "Hermès"),
+    ("Off-White c/o Virgil Abloh hoodie", "Off-White"),
+    ("Coach New York tabby bag", "Coach"),
+]
+
+# Queries that mention no brand: colours, common words and brand names inside other words
+NO_BRAND = [
+    "off-white hoodie",
+    "off white linen trousers",
+    "offwhite knit sweater",
+    "coach bag",
+    "coach jacket",
+    "singapore summer dress",
+    "h m",
+    "black midi dress",
+]
+
+
+def test_brands_are_detected():
+    for query, name in BRANDS:
+        match = search_classifier.detect_brand(query)
+        assert match is not None and match.name == name, (query, match)
+
+
+def test_colours_and_common_words_are_not_brands():
+    for query in NO_BRAND:
+        match = search_classifier.detect_brand(query)
+        assert match is None, f"{query!r} detected as {match.name} (alias {match.alias!r})"
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
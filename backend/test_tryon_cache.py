@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Checks for the try-on result cache (tryon_cache.py).
+
+The key must change with every input that changes the generated image and
+never collide when bytes shift between fields; the memory tier must evict
+least recently used entries and the disk tier must prune back under its
+budget. Runs without a server, database or network:
+
+    python test_tryon_cache.py      (or: python -m pytest test_tryon_cache.py)
+"""
+
+import os
+import tempfile
+import time
+
+from tryon_cache import TryonResultCache, tryon_cache_key
+
+BASE = dict(avatar_bytes=b'avatar', garment_bytes_by_garment=[[b'shirt'], [b'jeans']],
+            garment_types=['top', 'bottom'], model_name='gemini-2.5-flash-image', prompt_version='v1')
+
+
+def key(**changes):
+    return tryon_cache_key(**{**BASE, **changes})
+
+
+def test_key_changes_with_every_input():
+    variants = [
+        key(avatar_bytes=b'avatar2'),
+        key(garment_bytes_by_garment=[[b'jeans'], [b'shirt']]),
+        key(garment_bytes_by_garment=[[b'shirt', b'jeans']]),
+        key(garment_types=['top', 'top']),
+        key(model_name='gemini-2.0-flash-exp'),
+        key(prompt_version='v2'),
+    ]
+    assert len({key(), *variants}) == len(variants) + 1
+
+
+def test_key_fields_do_not_run_together():
+    assert key(avatar_bytes=b'ab', garment_bytes_by_garment=[[b'c']]) != \
+        key(avatar_bytes=b'a', garment_bytes_by_garment=[[b'bc']])
+
+
+def test_key_ignores_garment_type_case_and_spaces():
+    assert key(garment_types=[' Top', 'BOTTOM ']) == key()
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = TryonResultCache(memory_bytes=10, disk_dir=None)
+    cache.put('a', b'aaaa')
+    cache.put('b', b'bbbb')
+    assert cache.get('a')[2] == 'memory'  # 'a' is now the most recent
+    cache.put('c', b'cccc')
+    assert cache.get('b') is None
+    assert cache.get('a') and cache.get('c')
+    assert cache.stats()['memory_bytes'] <= 10
+
+
+def test_disk_tier_serves_and_prunes_oldest():
+    with tempfile.TemporaryDirectory() as disk_dir:
+        cache = TryonResultCache(memory_bytes=0, disk_dir=disk_dir, disk_bytes=10)
+        cache.put('aa11', b'1234', 'image/jpeg')
+        assert cache.get('aa11') == (b'1234', 'image/jpeg', 'disk')
+        old = os.path.join(disk_dir, 'aa', 'aa11.jpg')
+        os.utime(old, (time.time() - 60, time.time() - 60))
+        cache.put('bb22', b'5678')
+        cache.put('cc33', b'9012')
+        assert not os.path.exists(old)
+        assert cache.get('bb22') and cache.get('cc33')
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Checks for try-on image preprocessing on the shared pool (app.py).
+
+Images encoded on tryon_preprocess_executor must be byte-identical to a
+serial encode and come back in request order, and an unreadable upload must
+end the try-on with a 400 before Gemini is called. Runs without a server,
+MySQL, network or Gemini key:
+
+    python test_tryon_preprocess.py      (or: python -m pytest test_tryon_preprocess.py)
+"""
+
+import json
+import os
+from io import BytesIO
+
+from PIL import Image
+
+os.environ.setdefault('REMBG_PRELOAD', 'false')
+
+import app
+
+
+def png(color, size=(64, 96)):
+    buffer = BytesIO()
+    Image.new('RGBA', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+UPLOADS = [png((255, 0, 0, 255)), png((0, 255, 0, 128)), png((0, 0, 255, 255), (640, 480))]
+
+
+def test_pool_matches_serial_encoding_in_order():
+    serial = [app.prepare_model_input(data, 'RGBA') for data in UPLOADS]
+    futures = [app.tryon_preprocess_executor.submit(app.prepare_model_input, data, 'RGBA') for data in UPLOADS]
+    pooled = [future.result() for future in futures]
+    assert [(e.data, e.mime_type, e.size) for e in pooled] == [(e.data, e.mime_type, e.size) for e in serial]
+
+
+def run_without_gemini(avatar, garments):
+    original = app.GEMINI_API_KEY
+    app.GEMINI_API_KEY = 'offline-test-key'  # never used: preprocessing fails first
+    try:
+        return app.run_tryon(avatar, garments)
+    finally:
+        app.GEMINI_API_KEY = original
+
+
+def test_unreadable_uploads_are_rejected():
+    for avatar, garments in ((b'not an image', [('top', [UPLOADS[0]])]),
+                             (UPLOADS[0], [('top', [UPLOADS[1]]), ('bottom', [b'not an image'])])):
+        result = run_without_gemini(avatar, garments)
+        assert result.status_code == 400
+        assert json.loads(result.body)['code'] == 'IMAGE_PROCESSING_ERROR'
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
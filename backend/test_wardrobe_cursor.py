@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Checks for the keyset cursor of the paginated wardrobe listing (app.py).
+
+Walks a wardrobe page by page - including rows with a NULL date_added,
+which MySQL sorts last under ORDER BY date_added DESC - and checks that
+every row comes back exactly once. SQLite orders NULLs the same way, so the
+keyset condition runs against an in-memory table. Runs without a server,
+MySQL or network:
+
+    python test_wardrobe_cursor.py      (or: python -m pytest test_wardrobe_cursor.py)
+"""
+
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+os.environ.setdefault('REMBG_PRELOAD', 'false')
+
+from app import _decode_wardrobe_cursor, _encode_wardrobe_cursor, _wardrobe_keyset_condition
+
+BASE = datetime(2024, 5, 1, 12, 0, 0)
+DATES = [BASE, BASE, BASE - timedelta(days=1), None, BASE + timedelta(hours=3), None, None, BASE]
+
+
+def make_table():
+    db = sqlite3.connect(':memory:')
+    db.execute("CREATE TABLE wardrobe (id INTEGER PRIMARY KEY, date_added TEXT)")
+    db.executemany("INSERT INTO wardrobe (id, date_added) VALUES (?, ?)",
+                   [(i + 1, d.isoformat() if d else None) for i, d in enumerate(DATES)])
+    return db
+
+
+def fetch_page(db, after, limit):
+    query = "SELECT id, date_added FROM wardrobe WHERE 1 = 1"
+    params = []
+    if after:
+        condition, condition_params = _wardrobe_keyset_condition(after)
+        query += condition.replace('%s', '?')
+        params += [p.isoformat() if isinstance(p, datetime) else p for p in condition_params]
+    query += " ORDER BY date_added DESC, id DESC LIMIT ?"
+    rows = db.execute(query, params + [limit + 1]).fetchall()
+    return [(row_id, datetime.fromisoformat(d) if d else None) for row_id, d in rows]
+
+
+def test_cursor_round_trip():
+    for date_added in (BASE, None):
+        token = _encode_wardrobe_cursor(date_added, 42)
+        assert _decode_wardrobe_cursor(token) == (date_added, 42)
+
+
+def test_pages_cover_every_row_once():
+    db = make_table()
+    expected = [row_id for row_id, _ in fetch_page(db, None, len(DATES))]
+    for limit in range(1, len(DATES) + 1):
+        seen = []
+        after = None
+        while True:
+            rows = fetch_page(db, after, limit)
+            page = rows[:limit]
+            seen += [row_id for row_id, _ in page]
+            if len(rows) <= limit:
+                break
+            # Encode and decode exactly like the route does between requests
+            after = _decode_wardrobe_cursor(_encode_wardrobe_cursor(page[-1][1], page[-1][0]))
+        assert seen == expected, (limit, seen, expected)
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,192 @@
+"""
+Content-addressed cache for virtual try-on results.
+
+Results are keyed by a SHA-256 over everything that determines the generated
+image: the normalized avatar bytes, the ordered garment bytes, the garment
+types, the Gemini model name and the prompt version. Lookups go through a
+size-bounded in-memory LRU first, then a sharded on-disk tier.
+
+Configuration (environment variables):
+    TRYON_CACHE_ENABLED      "false" to disable (default "true")
+    TRYON_CACHE_MEMORY_MB    In-memory tier budget in MB (default 64)
+    TRYON_CACHE_DIR          Disk tier directory (default ./cache/tryon)
+    TRYON_CACHE_DISK_MB      Disk tier budget in MB (default 1024, 0 = unbounded)
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+MIME_EXTENSIONS = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/webp': 'webp',
+}
+EXTENSION_MIMES = {ext: mime for mime, ext in MIME_EXTENSIONS.items()}
+
+
+def tryon_cache_key(avatar_bytes, garment_bytes_by_garment, garment_types, model_name, prompt_version):
+    """Build the cache key for one try-on request"""
+    digest = hashlib.sha256()
+
+    def feed(label, value):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        # Length-prefix every field so adjacent values can never run together
+        digest.update(label.encode('ascii'))
+        digest.update(len(value).to_bytes(8, 'big'))
+        digest.update(value)
+
+    feed('model', model_name)
+    feed('prompt', str(prompt_version))
+    feed('avatar', avatar_bytes)
+    for garment_idx, garment_images in enumerate(garment_bytes_by_garment):
+        feed('garment', str(garment_idx))
+        for image_bytes in garment_images:
+            feed('image', image_bytes)
+    for garment_type in garment_types:
+        feed('type', (garment_type or '').strip().lower())
+    return digest.hexdigest()
+
+
+class TryonResultCache:
+    """Two-tier (memory LRU + disk) cache of generated try-on images"""
+
+    def __init__(self, memory_bytes=64 * 1024 * 1024, disk_dir=None, disk_bytes=1024 * 1024 * 1024):
+        self.memory_bytes = memory_bytes
+        self.disk_dir = disk_dir
+        self.disk_bytes = disk_bytes
+        self._entries = OrderedDict()  # key -> (image_data, mime_type)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._disk_usage = None  # approximate; recomputed when pruning
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        if os.getenv('TRYON_CACHE_ENABLED', 'true').lower() == 'false':
+            return None
+        default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'tryon')
+        return cls(
+            memory_bytes=int(float(os.getenv('TRYON_CACHE_MEMORY_MB', '64')) * 1024 * 1024),
+            disk_dir=os.getenv('TRYON_CACHE_DIR', default_dir),
+            disk_bytes=int(float(os.getenv('TRYON_CACHE_DISK_MB', '1024')) * 1024 * 1024),
+        )
+
+    def _disk_path(self, key, ext):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.{ext}")
+
+    def _remember(self, key, image_data, mime_type):
+        size = len(image_data)
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous:
+                self._size -= len(previous[0])
+            self._entries[key] = (image_data, mime_type)
+            self._size += size
+            while self._size > self.memory_bytes and self._entries:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def get(self, key):
+        """Return (image_data, mime_type, tier) or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], entry[1], 'memory'
+
+        if self.disk_dir:
+            for ext, mime_type in EXTENSION_MIMES.items():
+                path = self._disk_path(key, ext)
+                try:
+                    with open(path, 'rb') as f:
+                        image_data = f.read()
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    print(f"[TRYON-CACHE][WARNING] Disk read failed for {key[:12]}: {e}")
+                    break
+                try:
+                    os.utime(path)  # keep disk eviction roughly LRU
+                except OSError:
+                    pass
+                self._remember(key, image_data, mime_type)
+                with self._lock:
+                    self.hits += 1
+                return image_data, mime_type, 'disk'
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, image_data, mime_type='image/png'):
+        if not image_data:
+            return
+        self._remember(key, image_data, mime_type)
+        if not self.disk_dir:
+            return
+        ext = MIME_EXTENSIONS.get(mime_type, 'png')
+        path = self._disk_path(key, ext)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(image_data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[TRYON-CACHE][WARNING] Disk write failed for {key[:12]}: {e}")
+            return
+        if not self.disk_bytes:
+            return
+        with self._lock:
+            if self._disk_usage is not None:
+                self._disk_usage += len(image_data)
+            needs_prune = self._disk_usage is None or self._disk_usage > self.disk_bytes
+        if needs_prune:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """Drop least recently used files once the disk tier is over budget"""
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        if total > self.disk_bytes:
+            files.sort()
+            for _, size, path in files:
+                if total <= self.disk_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+        with self._lock:
+            self._disk_usage = total
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'memory_entries': len(self._entries),
+                'memory_bytes': self._size,
+            }
+
+
+tryon_cache = TryonResultCache.from_env()
@@ -0,0 +1,175 @@
+"""
+Background job runner for virtual try-on.
+
+A try-on submitted as a job returns a job id immediately; the generation runs
+on a small bounded thread pool so long Gemini calls (and their retry backoff)
+do not hold the request worker. Finished results are kept in memory for a
+configurable TTL and then dropped.
+
+The job table lives in this process only. With several workers (e.g.
+gunicorn -w 4) a status or result request that lands on another worker gets
+a 404, so run one worker with threads, or make the load balancer send every
+request for a client to the same worker.
+
+Clients poll the job's status URL. The server-sent events stream is a
+convenience for short waits: it closes with a `timeout` event after
+TRYON_JOB_EVENTS_MAX_SECONDS, after which the client falls back to polling,
+so an open stream never holds a request worker for longer than that.
+
+Configuration (environment variables):
+    TRYON_JOB_WORKERS        Concurrent try-on generations (default 2)
+    TRYON_JOB_MAX_PENDING    Queued + running jobs accepted before rejecting (default 20)
+    TRYON_JOB_TTL_SECONDS    How long finished results are kept (default 600)
+    TRYON_JOB_EVENTS_MAX_SECONDS  Longest an events stream stays open (default 60)
+"""
+
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+FINISHED_STATUSES = (STATUS_DONE, STATUS_FAILED)
+
+# What a job runner returns: the response to replay, without any Flask objects
+TryonResult = namedtuple('TryonResult', 'status_code mimetype body headers')
+
+
+class JobQueueFull(Exception):
+    """Raised when the pending job limit has been reached"""
+
+
+class TryonJob:
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.status = STATUS_QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Captured response: status code, mimetype, body bytes and headers
+        self.status_code = None
+        self.mimetype = None
+        self.body = None
+        self.headers = {}
+        self.error = None
+        self.changed = threading.Condition()
+
+    def to_dict(self):
+        data = {
+            'job_id': self.job_id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if self.status in FINISHED_STATUSES:
+            data['result_status'] = self.status_code
+        if self.error:
+            data['error'] = self.error
+        return data
+
+
+class TryonJobManager:
+    """Bounded worker pool plus an in-memory job table with result TTL"""
+
+    def __init__(self, workers=2, max_pending=20, result_ttl=600, events_max_seconds=60):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.result_ttl = result_ttl
+        self.events_max_seconds = max(1, events_max_seconds)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='tryon-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            workers=int(os.getenv('TRYON_JOB_WORKERS', '2')),
+            max_pending=int(os.getenv('TRYON_JOB_MAX_PENDING', '20')),
+            result_ttl=int(os.getenv('TRYON_JOB_TTL_SECONDS', '600')),
+            events_max_seconds=int(os.getenv('TRYON_JOB_EVENTS_MAX_SECONDS', '60')),
+        )
+
+    def _purge_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at and now - job.finished_at > self.result_ttl
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if expired:
+            print(f"[TRYON-JOBS][CLEANUP] Dropped {len(expired)} expired job(s)")
+
+    def submit(self, runner):
+        """
+        Queue ``runner`` and return the new job.
+
+        ``runner`` is called on a worker thread, outside any request or app
+        context, and must return a TryonResult.
+        """
+        self._purge_expired()
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job.status not in FINISHED_STATUSES)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} try-on jobs already pending")
+            job = TryonJob(uuid.uuid4().hex)
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job, runner)
+        print(f"[TRYON-JOBS][SUBMIT] Job {job.job_id} queued ({pending + 1} pending)")
+        return job
+
+    def get(self, job_id):
+        self._purge_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _set_status(self, job, status):
+        with job.changed:
+            job.status = status
+            job.changed.notify_all()
+
+    def _run(self, job, runner):
+        job.started_at = time.time()
+        self._set_status(job, STATUS_RUNNING)
+        try:
+            result = runner()
+            job.body = result.body
+            job.mimetype = result.mimetype
+            job.headers = {k: v for k, v in result.headers.items() if k.startswith('X-')}
+            job.status_code = result.status_code
+            final_status = STATUS_DONE if result.status_code < 400 else STATUS_FAILED
+            if final_status == STATUS_FAILED and result.mimetype == 'application/json':
+                try:
+                    job.error = json.loads(result.body).get('message')
+                except ValueError:
+                    pass
+        except Exception as e:
+            print(f"[TRYON-JOBS][ERROR] Job {job.job_id} crashed: {e}")
+            print(traceback.format_exc())
+            job.status_code = 500
+            job.error = str(e)
+            job.mimetype = 'application/json'
+            job.body = json.dumps({'success': False, 'message': job.error}).encode('utf-8')
+            final_status = STATUS_FAILED
+        job.finished_at = time.time()
+        self._set_status(job, final_status)
+        print(f"[TRYON-JOBS][FINISH] Job {job.job_id} {final_status} in {job.finished_at - job.started_at:.1f}s")
+
+    def wait(self, job, last_status, timeout):
+        """Block until the job leaves ``last_status`` or ``timeout`` elapses; returns the status"""
+        with job.changed:
+            if job.status == last_status:
+                job.changed.wait(timeout)
+            return job.status
+
+
+tryon_jobs = TryonJobManager.from_env()
@@ -0,0 +1,340 @@
+"""
+Versioned prompt templates for the Gemini virtual try-on.
+
+Every template is assembled once at import from shared sections and keyed by
+(mode, garment category, views). A request only fills in a handful of fields
+(garment type, image counts) with str.format, instead of re-running thousands
+of characters of f-strings.
+
+PROMPT_VERSION is part of the try-on cache key (through PromptTemplate.id), so
+bump it whenever any section text changes. Each template carries an offline
+token estimate; real prompt token counts reported by Gemini are accumulated
+per template with record_usage() so prompt overhead can be measured per
+version.
+"""
+
+import string
+import threading
+
+PROMPT_VERSION = 'tryon-v1'
+
+MODE_SINGLE = 'single'
+MODE_MULTI = 'multi'
+
+CATEGORY_TOP = 'top'
+CATEGORY_BOTTOM = 'bottom'
+CATEGORY_OTHER = 'other'
+
+VIEWS_SINGLE = 'single-view'
+VIEWS_MULTI = 'multi-view'
+VIEWS_ANY = 'any'
+
+TOP_TYPES = ('top', 'shirt', 'blouse', 'jacket', 'sweater', 'hoodie', 't-shirt', 'tank top')
+BOTTOM_TYPES = ('pants', 'jeans', 'shorts', 'skirt', 'dress', 'trousers')
+
+# Rough characters-per-token ratio for offline estimates; Gemini reports the
+# exact prompt token count with every response
+CHARS_PER_TOKEN = 4
+
+
+def garment_category(garment_type):
+    garment_type = garment_type.lower()
+    if garment_type in TOP_TYPES:
+        return CATEGORY_TOP
+    if garment_type in BOTTOM_TYPES:
+        return CATEGORY_BOTTOM
+    return CATEGORY_OTHER
+
+
+def estimate_tokens(text):
+    return max(1, round(len(text) / CHARS_PER_TOKEN))
+
+
+# ---------------------------------------------------------------------------
+# Sections. Literal braces must be doubled; {name} fields are filled per request.
+# ---------------------------------------------------------------------------
+
+_AVATAR_PRESERVATION = (
+    "1. AVATAR PRESERVATION (100% UNCHANGED):\n"
+    "Keep these EXACTLY as shown in the AVATAR image (image 1):\n"
+    "- EXACT same face, eyes, nose, mouth, facial expression\n"
+    "- EXACT same hair style, color, and position\n"
+    "- EXACT same skin tone and complexion\n"
+    "- EXACT same body pose, hand position, arm position\n"
+    "- EXACT same body proportions and build\n"
+    "- EXACT same background, floor, walls, environment\n"
+    "- EXACT same lighting direction, color, and intensity\n"
+    "- EXACT same camera angle and perspective\n\n"
+)
+
+_MULTI_INTRO = (
+    "🚨 CRITICAL INSTRUCTION: This is a MULTI-GARMENT VIRTUAL TRY-ON task. You MUST keep the person from the FIRST image (avatar) 100% unchanged.\n"
+    "Your ONLY job is to add {total_garment_count} garments onto this existing person. DO NOT create a new person.\n\n"
+
+    "📋 IMAGE ORDER:\n"
+    "- Image 1: AVATAR (the person to dress - keep this person exactly as-is)\n"
+    "- Images 2-{last_image_number}: GARMENT reference images (extract garment designs only)\n"
+    "  {garments_list}\n\n"
+
+    "⛔ ABSOLUTE PROHIBITIONS - NEVER DO THESE:\n"
+    "1. DO NOT replace the avatar person with a different person\n"
+    "2. DO NOT use any person/model from the garment reference images\n"
+    "3. DO NOT change the avatar's face, body, pose, or appearance in ANY way\n"
+    "4. DO NOT change the background or lighting from the avatar image\n"
+    "5. DO NOT create a composite of the avatar and any garment model\n\n"
+
+    "✅ WHAT YOU MUST DO:\n\n"
+    + _AVATAR_PRESERVATION +
+
+    "2. GARMENT EXTRACTION (from reference images):\n"
+    "Analyze ALL {total_image_count} garment reference images to extract garment designs - ignore the people wearing them.\n"
+    "For each garment, extract:\n"
+    "- Design details (colors, patterns, logos, buttons, pockets, etc.)\n"
+    "- Front, back, and side design elements (if multiple views provided)\n"
+    "- Fabric texture and material properties\n"
+    "- 3D structure from multiple angles\n\n"
+
+    "3. GARMENT COORDINATION:\n"
+    "Layer the {total_garment_count} garments correctly:\n"
+    "- Layer properly (top over bottom, jacket over shirt)\n"
+    "- Position each garment appropriately on body\n"
+    "- Maintain realistic proportions between garments\n\n"
+
+    "4. GARMENT ADAPTATION (Apply to extracted garments):\n"
+    "Take the extracted garment designs and adapt them to fit the AVATAR's body:\n"
+    "- **DRAPING:** Warp each garment to fit the avatar's body contours and pose\n"
+    "- **WRINKLES:** Add natural wrinkles based on avatar's pose and fabric type\n"
+    "- **SHADOWS:** Apply shadows that match the avatar's lighting\n"
+    "- **OCCLUSION:** Layer garments behind avatar's hands/arms if they're in front\n"
+    "- **STYLING:** If garments show styling (rolled sleeves, raised collar), apply to garments on avatar\n"
+    "- **INTERACTION:** Show realistic interaction between garments\n\n"
+
+    "🎯 FINAL OUTPUT SPECIFICATION:\n"
+    "You MUST generate an image that is:\n"
+    "✓ The EXACT avatar person (image 1) - same face, same body, same pose, same background\n"
+    "✓ With ALL {total_garment_count} garment designs (from garment images) now fitted onto them\n"
+    "✓ The garments look realistically worn, not pasted on\n"
+    "✓ All garments work together as a cohesive outfit\n\n"
+
+    "❌ YOUR OUTPUT MUST NOT BE:\n"
+    "✗ A different person\n"
+    "✗ Any model from the garment reference images\n"
+    "✗ A blend/composite of avatar and any garment model\n"
+    "✗ A changed/modified version of the avatar\n\n"
+
+    "🔴 FINAL REMINDER: Use the avatar person from image 1. Extract only the garment designs from the other images. "
+    "DO NOT replace the avatar with anyone else. Use ALL {total_image_count} reference images to extract complete garment details."
+)
+
+_SINGLE_INTRO_HEAD = (
+    "CRITICAL INSTRUCTION: This is a VIRTUAL TRY-ON task. You MUST keep the person from the FIRST image (avatar) 100% unchanged.\n"
+    "Your ONLY job is to add the garment onto this existing person. DO NOT create a new person.\n\n"
+
+    "IMAGE ORDER:\n"
+    "- Image 1: AVATAR (the person to dress - keep this person exactly as-is)\n"
+)
+
+_SINGLE_IMAGE_ORDER = {
+    VIEWS_SINGLE: "- Image 2: GARMENT reference image (extract garment design only)\n\n",
+    VIEWS_MULTI: "- Images {image_numbers}: GARMENT reference images (extract garment design only)\n\n",
+}
+
+_SINGLE_REFERENCE_CONTEXT = {
+    VIEWS_SINGLE: "",
+    VIEWS_MULTI: (
+        "REFERENCE IMAGES PROVIDED: {num_views} images of the SAME garment showing different views.\n"
+        "Use ALL {num_views} reference images to:\n"
+        "- Understand the complete structure from all angles (front, back, side views)\n"
+        "- Capture design details visible only in specific views\n"
+        "- Ensure accurate color by cross-referencing multiple views\n"
+        "- Identify fabric texture and material properties\n\n"
+    ),
+}
+
+_SINGLE_PROHIBITIONS = (
+    "ABSOLUTE PROHIBITIONS - NEVER DO THESE:\n"
+    "1. DO NOT replace the avatar person with a different person\n"
+    "2. DO NOT use the person/model from the garment reference images\n"
+    "3. DO NOT change the avatar's face, body, pose, or appearance in ANY way\n"
+    "4. DO NOT change the background or lighting from the avatar image\n"
+    "5. DO NOT create a composite of the avatar and garment model\n\n"
+
+    "✅ WHAT YOU MUST DO:\n\n"
+    + _AVATAR_PRESERVATION +
+
+    "2. GARMENT EXTRACTION (from reference images):\n"
+)
+
+_SINGLE_EXTRACTION = {
+    VIEWS_SINGLE: "From the garment reference image, extract only: \n",
+    VIEWS_MULTI: "Analyze ALL garment reference images to extract: \n",
+}
+
+_SINGLE_EXTRACTION_TAIL = (
+    "Extract ONLY the {garment_type} design - ignore the person wearing it.\n"
+    "Always select the front facing garment image for the try on\n"
+)
+
+_CATEGORY_DETAILS = {
+    CATEGORY_TOP: (
+        "- NECK STYLING: Preserve exact neckline (round/V-neck/collar/turtleneck).\n"
+        "- SLEEVE DETAILS: Maintain exact sleeve length (short/long/3-quarter) and style.\n"
+        "- COLLAR DETAILS: Keep exact collar type, shape, and positioning.\n"
+        "- BUTTON/ZIPPER DETAILS: Preserve all buttons, zippers, and fasteners in exact positions.\n"
+        "- POCKET DETAILS: Maintain all pockets, flaps, and positioning.\n"
+        "- PATTERN/PRINT: Keep exact colors, patterns, logos, and graphic designs.\n"
+        "- FABRIC TEXTURE: Preserve material appearance (cotton/denim/silk/knit texture).\n"
+        "- HEM DETAILS: Maintain exact bottom hemline and any decorative elements.\n"
+    ),
+    CATEGORY_BOTTOM: (
+        "- WAISTLINE: Preserve exact waist height (high/low/mid-rise) and waistband details.\n"
+        "- LEG SHAPE: Maintain exact fit style (skinny/straight/wide-leg/bootcut).\n"
+        "- LENGTH: Keep exact garment length (ankle/cropped/full-length/knee-length).\n"
+        "- POCKET DETAILS: Preserve all pockets, stitching, and positioning.\n"
+        "- SEAM DETAILS: Maintain all visible seams, side stripes, and decorative stitching.\n"
+        "- BUTTON/ZIPPER: Keep exact fly style, button placement, and closure details.\n"
+        "- PATTERN/PRINT: Preserve exact colors, patterns, distressing, or fading.\n"
+        "- FABRIC TEXTURE: Maintain material appearance (denim/cotton/leather texture).\n"
+        "- HEM DETAILS: Keep exact bottom hem style (cuffed/raw/finished).\n"
+        "- BELT LOOPS: Preserve belt loops, belt details, or waistband styling.\n"
+    ),
+    CATEGORY_OTHER: (
+        "- DESIGN DETAILS: Preserve ALL design elements, embellishments, and features.\n"
+        "- COLOR/PATTERN: Keep exact colors, patterns, prints, and graphic elements.\n"
+        "- FABRIC TEXTURE: Maintain exact material appearance and texture.\n"
+        "- CLOSURE DETAILS: Preserve all buttons, zippers, ties, or fastening methods.\n"
+    ),
+}
+
+_ADAPTATION_AND_OUTPUT = (
+    "\n3. GARMENT ADAPTATION (Apply to extracted garment):\n"
+    "Take the extracted {garment_type} design and adapt it to fit the AVATAR's body:\n"
+    "- **DRAPING:** Warp the garment to fit the avatar's body contours and pose\n"
+    "- **WRINKLES:** Add natural wrinkles based on avatar's pose and fabric type\n"
+    "- **SHADOWS:** Apply shadows that match the avatar's lighting\n"
+    "- **OCCLUSION:** Layer garment behind avatar's hands/arms if they're in front\n"
+    "- **STYLING:** If garment shows styling (rolled sleeves, open collar), apply to garment on avatar\n\n"
+
+    "🎯 FINAL OUTPUT SPECIFICATION:\n"
+    "You MUST generate an image that is:\n"
+    "✓ The EXACT avatar person (image 1) - same face, same body, same pose, same background\n"
+    "✓ With the {garment_type} design (from garment images) now fitted onto them\n"
+    "✓ The garment looks realistically worn, not pasted on\n\n"
+
+    "❌ YOUR OUTPUT MUST NOT BE:\n"
+    "✗ A different person\n"
+    "✗ The model from the garment reference images\n"
+    "✗ A blend/composite of avatar and garment model\n"
+    "✗ A changed/modified version of the avatar\n\n"
+
+    "🔴 FINAL REMINDER: Use the avatar person from image 1. Extract only the garment design from the other images. "
+    "DO NOT replace the avatar with anyone else."
+)
+
+
+class PromptTemplate:
+    __slots__ = ('version', 'mode', 'category', 'views', 'text', 'static_tokens')
+
+    def __init__(self, version, mode, category, views, text):
+        self.version = version
+        self.mode = mode
+        self.category = category
+        self.views = views
+        self.text = text
+        # Literal text only, i.e. what every request pays regardless of its fields
+        self.static_tokens = estimate_tokens(''.join(literal for literal, *_ in string.Formatter().parse(text)))
+
+    @property
+    def id(self):
+        return f"{self.version}/{self.mode}/{self.category}/{self.views}"
+
+    def render(self, **fields):
+        return self.text.format(**fields)
+
+
+def _build_templates(version):
+    templates = {}
+    for category, details in _CATEGORY_DETAILS.items():
+        # v1 multi-garment prompts end with the detail/adaptation sections of
+        # the last garment in the request
+        templates[(MODE_MULTI, category, VIEWS_ANY)] = PromptTemplate(
+            version, MODE_MULTI, category, VIEWS_ANY,
+            _MULTI_INTRO + details + _ADAPTATION_AND_OUTPUT
+        )
+        for views in (VIEWS_SINGLE, VIEWS_MULTI):
+            templates[(MODE_SINGLE, category, views)] = PromptTemplate(
+                version, MODE_SINGLE, category, views,
+                _SINGLE_INTRO_HEAD + _SINGLE_IMAGE_ORDER[views] + _SINGLE_REFERENCE_CONTEXT[views]
+                + _SINGLE_PROHIBITIONS + _SINGLE_EXTRACTION[views] + _SINGLE_EXTRACTION_TAIL
+                + details + _ADAPTATION_AND_OUTPUT
+            )
+    return templates
+
+
+class PromptRegistry:
+    def __init__(self, version=PROMPT_VERSION):
+        self.version = version
+        self.templates = _build_templates(version)
+        self._usage = {}
+        self._lock = threading.Lock()
+
+    def build(self, garment_types, views_per_garment):
+        """
+        Pick the template for a request and render it.
+
+        ``garment_types`` and ``views_per_garment`` are parallel lists (one
+        entry per garment). Returns (template, prompt_text).
+        """
+        total_images = sum(views_per_garment)
+        if len(garment_types) > 1:
+            descriptions = []
+            for idx, (garment_type, views) in enumerate(zip(garment_types, views_per_garment)):
+                if views > 1:
+                    descriptions.append(f"Garment {idx+1} ({garment_type}) - {views} reference images")
+                else:
+                    descriptions.append(f"Garment {idx+1} ({garment_type})")
+            garment_type = garment_types[-1]
+            template = self.templates[(MODE_MULTI, garment_category(garment_type), VIEWS_ANY)]
+            text = template.render(
+                total_garment_count=len(garment_types),
+                total_image_count=total_images,
+                last_image_number=total_images + 1,
+                garments_list=", ".join(descriptions),
+                garment_type=garment_type,
+            )
+        else:
+            garment_type = garment_types[0]
+            num_views = views_per_garment[0]
+            views = VIEWS_MULTI if num_views > 1 else VIEWS_SINGLE
+            template = self.templates[(MODE_SINGLE, garment_category(garment_type), views)]
+            text = template.render(
+                garment_type=garment_type,
+                num_views=num_views,
+                image_numbers=', '.join(str(i) for i in range(2, num_views + 2)),
+            )
+        return template, text
+
+    def record_usage(self, template, prompt_tokens):
+        """Accumulate the prompt token count Gemini reported for a request"""
+        if not prompt_tokens:
+            return
+        with self._lock:
+            usage = self._usage.setdefault(template.id, {'requests': 0, 'prompt_tokens': 0})
+            usage['requests'] += 1
+            usage['prompt_tokens'] += prompt_tokens
+
+    def stats(self):
+        """Per-template token estimate plus the observed average prompt tokens"""
+        with self._lock:
+            usage = {template_id: dict(counts) for template_id, counts in self._usage.items()}
+        stats = {}
+        for template in self.templates.values():
+            entry = {'estimated_static_tokens': template.static_tokens}
+            counts = usage.get(template.id)
+            if counts:
+                entry['requests'] = counts['requests']
+                entry['avg_prompt_tokens'] = round(counts['prompt_tokens'] / counts['requests'])
+            stats[template.id] = entry
+        return stats
+
+tryon_prompts = PromptRegistry()
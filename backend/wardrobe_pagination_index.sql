@@ -0,0 +1,4 @@
+-- Index for the keyset-paginated wardrobe listing
+-- (/api/wardrobe/user/<user_id>/items orders by date_added DESC, id DESC per user).
+-- New installs get it from wardrobe_setup.sql; run this once on existing databases.
+CREATE INDEX idx_wardrobe_user_date_id ON wardrobe(user_id, date_added, id);
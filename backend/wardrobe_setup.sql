@@ -3,7 +3,10 @@ CREATE TABLE IF NOT EXISTS wardrobe (
     id INT PRIMARY KEY AUTO_INCREMENT,
     user_id VARCHAR(255) NOT NULL,
     garment_id VARCHAR(255) NOT NULL,
-    garment_image LONGBLOB NOT NULL,
+    garment_image LONGBLOB NULL,  -- legacy; images now live in the blob store
+    image_sha256 CHAR(64) NULL,
+    image_size INT UNSIGNED NULL,
+    image_mime VARCHAR(64) NULL,
     garment_type ENUM('upper', 'lower') NOT NULL,
     garment_url TEXT,
     date_added DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -14,6 +17,8 @@ CREATE TABLE IF NOT EXISTS wardrobe (
 CREATE INDEX idx_wardrobe_user_id ON wardrobe(user_id);
 CREATE INDEX idx_wardrobe_garment_type ON wardrobe(garment_type);
 CREATE INDEX idx_wardrobe_date_added ON wardrobe(date_added);
+-- Keyset pagination for /api/wardrobe/user/<user_id>/items
+CREATE INDEX idx_wardrobe_user_date_id ON wardrobe(user_id, date_added, id);
 
 -- Example queries:
 -- Get all garments for a user:
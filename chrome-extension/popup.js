@@ -13,6 +13,36 @@ const API_BASE_URL = 'http://35.198.124.100:5000';
 // - For PRODUCTION: Comment out localhost, uncomment the VM IP line and replace YOUR_VM_IP
 // Example: const API_BASE_URL = 'http://34.123.45.67:5000';
 
+// ============================
+// Session Token
+// ============================
+// Login returns a signed session token. User-scoped backend calls send it as
+// a Bearer token instead of the popup re-sending the password. A 401 on a
+// call that carried a token means it expired: the stored sign-in is dropped
+// and the popup returns to the login page.
+const SESSION_STORAGE_KEYS = ['userSignedIn', 'sessionToken', 'userId', 'userEmail', 'userProfile'];
+
+function getSessionToken() {
+  return new Promise((resolve) => {
+    chrome.storage.local.get(['sessionToken'], (result) => resolve(result.sessionToken || null));
+  });
+}
+
+async function apiFetch(url, options = {}) {
+  const token = await getSessionToken();
+  const headers = { ...(options.headers || {}) };
+  if (token) {
+    headers['Authorization'] = `Bearer ${token}`;
+  }
+  const response = await fetch(url, { ...options, headers });
+  if (response.status === 401 && token) {
+    console.log('🔒 Session token rejected - signing out');
+    await new Promise((resolve) => chrome.storage.local.remove(SESSION_STORAGE_KEYS, resolve));
+    document.dispatchEvent(new CustomEvent('session-expired'));
+  }
+  return response;
+}
+
 // Global garment item counter for unique IDs
 let garmentItemCounter = 0;
 
@@ -550,6 +580,30 @@ document.addEventListener('DOMContentLoaded', function() {
     });
   }
 
+  // Fetch every wardrobe item page by page from the paginated listing.
+  // Items carry a signed image URL instead of inline base64; garment_image
+  // holds the absolute URL so it works as an <img> src and for comparisons.
+  async function fetchWardrobeItems(userId) {
+    const items = [];
+    let cursor = null;
+    do {
+      let url = `${API_BASE_URL}/api/wardrobe/user/${userId}/items?limit=100`;
+      if (cursor) {
+        url += `&cursor=${encodeURIComponent(cursor)}`;
+      }
+      const response = await apiFetch(url);
+      if (!response.ok) {
+        throw new Error(`Failed to fetch wardrobe: ${response.status}`);
+      }
+      const page = await response.json();
+      for (const item of page.items) {
+        items.push({ ...item, garment_image: `${API_BASE_URL}${item.image_url}` });
+      }
+      cursor = page.has_more ? page.next_cursor : null;
+    } while (cursor);
+    return items;
+  }
+
   // Function to load wardrobe items when no images are found on page
   async function loadWardrobeAsFallback() {
     console.log('📦 Loading wardrobe items as fallback...');
@@ -571,13 +625,7 @@ document.addEventListener('DOMContentLoaded', function() {
       console.log('🔍 Loading wardrobe for user:', userId);
       
       // Fetch wardrobe items from API
-      const response = await fetch(`${API_BASE_URL}/api/wardrobe/user/${userId}`);
-      
-      if (!response.ok) {
-        throw new Error(`Failed to fetch wardrobe: ${response.status}`);
-      }
-      
-      const wardrobeItems = await response.json();
+      const wardrobeItems = await fetchWardrobeItems(userId);
       console.log(`📦 Loaded ${wardrobeItems.length} wardrobe items from database`);
       
       if (wardrobeItems.length === 0) {
@@ -589,7 +637,7 @@ document.addEventListener('DOMContentLoaded', function() {
       // Convert wardrobe items to the format expected by displayImagesInPlaceholders
       // Add width/height to ensure they pass the validation filter
       const formattedImages = wardrobeItems.map((item, index) => ({
-        src: item.garment_image, // Base64 image
+        src: item.garment_image, // Signed wardrobe image URL
         type: 'wardrobe',
         garment_id: item.garment_id,
         garment_type: item.garment_type,
@@ -785,6 +833,13 @@ document.addEventListener('DOMContentLoaded', function() {
       // It's a data URL, convert directly to blob
       console.log('✅ Converting data URL to blob');
       return dataURLToBlob(imageData);
+    } else if (imageData.startsWith(`${API_BASE_URL}/api/wardrobe/`)) {
+      // Our own signed wardrobe image: no CORS problem, fetch it directly
+      const response = await fetch(imageData);
+      if (!response.ok) {
+        throw new Error(`Wardrobe image fetch failed: ${response.status}`);
+      }
+      return await response.blob();
     } else {
       // It's a regular URL, we need to proxy it through our backend to avoid CORS
       console.log('🌐 Fetching external image through backend proxy...');
@@ -862,7 +917,7 @@ document.addEventListener('DOMContentLoaded', function() {
       console.log(wardrobeData);
 
       // Save to backend database
-      const response = await fetch(`${API_BASE_URL}/api/wardrobe/save`, {
+      const response = await apiFetch(`${API_BASE_URL}/api/wardrobe/save`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -953,7 +1008,7 @@ document.addEventListener('DOMContentLoaded', function() {
       console.log('🗑️ Removing garment from wardrobe:', garmentToRemove.garment_id);
 
       // Remove from backend database
-      const response = await fetch(`${API_BASE_URL}/api/wardrobe/remove`, {
+      const response = await apiFetch(`${API_BASE_URL}/api/wardrobe/remove`, {
         method: 'DELETE',
         headers: {
           'Content-Type': 'application/json',
@@ -1083,20 +1138,17 @@ document.addEventListener('DOMContentLoaded', function() {
     try {
       if (!currentUser || !currentUser.userID) return;
       
-      const response = await fetch(`${API_BASE_URL}/api/wardrobe/user/${currentUser.userID}`);
-      if (response.ok) {
-        wardrobeItems = await response.json();
-        console.log('👗 Loaded wardrobe items:', wardrobeItems.length);
-        
-        // ✨ NEW: Auto-display wardrobe if on non-brand page
-        // Check if this is NOT a brand page after wardrobe loads
-        if (!useGarmentCheckbox && wardrobeItems.length > 0) {
-          console.log('📦 Non-brand page + wardrobe loaded → Auto-displaying wardrobe items');
-          // Small delay to ensure UI is ready
-          setTimeout(() => {
-            loadWardrobeAsFallback();
-          }, 100);
-        }
+      wardrobeItems = await fetchWardrobeItems(currentUser.userID);
+      console.log('👗 Loaded wardrobe items:', wardrobeItems.length);
+      
+      // ✨ NEW: Auto-display wardrobe if on non-brand page
+      // Check if this is NOT a brand page after wardrobe loads
+      if (!useGarmentCheckbox && wardrobeItems.length > 0) {
+        console.log('📦 Non-brand page + wardrobe loaded → Auto-displaying wardrobe items');
+        // Small delay to ensure UI is ready
+        setTimeout(() => {
+          loadWardrobeAsFallback();
+        }, 100);
       }
     } catch (error) {
       console.error('❌ Error loading wardrobe:', error);
@@ -2063,8 +2115,21 @@ document.addEventListener('DOMContentLoaded', function() {
     console.log('🔄 Forced reflow completed');
   }
 
+  // Any user-scoped call that finds the session token expired lands here
+  document.addEventListener('session-expired', () => {
+    currentUser = null;
+    showSignInPage();
+  });
+
   // Check if user is already signed in
-  chrome.storage.local.get(['userSignedIn', 'userEmail', 'userId', 'userProfile', 'isGuest'], function(result) {
+  chrome.storage.local.get(['userSignedIn', 'userEmail', 'userId', 'userProfile', 'isGuest', 'sessionToken'], async function(result) {
+    if (result.userSignedIn && result.sessionToken) {
+      // Cheap signature check instead of logging in again; offline keeps the stored sign-in
+      const sessionResponse = await apiFetch(`${API_BASE_URL}/api/session`).catch(() => null);
+      if (sessionResponse && sessionResponse.status === 401) {
+        return; // apiFetch already cleared the session and showed the sign-in page
+      }
+    }
     if (result.userSignedIn) {
       // Set current user for wardrobe functionality (only for non-guest users)
       if (!result.isGuest && result.userId) {
@@ -2145,6 +2210,7 @@ document.addEventListener('DOMContentLoaded', function() {
           userSignedIn: true,
           userEmail: email,
           userId: result.user_data.userid,
+          sessionToken: result.token,
           userProfile: {
             firstname: result.user_data.first_name,
             lastname: result.user_data.last_name,
@@ -2381,6 +2447,7 @@ document.addEventListener('DOMContentLoaded', function() {
         chrome.storage.local.set({
           userEmail: result.user_data.email,
           userId: result.user_data.userid,
+          sessionToken: result.token,
           userSignedIn: true,
           userProfile: {
             firstname: result.user_data.first_name,
@@ -2423,7 +2490,7 @@ document.addEventListener('DOMContentLoaded', function() {
       const base64Data = imageData.split(',')[1];
       console.log('💾 [SAVE-AVATAR-DB] Base64 data length:', base64Data.length, 'chars');
       
-      const response = await fetch(`${API_BASE_URL}/api/update-avatar`, {
+      const response = await apiFetch(`${API_BASE_URL}/api/update-avatar`, {
         method: 'PUT',
         headers: {
           'Content-Type': 'application/json',
@@ -2459,7 +2526,7 @@ document.addEventListener('DOMContentLoaded', function() {
     try {
       console.log('📥 Loading avatar from database for user:', userId);
       
-      const response = await fetch(`${API_BASE_URL}/api/get-avatar/${userId}`);
+      const response = await apiFetch(`${API_BASE_URL}/api/get-avatar/${userId}`);
       
       if (response.ok) {
         const blob = await response.blob();
@@ -4419,7 +4486,7 @@ document.addEventListener('DOMContentLoaded', function() {
       const userid = profileUserid.value;
 
       // Call update API
-      const response = await fetch(`http://localhost:5000/api/update-user-data/${userid}`, {
+      const response = await apiFetch(`http://localhost:5000/api/update-user-data/${userid}`, {
         method: 'PUT',
         headers: {
           'Content-Type': 'application/json',